@@ -4,6 +4,7 @@ from django.utils.translation import gettext_lazy as _
 from accountability.models import (
     Accountability,
     AccountabilityFile,
+    AccountabilityImportJob,
     ActivityReportPublication,
     ActivityReportPublicationStatus,
     AnnualStatement,
@@ -587,3 +588,28 @@ class BalanceAdjustmentAdmin(BaseModelAdmin):
     list_display = ("organization", "contract", "type", "date", "value")
     list_filter = ("organization", "contract", "type")
     search_fields = ("id", "contract__name")
+
+
+@admin.register(AccountabilityImportJob)
+class AccountabilityImportJobAdmin(BaseModelAdmin):
+    list_display = (
+        "organization",
+        "accountability",
+        "filename",
+        "status",
+        "processed_rows",
+        "total_rows",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("organization", "status")
+    search_fields = ("id", "accountability__contract__name", "filename")
+    readonly_fields = (
+        "revenue_errors",
+        "expense_errors",
+        "application_errors",
+        "error",
+        "started_at",
+        "finished_at",
+    )
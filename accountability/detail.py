@@ -0,0 +1,272 @@
+"""Expenses and revenues listed on the accountability detail page.
+
+Both lists are filtered by the same query string, counted and summed in one
+query (a UNION of two aggregates) and paged by keyset on ``(value, id)``,
+biggest first: a page is the rows after (or before) the cursor's row, so
+deep pages cost as much as the first and no COUNT runs per list. Files are
+prefetched only for the rows on the page, and their count comes from that
+prefetch instead of a COUNT DISTINCT join over every row.
+
+A cursor is ``value:id:page number``; the number is only shown ("Página 3
+de 7"). A cursor that does not parse gives the first page.
+"""
+
+import math
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import (
+    Count,
+    Prefetch,
+    Q,
+    QuerySet,
+    Sum,
+    Value,
+    prefetch_related_objects,
+)
+
+from accountability.models import (
+    Accountability,
+    Expense,
+    ExpenseFile,
+    Revenue,
+    RevenueFile,
+)
+
+DETAIL_PAGE_SIZE = 10
+
+
+@dataclass(frozen=True)
+class DetailFilters:
+    """The list filters of the detail page's query string."""
+
+    search_query: str = ""
+    paid_filter: str = "all"
+    reviwed_filter: str = "all"
+    start_date: str = ""
+    end_date: str = ""
+    date_type: str = "competence"
+    payment_status: str = "all"  # all, paid, unpaid
+    expense_type: str = "all"  # all, planned, unplanned
+
+    @classmethod
+    def from_params(cls, params) -> "DetailFilters":
+        return cls(
+            search_query=params.get("q", ""),
+            paid_filter=params.get("paid", "all"),
+            reviwed_filter=params.get("reviwed", "all"),
+            start_date=params.get("start_date", ""),
+            end_date=params.get("end_date", ""),
+            date_type=params.get("date_type", "competence"),
+            payment_status=params.get("payment_status", "all"),
+            expense_type=params.get("expense_type", "all"),
+        )
+
+    def _common(self, date_fields: dict) -> Q:
+        q = Q()
+        if self.paid_filter != "all":
+            q &= Q(paid=self.paid_filter == "true")
+        if self.reviwed_filter != "all":
+            q &= Q(status=self.reviwed_filter)
+        if self.start_date and self.end_date and self.date_type in date_fields:
+            date_field = date_fields[self.date_type]
+            q &= Q(**{f"{date_field}__range": [self.start_date, self.end_date]})
+        if self.payment_status in ("paid", "unpaid"):
+            q &= Q(paid=self.payment_status == "paid")
+        return q
+
+    def expenses(self) -> Q:
+        q = self._common(
+            {
+                "competence": "competency",
+                "liquidation": "liquidation",
+                "due_date": "due_date",
+                "conciliation": "conciled_at",
+            }
+        )
+        if self.search_query:
+            q &= (
+                Q(identification__icontains=self.search_query)
+                | Q(item__name__icontains=self.search_query)
+                | Q(favored__name__icontains=self.search_query)
+            )
+        if self.expense_type in ("planned", "unplanned"):
+            q &= Q(planned=self.expense_type == "planned")
+        return q
+
+    def revenues(self) -> Q:
+        # Revenues have a single date besides the conciliation one.
+        q = self._common(
+            {
+                "competence": "competency",
+                "liquidation": "competency",
+                "due_date": "competency",
+                "conciliation": "conciled_at",
+            }
+        )
+        if self.search_query:
+            q &= Q(identification__icontains=self.search_query)
+        return q
+
+
+@dataclass
+class KeysetPage:
+    """One page of a list, with the cursors of its neighbours."""
+
+    object_list: list
+    number: int
+    num_pages: int
+    count: int
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+def encode_cursor(obj, number: int) -> str:
+    return f"{obj.value}:{obj.pk}:{number}"
+
+
+def decode_cursor(cursor: str | None) -> tuple[Decimal, uuid.UUID, int] | None:
+    try:
+        value, pk, number = cursor.split(":")
+        return Decimal(value), uuid.UUID(pk), int(number)
+    except (AttributeError, ValueError, InvalidOperation):
+        return None
+
+
+def keyset_page(
+    queryset: QuerySet,
+    count: int,
+    after: str | None = None,
+    before: str | None = None,
+    size: int = DETAIL_PAGE_SIZE,
+) -> KeysetPage:
+    """The page of `queryset`, ordered by ``-value, -id``, next to a cursor.
+
+    `after` gives the rows following the cursor's, `before` the rows
+    preceding it; neither gives the first page. One query of ``size + 1``
+    rows, the extra one telling whether there is a page beyond.
+    """
+    num_pages = max(1, math.ceil(count / size))
+    after, before = decode_cursor(after), decode_cursor(before)
+    if after:
+        value, pk, number = after
+        rows = list(
+            queryset.filter(Q(value__lt=value) | Q(value=value, pk__lt=pk)).order_by(
+                "-value", "-pk"
+            )[: size + 1]
+        )
+        has_next, has_previous = len(rows) > size, True
+        rows = rows[:size]
+    elif before:
+        value, pk, number = before
+        rows = list(
+            queryset.filter(Q(value__gt=value) | Q(value=value, pk__gt=pk)).order_by(
+                "value", "pk"
+            )[: size + 1]
+        )
+        has_next, has_previous = True, len(rows) > size
+        rows = rows[:size][::-1]
+    else:
+        number = 1
+        rows = list(queryset.order_by("-value", "-pk")[: size + 1])
+        has_next, has_previous = len(rows) > size, False
+        rows = rows[:size]
+
+    if not has_previous:
+        number = 1
+    number = min(max(number, 1), num_pages)
+    return KeysetPage(
+        object_list=rows,
+        number=number,
+        num_pages=num_pages,
+        count=count,
+        next_cursor=encode_cursor(rows[-1], number + 1) if has_next and rows else None,
+        previous_cursor=encode_cursor(rows[0], number - 1)
+        if has_previous and rows
+        else None,
+    )
+
+
+def list_totals(**querysets: QuerySet) -> dict[str, dict]:
+    """``{name: {"count", "total"}}`` of each queryset, in one query."""
+    parts = [
+        queryset.order_by()
+        .values(name=Value(name))
+        .annotate(count=Count("pk"), total=Sum("value"))
+        .values_list("name", "count", "total")
+        for name, queryset in querysets.items()
+    ]
+    totals = {name: {"count": 0, "total": 0} for name in querysets}
+    for name, count, total in parts[0].union(*parts[1:], all=True):
+        totals[name] = {"count": count, "total": total or 0}
+    return totals
+
+
+def _with_files(rows: list, file_model) -> list:
+    """Prefetch the page's live files and count them, as `count_files`."""
+    prefetch_related_objects(
+        rows,
+        Prefetch(
+            "files",
+            queryset=file_model.objects.select_related("created_by").filter(
+                deleted_at__isnull=True
+            ),
+        ),
+    )
+    for row in rows:
+        row.count_files = len(row.files.all())
+    return rows
+
+
+def accountability_detail_lists(
+    accountability: Accountability, filters: DetailFilters, params
+) -> dict:
+    """Context for the expense and revenue tables of the detail page."""
+    expenses = (
+        Expense.objects.filter(accountability=accountability, deleted_at__isnull=True)
+        .filter(filters.expenses())
+        .select_related("item", "favored")
+    )
+    revenues = (
+        Revenue.objects.filter(accountability=accountability, deleted_at__isnull=True)
+        .filter(filters.revenues())
+        .select_related("bank_account")
+    )
+
+    totals = list_totals(expenses=expenses, revenues=revenues)
+    expenses_page = keyset_page(
+        expenses,
+        totals["expenses"]["count"],
+        after=params.get("expenses_after"),
+        before=params.get("expenses_before"),
+    )
+    revenues_page = keyset_page(
+        revenues,
+        totals["revenues"]["count"],
+        after=params.get("revenues_after"),
+        before=params.get("revenues_before"),
+    )
+    _with_files(expenses_page.object_list, ExpenseFile)
+    _with_files(revenues_page.object_list, RevenueFile)
+
+    return {
+        "expenses_page": expenses_page,
+        "revenues_page": revenues_page,
+        "expenses_total": totals["expenses"]["total"],
+        "revenues_total": totals["revenues"]["total"],
+    }
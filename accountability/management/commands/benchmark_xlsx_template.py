@@ -0,0 +1,126 @@
+"""Time the accountability import template download and report its size.
+
+Builds a contract's template with one data validation per cell, as the
+exporter did before, and with one per column, then downloads it twice
+through `export_xlsx_model`: the first call builds and stores it, the second
+is served from the cache. The cache lives in a throwaway MEDIA_ROOT, so the
+configured storage is left alone.
+
+    python manage.py benchmark_xlsx_template --contract 1001 --output after.json
+"""
+
+import datetime as dt
+import json
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from easy_tenants import tenant_context, tenant_context_disabled
+
+from accountability.models import Accountability
+from accountability.services import export_xlsx_model
+from accountability.xlsx import AccountabilityXLSXExporter
+from accountability.xlsx.xlsx_exporter import FIRST_BODY_ROW, LAST_BODY_ROW
+from reports.management.commands.benchmark_reports import _git_commit
+
+DEFAULT_CONTRACT_CODE = 1001
+
+
+class PerCellExporter(AccountabilityXLSXExporter):
+    """The exporter before range validations: one validation per cell."""
+
+    def _validate_column(self, worksheet, col: int, options: dict) -> None:
+        for line in range(FIRST_BODY_ROW, LAST_BODY_ROW + 1):
+            worksheet.data_validation(line, col, line, col, options=options)
+
+
+def measure(function, repeat: int) -> dict:
+    runs, size = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(function().getvalue())
+        runs.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "wall_ms": round(statistics.median(runs), 2),
+        "wall_ms_runs": [round(run, 2) for run in runs],
+        "bytes": size,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo de geração e o tamanho da planilha modelo de importação "
+        "da prestação de contas e emite JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--contract",
+            type=int,
+            default=DEFAULT_CONTRACT_CODE,
+            help=f"Código interno do contrato (padrão: {DEFAULT_CONTRACT_CODE}).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Execuções de cada etapa."
+        )
+        parser.add_argument("--output", help="Grava o JSON neste arquivo.")
+
+    def handle(self, *args, **options):
+        with tenant_context_disabled():
+            accountability = (
+                Accountability.objects.select_related("contract__organization")
+                .filter(contract__internal_code=options["contract"])
+                .first()
+            )
+        if accountability is None:
+            raise CommandError(
+                f"Nenhuma prestação de contas para o contrato {options['contract']}."
+            )
+
+        repeat = options["repeat"]
+        media_root = tempfile.mkdtemp(prefix="sitts-xlsx-benchmark-")
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+        try:
+            with (
+                tenant_context(accountability.contract.organization),
+                override_settings(MEDIA_ROOT=media_root, STORAGES=storages),
+            ):
+                results = {
+                    "per_cell": measure(
+                        lambda: PerCellExporter(accountability).handle(), repeat
+                    ),
+                    "per_column": measure(
+                        lambda: AccountabilityXLSXExporter(accountability).handle(),
+                        repeat,
+                    ),
+                    "cache_miss": measure(lambda: export_xlsx_model(accountability), 1),
+                    "cache_hit": measure(
+                        lambda: export_xlsx_model(accountability), repeat
+                    ),
+                }
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        payload = json.dumps(
+            {
+                "commit": _git_commit(),
+                "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+                "contract": options["contract"],
+                "repeat": repeat,
+                "results": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(payload)
+        self.stdout.write(payload)
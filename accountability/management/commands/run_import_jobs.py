@@ -0,0 +1,50 @@
+"""Import queued accountability spreadsheets outside the web process.
+
+Run alongside gunicorn (`make import-worker` locally). Several instances may
+run at once: jobs are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accountability.services import claim_next_import_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa as planilhas de prestação de contas enviadas pela tela de importação."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa a fila atual e sai, em vez de aguardar novos envios.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Segundos entre consultas quando a fila está vazia (padrão: 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Long-lived process: drop connections past CONN_MAX_AGE or broken
+            # while idle, as Django does at the edge of each request.
+            close_old_connections()
+
+            job = claim_next_import_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            job = run_import_job(job)
+            self.stdout.write(
+                f"{job.pk} {job.filename}: {job.get_status_display()} "
+                f"({job.processed_rows}/{job.total_rows} linhas)"
+            )
@@ -0,0 +1,155 @@
+# Generated by Django 6.0.5 on 2026-10-18 10:07
+
+import uuid
+
+import django.db.models.deletion
+import django.db.models.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accountability", "0007_merge_20260817_0938"),
+        ("accounts", "0003_unaccent_extension"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountabilityImportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name=django.db.models.fields.UUIDField,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "deleted_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        upload_to="uploads/accountabilities/imports/%Y/%m/",
+                        verbose_name="Arquivo",
+                    ),
+                ),
+                (
+                    "filename",
+                    models.CharField(max_length=255, verbose_name="Nome do arquivo"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Na fila"),
+                            ("RUNNING", "Importando"),
+                            ("DONE", "Concluído"),
+                            ("FAILED", "Falhou"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "total_rows",
+                    models.PositiveIntegerField(default=0, verbose_name="Linhas"),
+                ),
+                (
+                    "processed_rows",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Linhas processadas"
+                    ),
+                ),
+                (
+                    "revenue_errors",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Erros de receitas"
+                    ),
+                ),
+                (
+                    "expense_errors",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Erros de despesas"
+                    ),
+                ),
+                (
+                    "application_errors",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        verbose_name="Erros de aplicações e resgates",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Traceback da falha, para depuração — nunca exibido ao usuário",
+                        verbose_name="Erro",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Iniciado em"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Finalizado em"
+                    ),
+                ),
+                (
+                    "accountability",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="import_jobs",
+                        to="accountability.accountability",
+                        verbose_name="Prestação",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The organization associated with this tenant.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(app_label)s_%(class)s_related",
+                        to="accounts.organization",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="accountability_import_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Solicitado por",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Importação de Prestação",
+                "verbose_name_plural": "Importações de Prestações",
+                "ordering": ("-created_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="accountabil_status_a0f1c4_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.5 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accountability", "0008_accountabilityimportjob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(
+                fields=["accountability", "value", "id"],
+                name="accountabil_account_b65f54_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="revenue",
+            index=models.Index(
+                fields=["accountability", "value", "id"],
+                name="accountabil_account_6b3d4b_idx",
+            ),
+        ),
+    ]
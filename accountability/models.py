@@ -583,6 +583,10 @@ class Expense(BaseOrganizationTenantModel):
     class Meta:
         verbose_name = "Despesa"
         verbose_name_plural = "Despesas"
+        indexes = [
+            # Keyset pages of the accountability detail: `-value, -id`.
+            models.Index(fields=["accountability", "value", "id"]),
+        ]
 
     @property
     def nature_label(self) -> str:
@@ -765,6 +769,10 @@ class Revenue(BaseOrganizationTenantModel):
     class Meta:
         verbose_name = "Receita"
         verbose_name_plural = "Receitas"
+        indexes = [
+            # Keyset pages of the accountability detail: `-value, -id`.
+            models.Index(fields=["accountability", "value", "id"]),
+        ]
 
 
 class ExpenseFile(BaseOrganizationTenantModel):
@@ -1844,3 +1852,104 @@ class BalanceAdjustment(BaseOrganizationTenantModel):
 
     def __str__(self) -> str:
         return f"{self.get_type_display()} - {self.date} - {self.value}"
+
+
+class AccountabilityImportJob(BaseOrganizationTenantModel):
+    """One spreadsheet uploaded on the import screen.
+
+    The request only stores the file; `run_import_jobs` picks the row up, runs
+    `AccountabilityXLSXImporter` on it and records the progress and each
+    sheet's row errors here. The page polls the job until it is DONE or
+    FAILED. DONE means the spreadsheet was read: its rows may still have been
+    rejected, see `imported`.
+    """
+
+    class StatusChoices(models.TextChoices):
+        PENDING = "PENDING", "Na fila"
+        RUNNING = "RUNNING", "Importando"
+        DONE = "DONE", "Concluído"
+        FAILED = "FAILED", "Falhou"
+
+    accountability = models.ForeignKey(
+        Accountability,
+        verbose_name="Prestação",
+        related_name="import_jobs",
+        on_delete=models.CASCADE,
+    )
+    file = models.FileField(
+        verbose_name="Arquivo",
+        upload_to="uploads/accountabilities/imports/%Y/%m/",
+    )
+    filename = models.CharField(verbose_name="Nome do arquivo", max_length=255)
+    status = models.CharField(
+        verbose_name="Status",
+        max_length=10,
+        choices=StatusChoices,
+        default=StatusChoices.PENDING,
+    )
+    total_rows = models.PositiveIntegerField(verbose_name="Linhas", default=0)
+    processed_rows = models.PositiveIntegerField(
+        verbose_name="Linhas processadas", default=0
+    )
+    revenue_errors = models.JSONField(
+        verbose_name="Erros de receitas", default=list, blank=True
+    )
+    expense_errors = models.JSONField(
+        verbose_name="Erros de despesas", default=list, blank=True
+    )
+    application_errors = models.JSONField(
+        verbose_name="Erros de aplicações e resgates", default=list, blank=True
+    )
+    error = models.TextField(
+        verbose_name="Erro",
+        blank=True,
+        default="",
+        help_text="Traceback da falha, para depuração — nunca exibido ao usuário",
+    )
+    requested_by = models.ForeignKey(
+        User,
+        verbose_name="Solicitado por",
+        related_name="accountability_import_jobs",
+        on_delete=models.CASCADE,
+    )
+    started_at = models.DateTimeField(verbose_name="Iniciado em", null=True, blank=True)
+    finished_at = models.DateTimeField(
+        verbose_name="Finalizado em", null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = "Importação de Prestação"
+        verbose_name_plural = "Importações de Prestações"
+        ordering = ("-created_at",)
+        indexes = [
+            # The worker's claim query: oldest pending job first.
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in {self.StatusChoices.DONE, self.StatusChoices.FAILED}
+
+    @property
+    def imported(self) -> bool:
+        return self.status == self.StatusChoices.DONE and not any(
+            [self.revenue_errors, self.expense_errors, self.application_errors]
+        )
+
+    @property
+    def progress(self) -> int:
+        """Percentage of the rows processed so far."""
+        if not self.total_rows:
+            return 100 if self.is_finished else 0
+        return self.processed_rows * 100 // self.total_rows
+
+    @property
+    def error_sections(self) -> list[tuple[str, list]]:
+        return [
+            ("Receitas", self.revenue_errors),
+            ("Despesas", self.expense_errors),
+            ("Aplicações e resgates", self.application_errors),
+        ]
@@ -0,0 +1,81 @@
+"""Step through an accountability's expenses or revenues under review.
+
+The review pages show one entry at a time, addressed by its position. The
+order is fixed when the reviewer starts (``?restart=1`` on the first page):
+the ids of the entries IN_ANALISIS, biggest value first, are kept in the
+session. Each click then loads only the entry at that position, with its
+files, instead of every entry under review. The list does not move as
+entries are reviewed and leave IN_ANALISIS, so "previous" goes back to the
+entry just saved instead of skipping one.
+"""
+
+from dataclasses import dataclass
+
+from django.db.models import Model, QuerySet
+
+from accountability.models import Accountability
+
+REVIEW_SESSION_PREFIX = "accountability:review"
+
+
+@dataclass(frozen=True)
+class ReviewCursor:
+    """The entry at `index` of a review and the ids around it."""
+
+    entry: Model
+    index: int
+    total: int
+    previous_id: str | None = None
+    next_id: str | None = None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_id is not None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_id is not None
+
+
+def review_session_key(accountability: Accountability, model) -> str:
+    return f"{REVIEW_SESSION_PREFIX}:{model._meta.model_name}:{accountability.pk}"
+
+
+def review_ids(
+    session, accountability: Accountability, model, restart: bool = False
+) -> list[str]:
+    """The ordered ids of the review, fixed on the first call or a restart."""
+    key = review_session_key(accountability, model)
+    ids = session.get(key)
+    if restart or ids is None:
+        ids = [
+            str(pk)
+            for pk in model.objects.filter(
+                accountability=accountability,
+                status=model.ReviewStatus.IN_ANALISIS,
+            )
+            .order_by("-value", "-id")
+            .values_list("id", flat=True)
+        ]
+        session[key] = ids
+    return ids
+
+
+def review_cursor(
+    queryset: QuerySet, ids: list[str], index: int
+) -> ReviewCursor | None:
+    """The cursor at `index`, or None if it is out of range or was deleted."""
+    if not 0 <= index < len(ids):
+        return None
+
+    entry = queryset.filter(pk=ids[index]).first()
+    if entry is None:
+        return None
+
+    return ReviewCursor(
+        entry=entry,
+        index=index,
+        total=len(ids),
+        previous_id=ids[index - 1] if index > 0 else None,
+        next_id=ids[index + 1] if index + 1 < len(ids) else None,
+    )
@@ -1,17 +1,206 @@
-from django.core.files.uploadedfile import InMemoryUploadedFile
+import logging
+import traceback
+from collections.abc import Callable
+from io import BytesIO
 
-from accountability.models import Accountability
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, UploadedFile
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from easy_tenants import tenant_context, tenant_context_disabled
+from simple_history.utils import bulk_update_with_history
+
+from accountability.models import (
+    Accountability,
+    AccountabilityImportJob,
+    Expense,
+    Revenue,
+)
 from accountability.xlsx import AccountabilityXLSXExporter
+from accountability.xlsx.cache import (
+    get_cached_template,
+    store_template,
+    template_cache_key,
+)
+from accounts.models import User
+from activity.models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+RECONCILED_ACTIONS = {
+    Expense: ActivityLog.ActivityLogChoices.RECONCILED_EXPENSE,
+    Revenue: ActivityLog.ActivityLogChoices.RECONCILED_REVENUE,
+}
+
 
+def export_xlsx_model(accountability: Accountability) -> BytesIO:
+    """The contract's import template, built once per change of its lookups."""
+    key = template_cache_key(accountability.contract)
+    cached = get_cached_template(key)
+    if cached is not None:
+        return BytesIO(cached)
 
-def export_xlsx_model(accountability: Accountability):
-    return AccountabilityXLSXExporter(accountability).handle()
+    output = AccountabilityXLSXExporter(accountability).handle()
+    store_template(key, output.getvalue())
+    return output
 
 
-def import_xlsx_model(file: InMemoryUploadedFile, accountability: Accountability):
+def import_xlsx_model(
+    file: InMemoryUploadedFile,
+    accountability: Accountability,
+    progress: Callable[[int, int], None] | None = None,
+):
     # Imported here, not at module scope: the importer pulls in pandas + numpy
     # (~95 MiB resident) and this module is reachable from the URLconf, so a
-    # top-level import would charge that to every request path, not just upload.
+    # top-level import would charge that to every web worker. Only
+    # `run_import_jobs` gets here, or an upload with BACKGROUND_JOBS_INLINE.
     from accountability.xlsx import AccountabilityXLSXImporter
 
-    return AccountabilityXLSXImporter(file, accountability).handle()
+    return AccountabilityXLSXImporter(file, accountability).handle(progress)
+
+
+def enqueue_import_job(
+    accountability: Accountability, file: UploadedFile, requested_by: User
+) -> AccountabilityImportJob:
+    """Store an uploaded spreadsheet for `run_import_jobs` to import.
+
+    With `BACKGROUND_JOBS_INLINE` it is imported before returning.
+    """
+    job = AccountabilityImportJob(
+        accountability=accountability,
+        filename=file.name,
+        requested_by=requested_by,
+    )
+    job.file.save(file.name, file, save=False)
+    if settings.BACKGROUND_JOBS_INLINE:
+        job.status = AccountabilityImportJob.StatusChoices.RUNNING
+        job.started_at = timezone.now()
+        job.save()
+        return run_import_job(job)
+
+    job.save()
+    return job
+
+
+def claim_next_import_job() -> AccountabilityImportJob | None:
+    """Move the oldest pending job to RUNNING and return it.
+
+    Claimed with `skip_locked`, like `claim_next_report_job`, so several
+    workers never import the same spreadsheet twice.
+    """
+    with tenant_context_disabled(), db_transaction.atomic():
+        job = (
+            AccountabilityImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=AccountabilityImportJob.StatusChoices.PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = AccountabilityImportJob.StatusChoices.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at", "updated_at"])
+        return job
+
+
+def run_import_job(job: AccountabilityImportJob) -> AccountabilityImportJob:
+    """Import a claimed job's spreadsheet and record its row errors.
+
+    Progress is written after each sheet with a bare UPDATE, so the page
+    polling the job sees it while the rest of the row is untouched.
+    """
+
+    def progress(processed: int, total: int) -> None:
+        AccountabilityImportJob.objects.filter(pk=job.pk).update(
+            processed_rows=processed, total_rows=total, updated_at=timezone.now()
+        )
+        job.processed_rows, job.total_rows = processed, total
+
+    with tenant_context(job.organization):
+        try:
+            accountability = Accountability.objects.select_related(
+                "contract", "contract__organization"
+            ).get(pk=job.accountability_id)
+            with job.file.open("rb") as file:
+                (
+                    imported,
+                    job.revenue_errors,
+                    job.expense_errors,
+                    job.application_errors,
+                ) = import_xlsx_model(file, accountability, progress)
+            job.status = AccountabilityImportJob.StatusChoices.DONE
+            if imported:
+                ActivityLog.objects.create(
+                    user=job.requested_by,
+                    user_email=job.requested_by.email,
+                    action=ActivityLog.ActivityLogChoices.IMPORTED_ACCOUNTABILITY_FILE,
+                    target_object_id=accountability.id,
+                    target_content_object=accountability,
+                )
+        except Exception:
+            # The page polls until the job settles: record the failure on the
+            # row instead of leaving it RUNNING forever.
+            logger.exception("Accountability import job %s failed", job.pk)
+            job.status = AccountabilityImportJob.StatusChoices.FAILED
+            job.error = traceback.format_exc()
+
+        job.finished_at = timezone.now()
+        job.save()
+        return job
+
+
+def reconcile_entries(reconciliations, user, replace=False, logged=None) -> None:
+    """Mark expenses or revenues as reconciled with their bank transactions.
+
+    `reconciliations` pairs each entry (all of one model) with the
+    transactions it was reconciled with; the first one's date is an expense's
+    liquidation. `replace` drops the entry's earlier links, like
+    ``bank_transactions.set()``; otherwise they are kept, like ``.add()``.
+    `logged` are the entries that get an `ActivityLog` (all by default).
+
+    A fixed number of queries however many entries: one bulk update plus one
+    insert of historical records, one delete and one insert on the M2M table
+    and one insert of logs. Bulk-created logs skip `post_save`, which only
+    sends e-mails for actions other than these.
+    """
+    if not reconciliations:
+        return
+
+    model = type(reconciliations[0][0])
+    relation = model._meta.model_name
+    through = model.bank_transactions.through
+    fields = ["conciled", "conciled_at", "paid", "updated_at"]
+    if model is Expense:
+        fields.append("liquidation")
+
+    now = timezone.now()
+    entries, links = [], []
+    for entry, transactions in reconciliations:
+        entry.conciled = True
+        entry.conciled_at = now
+        entry.paid = True
+        # Bulk updates skip `auto_now`; the report cache stamp reads it.
+        entry.updated_at = now
+        if model is Expense:
+            entry.liquidation = transactions[0].date
+        entries.append(entry)
+        links += [through(transaction=t, **{relation: entry}) for t in transactions]
+
+    with db_transaction.atomic():
+        bulk_update_with_history(entries, model, fields, default_user=user)
+        if replace:
+            through.objects.filter(**{f"{relation}__in": entries}).delete()
+        through.objects.bulk_create(links, ignore_conflicts=True)
+        ActivityLog.objects.bulk_create(
+            [
+                ActivityLog(
+                    user=user,
+                    user_email=user.email,
+                    action=RECONCILED_ACTIONS[model],
+                    target_object_id=entry.id,
+                    target_content_object=entry,
+                )
+                for entry in (entries if logged is None else logged)
+            ]
+        )
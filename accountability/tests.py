@@ -1,12 +1,20 @@
+import datetime
 import json
 import shutil
 import tempfile
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
 from pathlib import Path
 from unittest.mock import patch
 
+import openpyxl
+from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
+from django.db import connection
 from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from easy_tenants import tenant_context
@@ -14,8 +22,20 @@ from google.auth.credentials import Credentials
 from google.cloud.storage.blob import Blob
 from storages.backends.gcloud import GoogleCloudStorage
 
-from accountability.models import Accountability, Expense, ExpenseFile
+from accountability.models import (
+    Accountability,
+    AccountabilityImportJob,
+    Expense,
+    ExpenseFile,
+    Favored,
+    ResourceSource,
+)
+from accountability.services import export_xlsx_model, reconcile_entries
+from accountability.xlsx import AccountabilityXLSXExporter, AccountabilityXLSXImporter
+from accountability.xlsx.validation import RowValidator
 from accounts.models import User
+from activity.models import ActivityLog
+from bank.models import Transaction
 from core import settings as project_settings
 
 
@@ -67,10 +87,12 @@ class CloudStorageConfigurationTests(SimpleTestCase):
         )
 
 
-class ExpenseDocumentWorkspaceTests(TestCase):
+class TemporaryMediaMixin:
+    """Files go to a throwaway MEDIA_ROOT on the local file system."""
+
     @classmethod
     def setUpClass(cls):
-        cls.media_root = tempfile.mkdtemp(prefix="sitts-document-tests-")
+        cls.media_root = tempfile.mkdtemp(prefix="sitts-tests-")
         cls.settings_override = override_settings(
             MEDIA_ROOT=cls.media_root,
             STORAGES={
@@ -89,6 +111,8 @@ class ExpenseDocumentWorkspaceTests(TestCase):
         cls.settings_override.disable()
         shutil.rmtree(cls.media_root, ignore_errors=True)
 
+
+class ExpenseDocumentWorkspaceTests(TemporaryMediaMixin, TestCase):
     @classmethod
     def setUpTestData(cls):
         call_command("seed_dev", verbosity=0)
@@ -588,3 +612,593 @@ class ExpenseDocumentWorkspaceTests(TestCase):
             self.assertFalse(
                 ExpenseFile.objects.filter(accountability=self.accountability).exists()
             )
+
+
+class ReconcileEntriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            cls.accountability = Accountability.objects.get(
+                contract__internal_code=1001, month=4, year=2026
+            )
+            template = cls.accountability.expenses.first()
+            account = cls.accountability.contract.checking_account
+            cls.pairs = []
+            for i in range(12):
+                expense = Expense.objects.get(pk=template.pk)
+                expense.pk = uuid.uuid4()
+                expense._state.adding = True
+                expense.identification = f"Despesa em lote {i}"
+                expense.value = Decimal("100.00") + i
+                expense.conciled = expense.paid = False
+                expense.save()
+                transaction = Transaction.objects.create(
+                    bank_account=account,
+                    amount=-expense.value,
+                    date=datetime.date(2026, 4, 20),
+                    memo=f"Pagamento em lote {i}",
+                )
+                cls.pairs.append((expense, transaction))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_batch_reconcile_writes_in_bulk(self):
+        url = reverse("accountability:batch-reconcile", args=[self.accountability.id])
+        data = {
+            f"transaction_{expense.id}": str(transaction.id)
+            for expense, transaction in self.pairs
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+
+        self.assertRedirects(
+            response,
+            reverse(
+                "accountability:accountability-detail", args=[self.accountability.id]
+            ),
+            fetch_redirect_response=False,
+        )
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        # Expenses, their history, M2M links and activity logs: one write each
+        # whatever the number of pairs.
+        self.assertEqual(len(writes), 4, writes)
+
+        with tenant_context(self.user.organization):
+            for expense, transaction in self.pairs:
+                expense.refresh_from_db()
+                self.assertTrue(expense.conciled and expense.paid)
+                self.assertEqual(expense.liquidation, transaction.date)
+                self.assertEqual(list(expense.bank_transactions.all()), [transaction])
+                self.assertEqual(expense.history.first().history_user, self.user)
+            self.assertEqual(
+                ActivityLog.objects.filter(
+                    action=ActivityLog.ActivityLogChoices.RECONCILED_EXPENSE,
+                    target_object_id__in=[str(e.id) for e, _ in self.pairs],
+                ).count(),
+                len(self.pairs),
+            )
+
+    def test_replace_swaps_earlier_links(self):
+        (expense, first), (_, second) = self.pairs[:2]
+
+        with tenant_context(self.user.organization):
+            reconcile_entries([(expense, [first])], self.user)
+            reconcile_entries([(expense, [second])], self.user, replace=True)
+
+            self.assertEqual(list(expense.bank_transactions.all()), [second])
+            self.assertEqual(expense.liquidation, second.date)
+
+    def test_reconcile_revenue_view_replaces_links(self):
+        with tenant_context(self.user.organization):
+            revenue = self.accountability.revenues.first()
+            transaction = Transaction.objects.create(
+                bank_account=self.accountability.contract.checking_account,
+                amount=revenue.value,
+                date=datetime.date(2026, 4, 21),
+                memo="Repasse",
+            )
+
+        response = self.client.post(
+            reverse("accountability:revenue-reconcile", args=[revenue.id]),
+            {"transactions": [str(transaction.id)]},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        with tenant_context(self.user.organization):
+            self.assertEqual(list(revenue.bank_transactions.all()), [transaction])
+
+
+class XLSXSpreadsheetMixin:
+    """The exported import template, filled with rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            cls.accountability = Accountability.objects.get(
+                contract__internal_code=1001, month=4, year=2026
+            )
+            cls.template = AccountabilityXLSXExporter(cls.accountability).handle()
+
+    def spreadsheet(self, revenues=(), expenses=(), applications=()):
+        workbook = openpyxl.load_workbook(BytesIO(self.template.getvalue()))
+        for sheet, rows in (
+            ("1. RECEITAS", revenues),
+            ("2. DESPESAS", expenses),
+            ("3. APLICACOES E RESGATES", applications),
+        ):
+            for row, values in enumerate(rows, start=3):
+                for column, value in enumerate(values, start=3):
+                    workbook[sheet].cell(row=row, column=column, value=value)
+
+        output = BytesIO()
+        workbook.save(output)
+        return SimpleUploadedFile("prestacao.xlsx", output.getvalue())
+
+    def rows(self, count, prefix, day=10):
+        workbook = openpyxl.load_workbook(BytesIO(self.template.getvalue()))
+        source, favored = workbook["FD"]["A2"].value, workbook["FV"]["A2"].value
+        date = datetime.datetime(2026, 4, day)
+        revenues = [
+            (f"{prefix} receita {i}", 100 + i, date, date, "Prefeitura")
+            + ("CONTA CORRENTE", "Depósito Bancário", None)
+            for i in range(count)
+        ]
+        expenses = [
+            (f"{prefix} despesa {i}", 10.5 + i, date, date, source)
+            + ("Bens e Materiais permanentes", favored, None, "NF", f"{i}", None)
+            for i in range(count)
+        ]
+        applications = [
+            (50 + i, date, f"{prefix}{i}", "CONTA CORRENTE") for i in range(count)
+        ]
+        return revenues, expenses, applications
+
+
+class XLSXImportTests(XLSXSpreadsheetMixin, TestCase):
+    def import_spreadsheet(self, upload):
+        with tenant_context(self.user.organization):
+            return AccountabilityXLSXImporter(upload, self.accountability).handle()
+
+    def test_queries_do_not_grow_with_rows(self):
+        counts = []
+        for count, prefix, day in ((5, "A", 10), (150, "B", 11)):
+            upload = self.spreadsheet(*self.rows(count, prefix, day))
+            with CaptureQueriesContext(connection) as queries:
+                imported, *errors = self.import_spreadsheet(upload)
+            self.assertTrue(imported, errors)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        with tenant_context(self.user.organization):
+            self.assertEqual(
+                self.accountability.revenues.filter(
+                    identification__startswith="B receita"
+                ).count(),
+                150,
+            )
+            self.assertEqual(
+                self.accountability.expenses.filter(
+                    identification__startswith="B despesa"
+                ).count(),
+                150,
+            )
+
+    def test_row_errors_match_full_clean(self):
+        with tenant_context(self.user.organization):
+            valid = {
+                "accountability": self.accountability,
+                "planned": False,
+                "identification": "Despesa",
+                "value": Decimal("10.00"),
+                "competency": datetime.date(2026, 4, 1),
+                "source_id": ResourceSource.objects.first().pk,
+            }
+            cases = [
+                {},
+                {"identification": "x" * 129},
+                {"source_id": uuid.uuid4(), "favored_id": uuid.uuid4()},
+                {"value": "12,50", "competency": None},
+                {"nature": "NOPE", "due_date": "31/13/2026"},
+            ]
+            expected = []
+            for case in cases:
+                try:
+                    Expense(**valid | case).full_clean()
+                    expected.append([])
+                except ValidationError as e:
+                    expected.append(e.messages)
+
+            expenses = [Expense(**valid | case) for case in cases]
+            validator = RowValidator(
+                Expense, expenses, known={"accountability": [self.accountability.pk]}
+            )
+            with self.assertNumQueries(0):
+                errors = [validator.errors(expense) for expense in expenses]
+
+        self.assertEqual(errors, expected)
+        self.assertEqual(errors[0], [])
+        self.assertTrue(all(errors[1:]))
+
+    def test_unparseable_cells_are_row_errors(self):
+        revenues, _, _ = self.rows(2, "C")
+        revenues[1] = revenues[1][:1] + ("12,50", "31/13/2026") + revenues[1][3:]
+
+        imported, revenue_errors, *_ = self.import_spreadsheet(
+            self.spreadsheet(revenues=revenues)
+        )
+
+        self.assertFalse(imported)
+        self.assertEqual(len(revenue_errors), 1, revenue_errors)
+        self.assertTrue(revenue_errors[0].startswith("Receita 2"), revenue_errors)
+        self.assertIn("12,50", revenue_errors[0])
+        self.assertIn("31/13/2026", revenue_errors[0])
+
+
+    def test_applications_imported_twice_are_reported(self):
+        _, _, applications = self.rows(2, "D")
+        first = self.import_spreadsheet(self.spreadsheet(applications=applications))
+        second = self.import_spreadsheet(self.spreadsheet(applications=applications))
+
+        self.assertEqual(first, (True, [], [], []))
+        imported, _, _, application_errors = second
+        self.assertFalse(imported)
+        self.assertEqual(len(application_errors), 2, application_errors)
+        self.assertTrue(
+            all("Aplicação já importada" in error for error in application_errors)
+        )
+        with tenant_context(self.user.organization):
+            self.assertEqual(
+                Transaction.objects.filter(transaction_number__in=["D0", "D1"]).count(),
+                2,
+            )
+
+
+class AccountabilityImportJobTests(TemporaryMediaMixin, XLSXSpreadsheetMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def upload(self, upload):
+        return self.client.post(
+            reverse(
+                "accountability:accountability-import", args=[self.accountability.pk]
+            ),
+            {"step": "upload", "xlsx_file": upload},
+        )
+
+    def run_worker(self):
+        output = StringIO()
+        call_command("run_import_jobs", once=True, stdout=output)
+        return output.getvalue()
+
+    @override_settings(BACKGROUND_JOBS_INLINE=True)
+    def test_inline_upload_is_imported_without_a_worker(self):
+        self.upload(self.spreadsheet(*self.rows(3, "K", 13)))
+
+        with tenant_context(self.user.organization):
+            job = AccountabilityImportJob.objects.get()
+            self.assertEqual(job.status, AccountabilityImportJob.StatusChoices.DONE)
+            self.assertTrue(job.imported)
+            self.assertEqual(
+                self.accountability.revenues.filter(
+                    identification__startswith="K receita"
+                ).count(),
+                3,
+            )
+
+    def test_upload_is_queued_and_imported_by_the_worker(self):
+        response = self.upload(self.spreadsheet(*self.rows(3, "J", 12)))
+
+        with tenant_context(self.user.organization):
+            job = AccountabilityImportJob.objects.get()
+            self.assertRedirects(
+                response,
+                reverse("accountability:accountability-import-job", args=[job.pk]),
+            )
+            self.assertEqual(job.status, AccountabilityImportJob.StatusChoices.PENDING)
+            self.assertFalse(
+                self.accountability.revenues.filter(
+                    identification__startswith="J receita"
+                ).exists()
+            )
+
+        self.assertIn(str(job.pk), self.run_worker())
+
+        with tenant_context(self.user.organization):
+            job.refresh_from_db()
+            self.assertEqual(job.status, AccountabilityImportJob.StatusChoices.DONE)
+            self.assertTrue(job.imported)
+            self.assertEqual((job.processed_rows, job.total_rows), (9, 9))
+            self.assertEqual(
+                self.accountability.revenues.filter(
+                    identification__startswith="J receita"
+                ).count(),
+                3,
+            )
+            self.assertTrue(
+                ActivityLog.objects.filter(
+                    action=ActivityLog.ActivityLogChoices.IMPORTED_ACCOUNTABILITY_FILE,
+                    target_object_id=self.accountability.pk,
+                ).exists()
+            )
+
+        status = self.client.get(
+            reverse("accountability:accountability-import-job-status", args=[job.pk])
+        ).json()
+        self.assertEqual(status["status"], "DONE")
+        self.assertEqual(status["progress"], 100)
+        self.assertTrue(status["finished"])
+
+    def test_row_errors_are_stored_on_the_job(self):
+        revenues, _, _ = self.rows(2, "K", 13)
+        revenues[1] = revenues[1][:1] + ("12,50",) + revenues[1][2:]
+        self.upload(self.spreadsheet(revenues=revenues))
+        self.run_worker()
+
+        with tenant_context(self.user.organization):
+            job = AccountabilityImportJob.objects.get()
+        self.assertEqual(job.status, AccountabilityImportJob.StatusChoices.DONE)
+        self.assertFalse(job.imported)
+        self.assertEqual(len(job.revenue_errors), 1, job.revenue_errors)
+        self.assertIn("12,50", job.revenue_errors[0])
+
+        response = self.client.get(
+            reverse("accountability:accountability-import-job", args=[job.pk])
+        )
+        self.assertContains(response, "12,50")
+
+    def test_unreadable_file_fails_the_job(self):
+        self.upload(SimpleUploadedFile("prestacao.xlsx", b"not a spreadsheet"))
+        self.run_worker()
+
+        with tenant_context(self.user.organization):
+            job = AccountabilityImportJob.objects.get()
+        self.assertEqual(job.status, AccountabilityImportJob.StatusChoices.FAILED)
+        self.assertIn("Excel sheets are not in the right format", job.error)
+
+    def test_other_users_cannot_see_the_job(self):
+        self.upload(self.spreadsheet(*self.rows(1, "L", 14)))
+        with tenant_context(self.user.organization):
+            job = AccountabilityImportJob.objects.get()
+            other = User.objects.exclude(pk=self.user.pk).first()
+
+        self.client.force_login(other)
+        response = self.client.get(
+            reverse("accountability:accountability-import-job-status", args=[job.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class XLSXTemplateTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            cls.accountability = Accountability.objects.get(
+                contract__internal_code=1001, month=4, year=2026
+            )
+
+    def test_validations_cover_each_column_once(self):
+        with tenant_context(self.user.organization):
+            template = export_xlsx_model(self.accountability)
+
+        workbook = openpyxl.load_workbook(template)
+        for sheet, columns in (
+            ("1. RECEITAS", "DEFGHI"),
+            ("2. DESPESAS", "DEFGHIJK"),
+            ("3. APLICACOES E RESGATES", "CDFG"),
+        ):
+            validations = workbook[sheet].data_validations.dataValidation
+            self.assertEqual(
+                sorted(str(validation.sqref) for validation in validations),
+                [f"{column}3:{column}1002" for column in columns],
+            )
+
+    def test_template_is_cached_until_lookups_change(self):
+        with tenant_context(self.user.organization):
+            first = export_xlsx_model(self.accountability).getvalue()
+            with patch.object(AccountabilityXLSXExporter, "handle") as handle:
+                self.assertEqual(
+                    export_xlsx_model(self.accountability).getvalue(), first
+                )
+            handle.assert_not_called()
+
+            Favored.objects.create(name="Favorecido novo", document="12345678000199")
+            template = export_xlsx_model(self.accountability)
+
+        favored = [
+            row[0]
+            for row in openpyxl.load_workbook(template)["FV"].iter_rows(
+                min_row=2, values_only=True
+            )
+        ]
+        self.assertIn("Favorecido novo", favored)
+
+
+class AccountabilityDetailListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            cls.accountability = Accountability.objects.get(
+                contract__internal_code=1001, month=4, year=2026
+            )
+            template = cls.accountability.expenses.first()
+            for i in range(23):
+                expense = Expense.objects.get(pk=template.pk)
+                expense.pk = uuid.uuid4()
+                expense._state.adding = True
+                expense.identification = f"Despesa paginada {i}"
+                # Repeated values: ties are broken by id.
+                expense.value = Decimal("50.00") + i // 3
+                expense.save()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(
+            reverse(
+                "accountability:accountability-detail", args=[self.accountability.id]
+            ),
+            params,
+        )
+
+    def test_cursors_walk_every_expense_once(self):
+        with tenant_context(self.user.organization):
+            expected = list(
+                Expense.objects.filter(accountability=self.accountability)
+                .order_by("-value", "-id")
+                .values_list("id", flat=True)
+            )
+
+        seen, pages, params = [], [], {}
+        while True:
+            page = self.get(**params).context["expenses_page"]
+            pages.append(page)
+            seen += [expense.id for expense in page]
+            if not page.has_next:
+                break
+            params = {"expenses_after": page.next_cursor}
+
+        self.assertEqual(seen, expected)
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual(pages[0].num_pages, 3)
+
+        previous = self.get(expenses_before=pages[2].previous_cursor).context[
+            "expenses_page"
+        ]
+        self.assertEqual([expense.id for expense in previous], [e.id for e in pages[1]])
+        self.assertEqual(previous.number, 2)
+        self.assertTrue(previous.has_previous and previous.has_next)
+
+    def test_queries_do_not_depend_on_the_page(self):
+        first = self.get().context["expenses_page"]
+        with CaptureQueriesContext(connection) as first_queries:
+            self.get()
+        with CaptureQueriesContext(connection) as later_queries:
+            self.get(expenses_after=first.next_cursor)
+
+        self.assertEqual(len(first_queries), len(later_queries))
+        self.assertFalse(
+            [q["sql"] for q in later_queries if "COUNT(DISTINCT" in q["sql"]]
+        )
+
+    def test_totals_follow_the_filters(self):
+        response = self.get(q="paginada", expense_type="all")
+
+        with tenant_context(self.user.organization):
+            expected = Expense.objects.filter(
+                accountability=self.accountability,
+                identification__icontains="paginada",
+            )
+            total = sum(expense.value for expense in expected)
+        page = response.context["expenses_page"]
+        self.assertEqual(page.count, 23)
+        self.assertEqual(response.context["expenses_total"], total)
+        self.assertEqual(
+            [expense.count_files for expense in page],
+            [len(expense.files.all()) for expense in page],
+        )
+
+    def test_unreadable_cursor_gives_the_first_page(self):
+        page = self.get(expenses_after="nonsense").context["expenses_page"]
+        self.assertEqual(page.number, 1)
+        self.assertFalse(page.has_previous)
+
+
+class ReviewNavigationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            cls.accountability = Accountability.objects.get(
+                contract__internal_code=1001, month=4, year=2026
+            )
+            cls.accountability.expenses.update(status=Expense.ReviewStatus.APPROVED)
+            cls.template = cls.accountability.expenses.first()
+            cls.add_expenses(6)
+
+    @classmethod
+    def add_expenses(cls, count):
+        for i in range(count):
+            expense = Expense.objects.get(pk=cls.template.pk)
+            expense.pk = uuid.uuid4()
+            expense._state.adding = True
+            expense.identification = f"Despesa em análise {i}"
+            expense.value = Decimal("10.00") + i
+            expense.status = Expense.ReviewStatus.IN_ANALISIS
+            expense.save()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def url(self, index):
+        return reverse(
+            "accountability:expenses-review", args=[self.accountability.id, index]
+        )
+
+    def in_analysis(self):
+        with tenant_context(self.user.organization):
+            return list(
+                Expense.objects.filter(
+                    accountability=self.accountability,
+                    status=Expense.ReviewStatus.IN_ANALISIS,
+                )
+                .order_by("-value", "-id")
+                .values_list("id", flat=True)
+            )
+
+    def test_order_is_kept_while_entries_are_reviewed(self):
+        ids = self.in_analysis()
+        response = self.client.get(self.url(0) + "?restart=1")
+        self.assertEqual(response.context["expense"].id, ids[0])
+        self.assertEqual(response.context["total_expenses"], 6)
+
+        response = self.client.post(
+            self.url(0),
+            {"status": Expense.ReviewStatus.APPROVED, "action": "next"},
+        )
+        self.assertRedirects(response, self.url(1))
+
+        response = self.client.get(self.url(1))
+        self.assertEqual(response.context["expense"].id, ids[1])
+        self.assertEqual(response.context["total_expenses"], 6)
+
+        response = self.client.post(
+            self.url(1),
+            {"status": Expense.ReviewStatus.IN_ANALISIS, "action": "previous"},
+        )
+        self.assertRedirects(response, self.url(0))
+        self.assertEqual(self.client.get(self.url(0)).context["expense"].id, ids[0])
+
+    def test_queries_per_click_do_not_grow_with_entries(self):
+        self.client.get(self.url(0) + "?restart=1")
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url(3))
+
+        with tenant_context(self.user.organization):
+            self.add_expenses(40)
+        self.client.get(self.url(0) + "?restart=1")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url(3))
+
+        self.assertEqual(response.context["total_expenses"], 46)
+        self.assertEqual(len(few), len(many))
+
+    def test_out_of_range_index_restarts_the_review(self):
+        self.client.get(self.url(0) + "?restart=1")
+        response = self.client.get(self.url(99))
+        self.assertRedirects(response, self.url(0) + "?restart=1")
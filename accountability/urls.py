@@ -21,6 +21,8 @@ from accountability.views import (
     ResourceSourceUpdateView,
     accountability_detail_view,
     accountability_file_delete_view,
+    accountability_import_job_status_view,
+    accountability_import_job_view,
     accountability_pendencies_view,
     annual_statement_activity_report_publication_view,
     annual_statement_conclusive_opinion_view,
@@ -98,6 +100,16 @@ urlpatterns = [
         import_accountability_view,
         name="accountability-import",
     ),
+    path(
+        "accountability/import-jobs/<uuid:pk>",
+        accountability_import_job_view,
+        name="accountability-import-job",
+    ),
+    path(
+        "accountability/import-jobs/<uuid:pk>/status",
+        accountability_import_job_status_view,
+        name="accountability-import-job-status",
+    ),
     path(
         "detail/<uuid:pk>",
         accountability_detail_view,
@@ -1,23 +1,21 @@
 import json
 import logging
-import unicodedata
 from datetime import date
 from typing import Any
 
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
 from django.db import transaction as db_transaction
 from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
 from django.db.models.query import Prefetch, QuerySet
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import DetailView, ListView, TemplateView, UpdateView
 
+from accountability.detail import DetailFilters, accountability_detail_lists
 from accountability.forms import (
     AccountabilityCreateForm,
     AccountabilityFileForm,
@@ -56,6 +54,7 @@ from accountability.forms import (
 from accountability.models import (
     Accountability,
     AccountabilityFile,
+    AccountabilityImportJob,
     ActivityReportPublicationStatus,
     AnnualStatement,
     BalanceAdjustment,
@@ -79,10 +78,21 @@ from accountability.models import (
     Revenue,
     RevenueFile,
 )
-from accountability.services import export_xlsx_model, import_xlsx_model
+from accountability.review import review_cursor, review_ids
+from accountability.services import (
+    enqueue_import_job,
+    export_xlsx_model,
+    reconcile_entries,
+)
 from accounts.models import Area, User
 from activity.models import ActivityLog
 from bank.models import Transaction
+from bank.services.matching import (
+    TransactionIndex,
+    expense_entry,
+    match_entries,
+    revenue_entry,
+)
 from contracts.models import Contract, ContractInterestedPart
 from utils.logging import log_database_operation, log_view_access
 from utils.mixins import (
@@ -413,158 +423,24 @@ def create_contract_accountability_view(request, pk):
 def accountability_detail_view(request, pk):
     accountability = get_object_or_404(Accountability, id=pk)
 
-    search_query = request.GET.get("q", "")
-    paid_filter = request.GET.get("paid", "all")
-    reviwed_filter = request.GET.get("reviwed", "all")
-    start_date = request.GET.get("start_date", "")
-    end_date = request.GET.get("end_date", "")
-    date_type = request.GET.get("date_type", "competence")
-    payment_status = request.GET.get("payment_status", "all")  # all, paid, unpaid
-    expense_type = request.GET.get("expense_type", "all")  # all, planned, unplanned
-
-    expenses_list = (
-        Expense.objects.filter(accountability=accountability)
-        .select_related("item", "favored")
-        .prefetch_related(
-            Prefetch(
-                "files",
-                queryset=ExpenseFile.objects.select_related("created_by").filter(
-                    deleted_at__isnull=True
-                ),
-            )
-        )
-        .annotate(
-            count_files=Count(
-                "files",
-                filter=Q(files__deleted_at__isnull=True),
-                distinct=True,
-            )
-        )
-        .order_by("-value")
-        .filter(deleted_at__isnull=True)
-    )
-
-    revenues_list = (
-        Revenue.objects.filter(accountability=accountability)
-        .select_related("bank_account")
-        .prefetch_related(
-            Prefetch(
-                "files",
-                queryset=RevenueFile.objects.select_related("created_by").filter(
-                    deleted_at__isnull=True
-                ),
-            )
-        )
-        .annotate(
-            count_files=Count(
-                "files",
-                filter=Q(files__deleted_at__isnull=True),
-                distinct=True,
-            )
-        )
-        .order_by("-value")
-        .filter(deleted_at__isnull=True)
-    )
+    filters = DetailFilters.from_params(request.GET)
 
     documents_list = AccountabilityFile.objects.filter(
         accountability=accountability,
     ).select_related("created_by")
-
-    # Apply filters
-    if search_query:
-        expenses_list = expenses_list.filter(
-            Q(identification__icontains=search_query)
-            | Q(item__name__icontains=search_query)
-            | Q(favored__name__icontains=search_query)
-        )
-        revenues_list = revenues_list.filter(Q(identification__icontains=search_query))
-        documents_list = documents_list.filter(Q(name__icontains=search_query))
-
-    # Apply payment status filter
-    if paid_filter != "all":
-        expenses_list = expenses_list.filter(paid=paid_filter == "true")
-        revenues_list = revenues_list.filter(paid=paid_filter == "true")
-
-    # Apply review status filter
-    if reviwed_filter != "all":
-        expenses_list = expenses_list.filter(status=reviwed_filter)
-        revenues_list = revenues_list.filter(status=reviwed_filter)
-
-    # Apply date range filter
-    if start_date and end_date:
-        match date_type:
-            case "competence":
-                expenses_list = expenses_list.filter(
-                    competency__range=[start_date, end_date]
-                )
-                revenues_list = revenues_list.filter(
-                    competency__range=[start_date, end_date]
-                )
-            case "liquidation":
-                expenses_list = expenses_list.filter(
-                    liquidation__range=[start_date, end_date]
-                )
-                revenues_list = revenues_list.filter(
-                    competency__range=[start_date, end_date]
-                )
-            case "due_date":
-                expenses_list = expenses_list.filter(
-                    due_date__range=[start_date, end_date]
-                )
-                revenues_list = revenues_list.filter(
-                    competency__range=[start_date, end_date]
-                )
-            case "conciliation":
-                expenses_list = expenses_list.filter(
-                    conciled_at__range=[start_date, end_date]
-                )
-                revenues_list = revenues_list.filter(
-                    conciled_at__range=[start_date, end_date]
-                )
-            case _:
-                pass
-
-    # Apply payment status filter
-    if payment_status != "all":
-        match payment_status:
-            case "paid":
-                expenses_list = expenses_list.filter(paid=True)
-                revenues_list = revenues_list.filter(paid=True)
-            case "unpaid":
-                expenses_list = expenses_list.filter(paid=False)
-                revenues_list = revenues_list.filter(paid=False)
-            case _:
-                pass
-
-    # Apply expense type filter
-    if expense_type != "all":
-        match expense_type:
-            case "planned":
-                expenses_list = expenses_list.filter(planned=True)
-            case "unplanned":
-                expenses_list = expenses_list.filter(planned=False)
-            case _:
-                pass
-
-    expenses_paginator = Paginator(expenses_list, 10)
-    revenues_paginator = Paginator(revenues_list, 10)
-
-    expenses_page = expenses_paginator.get_page(request.GET.get("expenses_page"))
-    revenues_page = revenues_paginator.get_page(request.GET.get("revenues_page"))
+    if filters.search_query:
+        documents_list = documents_list.filter(Q(name__icontains=filters.search_query))
 
     context = {
         "accountability": accountability,
-        "expenses_page": expenses_page,
-        "revenues_page": revenues_page,
         "documents": documents_list,
-        "expenses_total": expenses_list.aggregate(Sum("value"))["value__sum"] or 0,
-        "revenues_total": revenues_list.aggregate(Sum("value"))["value__sum"] or 0,
-        "search_query": search_query,
-        "start_date": start_date,
-        "end_date": end_date,
-        "date_type": date_type,
-        "payment_status": payment_status,
-        "expense_type": expense_type,
+        "search_query": filters.search_query,
+        "start_date": filters.start_date,
+        "end_date": filters.end_date,
+        "date_type": filters.date_type,
+        "payment_status": filters.payment_status,
+        "expense_type": filters.expense_type,
+        **accountability_detail_lists(accountability, filters, request.GET),
     }
 
     return render(request, "accountability/accountability/detail.html", context)
@@ -975,35 +851,15 @@ def import_accountability_view(request, pk):
         elif step == "upload":
             form = ImportXLSXAccountabilityForm(request.POST, request.FILES)
             if form.is_valid():
-                (
-                    imported,
-                    revenues_error,
-                    expenses_error,
-                    applications_error,
-                ) = import_xlsx_model(
-                    file=form.cleaned_data["xlsx_file"],
+                # Large sheets take longer than a request may: store the file
+                # and let `run_import_jobs` import it, or import it here with
+                # BACKGROUND_JOBS_INLINE.
+                job = enqueue_import_job(
                     accountability=accountability,
+                    file=form.cleaned_data["xlsx_file"],
+                    requested_by=request.user,
                 )
-                if imported:
-                    _ = ActivityLog.objects.create(
-                        user=request.user,
-                        user_email=request.user.email,
-                        action=ActivityLog.ActivityLogChoices.IMPORTED_ACCOUNTABILITY_FILE,
-                        target_object_id=accountability.id,
-                        target_content_object=accountability,
-                    )
-                return render(
-                    request,
-                    "accountability/accountability/import.html",
-                    {
-                        "accountability": accountability,
-                        "form": form,
-                        "imported": imported,
-                        "revenues_error": revenues_error,
-                        "expenses_error": expenses_error,
-                        "applications_error": applications_error,
-                    },
-                )
+                return redirect("accountability:accountability-import-job", pk=job.id)
             else:
                 return render(
                     request,
@@ -1028,6 +884,39 @@ def import_accountability_view(request, pk):
         )
 
 
+@login_required
+def accountability_import_job_view(request, pk):
+    job = get_object_or_404(
+        AccountabilityImportJob.objects.select_related("accountability"),
+        id=pk,
+        requested_by=request.user,
+    )
+    return render(
+        request,
+        "accountability/accountability/import-job.html",
+        {"job": job, "accountability": job.accountability},
+    )
+
+
+@login_required
+@require_GET
+def accountability_import_job_status_view(request, pk):
+    """Polled by the import page until the job is DONE or FAILED."""
+    job = get_object_or_404(AccountabilityImportJob, id=pk, requested_by=request.user)
+    return JsonResponse(
+        {
+            "success": job.status != AccountabilityImportJob.StatusChoices.FAILED,
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_label": job.get_status_display(),
+            "processed_rows": job.processed_rows,
+            "total_rows": job.total_rows,
+            "progress": job.progress,
+            "finished": job.is_finished,
+        }
+    )
+
+
 @login_required
 @require_POST
 def expense_delete_view(request, pk):
@@ -1291,8 +1180,12 @@ def review_accountability_expenses(request, pk, index):
     accountability = get_object_or_404(
         Accountability.objects.select_related("contract"), id=pk
     )
-    expenses = list(
-        accountability.expenses.select_related(
+    ids = review_ids(
+        request.session, accountability, Expense, restart="restart" in request.GET
+    )
+    cursor = review_cursor(
+        Expense.objects.filter(accountability=accountability)
+        .select_related(
             "source",
             "favored",
             "item",
@@ -1304,16 +1197,22 @@ def review_accountability_expenses(request, pk, index):
                     deleted_at__isnull=True
                 ),
             )
-        )
-        .filter(status=Expense.ReviewStatus.IN_ANALISIS)
-        .order_by("-value")
+        ),
+        ids,
+        index,
     )
-    total_expenses = len(expenses)
-
-    if index < 0 or index >= total_expenses:
-        return redirect("revisar_item", accountability_id=accountability.id, index=0)
+    if cursor is None:
+        if not ids:
+            return redirect(
+                "accountability:accountability-detail", pk=accountability.id
+            )
+        # Out of range, or deleted since the review started: start over.
+        return redirect(
+            reverse("accountability:expenses-review", args=[accountability.id, 0])
+            + "?restart=1"
+        )
 
-    current_expense = expenses[index]
+    current_expense = cursor.entry
     if request.method == "POST":
         with db_transaction.atomic():
             current_expense.status = request.POST.get("status")
@@ -1330,18 +1229,16 @@ def review_accountability_expenses(request, pk, index):
 
         action = request.POST.get("action")
         if action == "next":
-            next_index = index + 1 if index < total_expenses - 1 else index
             return redirect(
-                "accountability:review-expenses",
+                "accountability:expenses-review",
                 pk=accountability.id,
-                index=next_index,
+                index=index + 1 if cursor.has_next else index,
             )
         elif action == "previous":
-            previous_index = index - 1 if index > 0 else 0
             return redirect(
-                "accountability:review-expenses",
+                "accountability:expenses-review",
                 pk=accountability.id,
-                index=previous_index,
+                index=index - 1 if cursor.has_previous else index,
             )
         elif action == "save_all":
             return redirect(
@@ -1351,8 +1248,8 @@ def review_accountability_expenses(request, pk, index):
     context = {
         "accountability": accountability,
         "expense": current_expense,
-        "current_expense_index": index + 1,
-        "total_expenses": total_expenses,
+        "current_expense_index": cursor.index + 1,
+        "total_expenses": cursor.total,
     }
     return render(
         request,
@@ -1410,10 +1307,12 @@ def review_accountability_revenues(request, pk, index):
     accountability = get_object_or_404(
         Accountability.objects.select_related("contract"), id=pk
     )
-    revenues = list(
-        accountability.revenues.select_related(
-            "bank_account",
-        )
+    ids = review_ids(
+        request.session, accountability, Revenue, restart="restart" in request.GET
+    )
+    cursor = review_cursor(
+        Revenue.objects.filter(accountability=accountability)
+        .select_related("bank_account")
         .prefetch_related(
             Prefetch(
                 "files",
@@ -1421,16 +1320,22 @@ def review_accountability_revenues(request, pk, index):
                     deleted_at__isnull=True
                 ),
             )
-        )
-        .filter(status=Revenue.ReviewStatus.IN_ANALISIS)
-        .order_by("-value")
+        ),
+        ids,
+        index,
     )
-    total_revenues = len(revenues)
-
-    if index < 0 or index >= total_revenues:
-        return redirect("revisar_item", accountability_id=accountability.id, index=0)
+    if cursor is None:
+        if not ids:
+            return redirect(
+                "accountability:accountability-detail", pk=accountability.id
+            )
+        # Out of range, or deleted since the review started: start over.
+        return redirect(
+            reverse("accountability:revenues-review", args=[accountability.id, 0])
+            + "?restart=1"
+        )
 
-    current_revenue = revenues[index]
+    current_revenue = cursor.entry
     if request.method == "POST":
         with db_transaction.atomic():
             current_revenue.status = request.POST.get("status")
@@ -1447,18 +1352,16 @@ def review_accountability_revenues(request, pk, index):
 
         action = request.POST.get("action")
         if action == "next":
-            next_index = index + 1 if index < total_revenues - 1 else index
             return redirect(
-                "accountability:review-revenues",
+                "accountability:revenues-review",
                 pk=accountability.id,
-                index=next_index,
+                index=index + 1 if cursor.has_next else index,
             )
         elif action == "previous":
-            previous_index = index - 1 if index > 0 else 0
             return redirect(
-                "accountability:review-revenues",
+                "accountability:revenues-review",
                 pk=accountability.id,
-                index=previous_index,
+                index=index - 1 if cursor.has_previous else index,
             )
         elif action == "save_all":
             return redirect(
@@ -1468,8 +1371,8 @@ def review_accountability_revenues(request, pk, index):
     context = {
         "accountability": accountability,
         "revenue": current_revenue,
-        "current_revenue_index": index + 1,
-        "total_revenues": total_revenues,
+        "current_revenue_index": cursor.index + 1,
+        "total_revenues": cursor.total,
     }
     return render(
         request,
@@ -1529,21 +1432,14 @@ def reconcile_expense_view(request, pk):
         files = request.FILES.getlist("files")
 
         if form.is_valid():
+            transactions = list(form.cleaned_data["transactions"])
             with db_transaction.atomic():
-                expense.conciled = True
-                expense.conciled_at = timezone.now()
-                expense.paid = True
-                expense.liquidation = form.cleaned_data["transactions"][0].date
-                expense.save()
-                expense.bank_transactions.set(form.cleaned_data["transactions"])
-
-                for related in relateds:
-                    related.conciled = True
-                    related.conciled_at = timezone.now()
-                    related.paid = True
-                    related.liquidation = form.cleaned_data["transactions"][0].date
-                    related.save()
-                    related.bank_transactions.set(form.cleaned_data["transactions"])
+                reconcile_entries(
+                    [(entry, transactions) for entry in [expense, *relateds]],
+                    request.user,
+                    replace=True,
+                    logged=[expense],
+                )
 
                 for file in files:
                     ExpenseFile.objects.create(
@@ -1560,14 +1456,6 @@ def reconcile_expense_view(request, pk):
                             file=file,
                         )
 
-                _ = ActivityLog.objects.create(
-                    user=request.user,
-                    user_email=request.user.email,
-                    action=ActivityLog.ActivityLogChoices.RECONCILED_EXPENSE,
-                    target_object_id=expense.id,
-                    target_content_object=expense,
-                )
-
             action = request.POST.get("action")
             if action == "next":
                 next_expense = (
@@ -1653,21 +1541,11 @@ def reconcile_revenue_view(request, pk):
         form = ReconcileRevenueForm(request.POST, contract=contract, revenue=revenue)
 
         if form.is_valid():
-            with db_transaction.atomic():
-                revenue.conciled = True
-                revenue.conciled_at = timezone.now()
-                revenue.paid = True
-                revenue.liquidation = form.cleaned_data["transactions"][0].date
-                revenue.save()
-                revenue.bank_transactions.set(form.cleaned_data["transactions"])
-
-                _ = ActivityLog.objects.create(
-                    user=request.user,
-                    user_email=request.user.email,
-                    action=ActivityLog.ActivityLogChoices.RECONCILED_REVENUE,
-                    target_object_id=revenue.id,
-                    target_content_object=revenue,
-                )
+            reconcile_entries(
+                [(revenue, list(form.cleaned_data["transactions"]))],
+                request.user,
+                replace=True,
+            )
 
             action = request.POST.get("action")
             if action == "next":
@@ -1708,6 +1586,13 @@ def reconcile_revenue_view(request, pk):
             )
     else:
         form = ReconcileRevenueForm(contract=contract)
+        suggestion = (
+            TransactionIndex(form.fields["transactions"].queryset)
+            .match(revenue_entry(revenue))
+            .transaction
+        )
+        if suggestion:
+            form.initial["transactions"] = [suggestion.pk]
         return render(
             request,
             "accountability/revenues/reconcile.html",
@@ -2500,90 +2385,42 @@ def batch_reconcile_expenses_view(request, pk):
         .order_by("date")
     )
 
-    def normalize_text(text):
-        if not text:
-            return ""
-
-        text = unicodedata.normalize("NFD", text)
-        text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-        return text.upper()
-
-    matches = []
-    used_transaction_ids = set()
-
-    for expense in unreconciled_expenses:
-        candidate_transactions = [
-            t
-            for t in available_transactions
-            if abs(abs(t.amount) - expense.value) < 0.01
-            and t.id not in used_transaction_ids
-        ]
-
-        matched_transaction = None
-
-        if len(candidate_transactions) == 1:
-            matched_transaction = candidate_transactions[0]
-        elif len(candidate_transactions) > 1 and expense.favored:
-            first_name = expense.favored.name.split()[0] if expense.favored.name else ""
-            first_name_normalized = normalize_text(first_name)
-            if first_name_normalized and len(first_name_normalized) > 2:
-                matching_by_name = []
-                for transaction in candidate_transactions:
-                    transaction_text = normalize_text(
-                        f"{transaction.memo or ''} {transaction.name or ''}"
-                    )
-                    if first_name_normalized in transaction_text:
-                        matching_by_name.append(transaction)
-
-                if len(matching_by_name) == 1:
-                    matched_transaction = matching_by_name[0]
-
-        if matched_transaction:
-            used_transaction_ids.add(matched_transaction.id)
-            matches.append(
-                {
-                    "expense": expense,
-                    "transaction": matched_transaction,
-                    "matched": True,
-                }
-            )
-        else:
-            matches.append({"expense": expense, "transaction": None, "matched": False})
+    matches = [
+        {
+            "expense": match.entry.obj,
+            "transaction": match.transaction,
+            "matched": match.transaction is not None,
+        }
+        for match in match_entries(
+            map(expense_entry, unreconciled_expenses), available_transactions
+        )
+    ]
 
     if request.method == "POST":
-        reconciliations = []
-
+        # Only expenses the user picked a transaction for; an empty choice
+        # means they were unsure.
+        selected = {}
         for expense in unreconciled_expenses:
-            transaction_id = request.POST.get(f"transaction_{expense.id}")
-            # Only process if user selected a transaction (not empty)
-            if transaction_id and transaction_id.strip():
-                try:
-                    trans = Transaction.objects.get(id=transaction_id)
-                    reconciliations.append((expense, trans))
-                except Transaction.DoesNotExist:
-                    continue
-            # If transaction_id is empty or None, we skip this expense (user was unsure)
+            transaction_id = (
+                request.POST.get(f"transaction_{expense.id}") or ""
+            ).strip()
+            if transaction_id:
+                selected[expense] = transaction_id
+
+        transactions = {
+            str(transaction.pk): transaction
+            for transaction in Transaction.objects.filter(pk__in=selected.values())
+        }
+        reconciliations = [
+            (expense, [transactions[transaction_id]])
+            for expense, transaction_id in selected.items()
+            if transaction_id in transactions
+        ]
         if reconciliations:
-            with db_transaction.atomic():
-                for expense, trans in reconciliations:
-                    expense.conciled = True
-                    expense.conciled_at = timezone.now()
-                    expense.paid = True
-                    expense.liquidation = trans.date
-                    expense.save()
-
-                    expense.bank_transactions.add(trans)
-                    ActivityLog.objects.create(
-                        user=request.user,
-                        user_email=request.user.email,
-                        action=ActivityLog.ActivityLogChoices.RECONCILED_EXPENSE,
-                        target_object_id=expense.id,
-                        target_content_object=expense,
-                    )
-
-                return redirect(
-                    "accountability:accountability-detail", pk=accountability.id
-                )
+            reconcile_entries(reconciliations, request.user)
+            return redirect(
+                "accountability:accountability-detail", pk=accountability.id
+            )
 
     context = {
         "accountability": accountability,
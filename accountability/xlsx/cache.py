@@ -0,0 +1,87 @@
+"""Content-addressed storage for the import spreadsheet template.
+
+The template only depends on the contract: its code fills the entry sheets
+and the lookup sheets list the organization's resource sources and favored,
+the contract's bank accounts and its items. It is stored under the SHA-256 of
+a stamp of those rows, like `reports.cache`: nothing is invalidated
+explicitly, a change moves the stamp and the next download builds a fresh
+file. Every accountability of a contract downloads the same bytes. A lifecycle
+rule on the media bucket deletes templates after 30 days (docs/DEPLOY.md,
+"Cache expiry"); one still in use is simply built again.
+
+Row counts are part of the stamp so hard deletes are caught too, and
+`all_objects` so soft deletes, which touch `updated_at`, are.
+"""
+
+import hashlib
+import json
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+
+from accountability.models import Favored, ResourceSource
+from bank.models import BankAccount
+from contracts.models import Contract, ContractItem
+
+# Bump when the exporter's layout changes so templates built by the old code
+# stop being served.
+TEMPLATE_CACHE_VERSION = 1
+
+TEMPLATE_CACHE_PREFIX = "accountability/xlsx-templates"
+
+
+def lookup_version(contract: Contract) -> list:
+    """Latest change and row count of each table the lookup sheets read."""
+    accounts = [
+        account_id
+        for account_id in (contract.checking_account_id, contract.investing_account_id)
+        if account_id
+    ]
+    querysets = (
+        ResourceSource.all_objects.filter(organization=contract.organization_id),
+        Favored.all_objects.filter(organization=contract.organization_id),
+        BankAccount.all_objects.filter(pk__in=accounts),
+        ContractItem.all_objects.filter(contract=contract),
+    )
+
+    stamp = [contract.updated_at.isoformat()]
+    for queryset in querysets:
+        totals = queryset.aggregate(last=Max("updated_at"), count=Count("id"))
+        stamp.append(
+            [totals["last"].isoformat() if totals["last"] else None, totals["count"]]
+        )
+    return stamp
+
+
+def template_cache_key(contract: Contract) -> str:
+    payload = {
+        "version": TEMPLATE_CACHE_VERSION,
+        "contract": str(contract.pk),
+        "data": lookup_version(contract),
+    }
+    encoded = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def template_cache_name(key: str) -> str:
+    return f"{TEMPLATE_CACHE_PREFIX}/{key[:2]}/{key}.xlsx"
+
+
+def get_cached_template(key: str) -> bytes | None:
+    """The template stored under `key`, or None on a miss."""
+    name = template_cache_name(key)
+    if not default_storage.exists(name):
+        return None
+
+    with default_storage.open(name, "rb") as cached:
+        return cached.read()
+
+
+def store_template(key: str, content: bytes) -> str:
+    name = template_cache_name(key)
+    # Two downloads may build the same miss concurrently; the bytes are the
+    # same, so whoever lands second keeps the first copy.
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(content))
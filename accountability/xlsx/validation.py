@@ -0,0 +1,148 @@
+"""Row validation for the spreadsheet import, without a query per row.
+
+``full_clean()`` looks each foreign key up with its own SELECT and checks the
+new primary key is unused with another, so a 1,000-line sheet cost thousands
+of queries before the first insert. `RowValidator` checks the ids a sheet
+references once per foreign key, then validates every row in memory with the
+messages ``full_clean()`` gives. Dates and amounts are parsed a column at a
+time with pandas; what does not parse is left as is for the model field to
+reject, so a typo becomes that row's error instead of failing the import.
+"""
+
+import datetime
+from collections.abc import Iterable
+from decimal import Decimal
+
+import pandas as pd
+from django.core.exceptions import ValidationError
+from django.db import models
+
+CENTS = Decimal("0.01")
+
+
+def parse_dates(values: Iterable) -> list:
+    """`values` as dates; blanks become None and the rest is kept as text."""
+    values = pd.Series(list(values), dtype=object)
+    # Bare numbers would be read as nanoseconds since 1970.
+    parseable = values.map(lambda value: isinstance(value, (str, datetime.date)))
+    parsed = pd.to_datetime(
+        values.where(parseable), errors="coerce", format="mixed", dayfirst=True
+    )
+    return [
+        _parsed_or_raw(raw, None if pd.isna(date) else date.date(), str)
+        for raw, date in zip(values, parsed)
+    ]
+
+
+def parse_decimals(values: Iterable) -> list:
+    """`values` in cents; blanks become None and what does not parse stays."""
+    values = pd.Series(list(values), dtype=object)
+    numbers = pd.to_numeric(values, errors="coerce")
+    return [
+        _parsed_or_raw(
+            raw, None if pd.isna(number) else Decimal(number).quantize(CENTS)
+        )
+        for raw, number in zip(values, numbers)
+    ]
+
+
+def _parsed_or_raw(raw, parsed, unparsed=lambda raw: raw):
+    if raw is None:
+        return None
+    return unparsed(raw) if parsed is None else parsed
+
+
+class RowValidator:
+    """Validate unsaved `instances` of `model` like ``full_clean()``.
+
+    `known` maps foreign key names to ids already known to exist (the
+    accountability being imported into), which are not looked up again.
+    """
+
+    def __init__(self, model, instances: Iterable[models.Model], known=None):
+        self.fields = [field for field in model._meta.fields if not field.generated]
+        self.existing = self._existing_ids(list(instances), known or {})
+
+    def _existing_ids(self, instances, known) -> dict[str, set]:
+        """Per foreign key, the referenced ids that exist: one query each.
+
+        Through the base manager, like ``ForeignKey.validate``.
+        """
+        existing = {}
+        for field in self.fields:
+            if not field.is_relation:
+                continue
+
+            found = {self._to_python(field, pk) for pk in known.get(field.name, ())}
+            ids = (
+                {
+                    self._to_python(field, getattr(instance, field.attname))
+                    for instance in instances
+                }
+                - found
+                - {None}
+            )
+            if ids:
+                target = field.target_field.attname
+                found |= set(
+                    field.remote_field.model._base_manager.filter(
+                        **{f"{target}__in": ids}
+                    ).values_list(target, flat=True)
+                )
+            existing[field.name] = found
+        return existing
+
+    @staticmethod
+    def _to_python(field, value):
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            return None
+
+    def _clean_foreign_key(self, field, value, instance):
+        value = field.to_python(value)
+        models.Field.validate(field, value, instance)
+        if value is not None and value not in self.existing[field.name]:
+            raise ValidationError(
+                field.error_messages["invalid"],
+                code="invalid",
+                params={
+                    "model": field.remote_field.model._meta.verbose_name,
+                    "pk": value,
+                    "field": field.remote_field.field_name,
+                    "value": value,
+                },
+            )
+        field.run_validators(value)
+        return value
+
+    def errors(self, instance) -> list[str]:
+        """The messages ``instance.full_clean()`` would raise, if any.
+
+        Primary keys are fresh UUIDs, so the uniqueness check is skipped.
+        """
+        errors = {}
+        for field in self.fields:
+            raw_value = getattr(instance, field.attname)
+            if field.blank and raw_value in field.empty_values:
+                continue
+            try:
+                if field.is_relation:
+                    value = self._clean_foreign_key(field, raw_value, instance)
+                else:
+                    value = field.clean(raw_value, instance)
+                setattr(instance, field.attname, value)
+            except ValidationError as e:
+                errors[field.name] = e.error_list
+
+        try:
+            instance.clean()
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        try:
+            instance.validate_constraints(exclude=set(errors))
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        return ValidationError(errors).messages if errors else []
@@ -14,6 +14,38 @@ from accounts.models import Organization
 from contracts.choices import NatureChoices
 from contracts.models import Contract
 
+# Rows the user fills in on the entry sheets, below the two header rows.
+FIRST_BODY_ROW = 2
+LAST_BODY_ROW = 1001
+
+MONEY_VALIDATION = {
+    "validate": "decimal",
+    "criteria": "greater than or equal to",
+    "value": 0,
+    "input_message": "Digite um valor positivo em reais",
+    "error_message": "Por favor, insira um valor numérico válido (ex: 15,40)",
+    "error_type": "stop",
+}
+DATE_VALIDATION = {
+    "validate": "date",
+    "criteria": "between",
+    "minimum": datetime(2020, 1, 1),
+    "maximum": datetime(2099, 12, 31),
+    "input_message": "Digite uma data no formato dd/mm/yyyy",
+    "error_message": "Por favor, insira uma data válida (dd/mm/yyyy)",
+    "error_type": "stop",
+}
+
+
+def list_validation(name: str) -> dict:
+    """Pick from the lookup sheet range defined as `name`."""
+    return {
+        "validate": "list",
+        "source": f"={name}",
+        "input_message": "Escolha da lista",
+        "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
+    }
+
 
 class AccountabilityXLSXExporter:
     workbook: None
@@ -125,6 +157,12 @@ class AccountabilityXLSXExporter:
         for builder in builders:
             builder()
 
+    def _validate_column(self, worksheet, col: int, options: dict) -> None:
+        """One validation over the column's body rows, not one per cell."""
+        worksheet.data_validation(
+            FIRST_BODY_ROW, col, LAST_BODY_ROW, col, options=options
+        )
+
     def __build_receipt_worksheet(self):
         receipt_worksheet = self.workbook.add_worksheet(name="1. RECEITAS")
 
@@ -146,106 +184,27 @@ class AccountabilityXLSXExporter:
             receipt_worksheet.merge_range(0, col, 1, col, column_name, column_format)
             col += 1
 
-        for line in range(2, 1002):
+        for line in range(FIRST_BODY_ROW, LAST_BODY_ROW + 1):
             receipt_worksheet.write(line, 0, line - 1, self.locked_cell_format)
             receipt_worksheet.write(
                 line, 1, self.contract_code, self.locked_cell_format
             )
             receipt_worksheet.write(line, 2, "", self.body_format)
-
             receipt_worksheet.write(line, 3, 0.00, self.money_format)
-            receipt_worksheet.data_validation(
-                line,
-                3,
-                line,
-                3,
-                options={
-                    "validate": "decimal",
-                    "criteria": "greater than or equal to",
-                    "value": 0,
-                    "input_message": "Digite um valor positivo em reais",
-                    "error_message": "Por favor, insira um valor numérico válido (ex: 15,40)",
-                    "error_type": "stop",
-                },
-            )
-
             receipt_worksheet.write(line, 4, "", self.date_format)
-            receipt_worksheet.data_validation(
-                line,
-                4,
-                line,
-                4,
-                options={
-                    "validate": "date",
-                    "criteria": "between",
-                    "minimum": datetime(2020, 1, 1),
-                    "maximum": datetime(2099, 12, 31),
-                    "input_message": "Digite uma data no formato dd/mm/yyyy",
-                    "error_message": "Por favor, insira uma data válida (dd/mm/yyyy)",
-                    "error_type": "stop",
-                },
-            )
-
             receipt_worksheet.write(line, 5, "", self.date_format)
-            receipt_worksheet.data_validation(
-                line,
-                5,
-                line,
-                5,
-                options={
-                    "validate": "date",
-                    "criteria": "between",
-                    "minimum": datetime(2020, 1, 1),
-                    "maximum": datetime(2099, 12, 31),
-                    "input_message": "Digite uma data no formato dd/mm/yyyy",
-                    "error_message": "Por favor, insira uma data válida (dd/mm/yyyy)",
-                    "error_type": "stop",
-                },
-            )
-
             receipt_worksheet.write(line, 6, "", self.locked_cell_format)
-            receipt_worksheet.data_validation(
-                line,
-                6,
-                line,
-                6,
-                options={
-                    "validate": "list",
-                    "source": "=fr_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             receipt_worksheet.write(line, 7, "", self.locked_cell_format)
-            receipt_worksheet.data_validation(
-                line,
-                7,
-                line,
-                7,
-                options={
-                    "validate": "list",
-                    "source": "=cb_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             receipt_worksheet.write(line, 8, "", self.locked_cell_format)
-            receipt_worksheet.data_validation(
-                line,
-                8,
-                line,
-                8,
-                options={
-                    "validate": "list",
-                    "source": "=nr_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
             receipt_worksheet.write(line, 9, "", self.body_format)
 
+        self._validate_column(receipt_worksheet, 3, MONEY_VALIDATION)
+        self._validate_column(receipt_worksheet, 4, DATE_VALIDATION)
+        self._validate_column(receipt_worksheet, 5, DATE_VALIDATION)
+        self._validate_column(receipt_worksheet, 6, list_validation("fr_tab"))
+        self._validate_column(receipt_worksheet, 7, list_validation("cb_tab"))
+        self._validate_column(receipt_worksheet, 8, list_validation("nr_tab"))
+
         receipt_worksheet.autofit()
         return receipt_worksheet
 
@@ -286,134 +245,32 @@ class AccountabilityXLSXExporter:
             )
             col += 1
 
-        for line in range(2, 1002):
+        for line in range(FIRST_BODY_ROW, LAST_BODY_ROW + 1):
             expense_worksheet.write(line, 0, line - 1, self.locked_cell_format)
             expense_worksheet.write(
                 line, 1, self.contract_code, self.locked_cell_format
             )
             expense_worksheet.write(line, 2, "", self.body_format)
             expense_worksheet.write(line, 3, 0.00, self.money_format)
-            expense_worksheet.data_validation(
-                line,
-                3,
-                line,
-                3,
-                options={
-                    "validate": "decimal",
-                    "criteria": "greater than or equal to",
-                    "value": 0,
-                    "input_message": "Digite um valor positivo em reais",
-                    "error_message": "Por favor, insira um valor numérico válido (ex: 15,40)",
-                    "error_type": "stop",
-                },
-            )
-
             expense_worksheet.write(line, 4, "", self.date_format)
-            expense_worksheet.data_validation(
-                line,
-                4,
-                line,
-                4,
-                options={
-                    "validate": "date",
-                    "criteria": "between",
-                    "minimum": datetime(2020, 1, 1),
-                    "maximum": datetime(2099, 12, 31),
-                    "input_message": "Digite uma data no formato dd/mm/yyyy",
-                    "error_message": "Por favor, insira uma data válida (dd/mm/yyyy)",
-                    "error_type": "stop",
-                },
-            )
-
             expense_worksheet.write(line, 5, "", self.date_format)
-            expense_worksheet.data_validation(
-                line,
-                5,
-                line,
-                5,
-                options={
-                    "validate": "date",
-                    "criteria": "between",
-                    "minimum": datetime(2020, 1, 1),
-                    "maximum": datetime(2099, 12, 31),
-                    "input_message": "Digite uma data no formato dd/mm/yyyy",
-                    "error_message": "Por favor, insira uma data válida (dd/mm/yyyy)",
-                    "error_type": "stop",
-                },
-            )
-
             expense_worksheet.write(line, 6, "", self.locked_cell_format)
-            expense_worksheet.data_validation(
-                line,
-                6,
-                line,
-                6,
-                options={
-                    "validate": "list",
-                    "source": "=fd_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             expense_worksheet.write(line, 7, "", self.locked_cell_format)
-            expense_worksheet.data_validation(
-                line,
-                7,
-                line,
-                7,
-                options={
-                    "validate": "list",
-                    "source": "=nd_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             expense_worksheet.write(line, 8, "", self.locked_cell_format)
-            expense_worksheet.data_validation(
-                line,
-                8,
-                line,
-                8,
-                options={
-                    "validate": "list",
-                    "source": "=fv_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             expense_worksheet.write(line, 9, "", self.locked_cell_format)
-            expense_worksheet.data_validation(
-                line,
-                9,
-                line,
-                9,
-                options={
-                    "validate": "list",
-                    "source": "=ia_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             expense_worksheet.write(line, 10, "", self.locked_cell_format)
-            expense_worksheet.data_validation(
-                line,
-                10,
-                line,
-                10,
-                options={
-                    "validate": "list",
-                    "source": "=td_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
             expense_worksheet.write(line, 11, "", self.body_format)
             expense_worksheet.write(line, 12, "", self.body_format)
 
+        self._validate_column(expense_worksheet, 3, MONEY_VALIDATION)
+        self._validate_column(expense_worksheet, 4, DATE_VALIDATION)
+        self._validate_column(expense_worksheet, 5, DATE_VALIDATION)
+        self._validate_column(expense_worksheet, 6, list_validation("fd_tab"))
+        self._validate_column(expense_worksheet, 7, list_validation("nd_tab"))
+        self._validate_column(expense_worksheet, 8, list_validation("fv_tab"))
+        self._validate_column(expense_worksheet, 9, list_validation("ia_tab"))
+        self._validate_column(expense_worksheet, 10, list_validation("td_tab"))
+
         expense_worksheet.autofit()
         return expense_worksheet
 
@@ -438,73 +295,21 @@ class AccountabilityXLSXExporter:
             )
             col += 1
 
-        for line in range(2, 1002):
+        for line in range(FIRST_BODY_ROW, LAST_BODY_ROW + 1):
             application_worksheet.write(line, 0, line - 1, self.locked_cell_format)
             application_worksheet.write(
                 line, 1, self.contract_code, self.locked_cell_format
             )
             application_worksheet.write(line, 2, 0.00, self.money_format)
-            application_worksheet.data_validation(
-                line,
-                2,
-                line,
-                2,
-                options={
-                    "validate": "decimal",
-                    "criteria": "greater than or equal to",
-                    "value": 0,
-                    "input_message": "Digite um valor positivo em reais",
-                    "error_message": "Por favor, insira um valor numérico válido (ex: 15,40)",
-                    "error_type": "stop",
-                },
-            )
-
             application_worksheet.write(line, 3, "", self.date_format)
-            application_worksheet.data_validation(
-                line,
-                3,
-                line,
-                3,
-                options={
-                    "validate": "date",
-                    "criteria": "between",
-                    "minimum": datetime(2020, 1, 1),
-                    "maximum": datetime(2099, 12, 31),
-                    "input_message": "Digite uma data no formato dd/mm/yyyy",
-                    "error_message": "Por favor, insira uma data válida (dd/mm/yyyy)",
-                    "error_type": "stop",
-                },
-            )
-
             application_worksheet.write(line, 4, "", self.body_format)
-
             application_worksheet.write(line, 5, "", self.locked_cell_format)
-            application_worksheet.data_validation(
-                line,
-                5,
-                line,
-                5,
-                options={
-                    "validate": "list",
-                    "source": "=cb_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
-
             application_worksheet.write(line, 6, "", self.locked_cell_format)
-            application_worksheet.data_validation(
-                line,
-                6,
-                line,
-                6,
-                options={
-                    "validate": "list",
-                    "source": "=cb_tab",
-                    "input_message": "Escolha da lista",
-                    "error_message": "Favor selecionar um dos itens listados ao clicar em  ▽  ao lado da célula",
-                },
-            )
+
+        self._validate_column(application_worksheet, 2, MONEY_VALIDATION)
+        self._validate_column(application_worksheet, 3, DATE_VALIDATION)
+        self._validate_column(application_worksheet, 5, list_validation("cb_tab"))
+        self._validate_column(application_worksheet, 6, list_validation("cb_tab"))
 
         application_worksheet.autofit()
         return application_worksheet
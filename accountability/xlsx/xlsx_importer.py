@@ -2,26 +2,57 @@
 
 import logging
 import re
-from datetime import datetime
+from collections.abc import Callable
 from decimal import Decimal
 from typing import List, Tuple
+from zipfile import BadZipFile
 
-import numpy as np
-import pandas as pd
+import openpyxl
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.db import transaction as db_transaction
 from django.db.models import Sum
 from django.db.utils import DatabaseError, IntegrityError
+from openpyxl.utils.exceptions import InvalidFileException
 
 from accountability.models import Accountability, Expense, Favored, Revenue
+from accountability.xlsx.validation import RowValidator, parse_dates, parse_decimals
 from bank.models import Transaction
+from bank.services.balances import bulk_create_transactions
+from bank.services.fingerprints import assign_fingerprints
 from contracts.choices import NatureChoices
 from contracts.models import ContractItem
 
 logger = logging.getLogger(__name__)
 
 
+def sheet_rows(workbook, name: str, columns: int, first_row: int = 2) -> List[list]:
+    """The values of the sheet's rows from `first_row` on, `columns` wide.
+
+    Entry sheets have two header rows, lookup sheets one. Read-only
+    worksheets stream the XML and may return rows short of trailing blanks.
+    """
+    rows = []
+    for row in workbook[name].iter_rows(
+        min_row=first_row, max_col=columns, values_only=True
+    ):
+        rows.append(list(row) + [None] * (columns - len(row)))
+    return rows
+
+
+def filled_rows(rows: List[list], column: int) -> List[list]:
+    """`rows` up to the first one with `column` empty."""
+    for index, row in enumerate(rows):
+        if not row[column]:
+            return rows[:index]
+    return rows
+
+
+# Rows per INSERT; the database backend lowers it when a row has too many
+# columns for its parameter limit.
+IMPORT_BATCH_SIZE = 1000
+
+
 class AccountabilityXLSXImporter:
     def __init__(self, file: InMemoryUploadedFile, accountability: Accountability):
         self.file = file
@@ -34,48 +65,66 @@ class AccountabilityXLSXImporter:
         self.mapped_nrs: dict = {}
         self.mapped_nds: dict = {}
         self.mapped_tds: dict = {}
+        # The accountability is saved, so rows need not look it up.
+        self.known_ids: dict = {"accountability": [accountability.pk]}
 
-    def handle(self) -> Tuple[bool, List[str], List[str], List[str]]:
+    def handle(
+        self, progress: Callable[[int, int], None] | None = None
+    ) -> Tuple[bool, List[str], List[str], List[str]]:
         """
         Process the XLSX file and create records.
         Returns tuple of (success, revenue_errors, expense_errors, application_errors)
+        `progress` is called with (rows processed, total rows) after each sheet.
         """
         try:
-            xls = pd.ExcelFile(self.file)
-            revenues_df = pd.read_excel(xls, sheet_name="1. RECEITAS")
-            expenses_df = pd.read_excel(xls, sheet_name="2. DESPESAS")
-            applications_df = pd.read_excel(xls, sheet_name="3. APLICACOES E RESGATES")
-        except ValueError:
+            workbook = openpyxl.load_workbook(self.file, read_only=True, data_only=True)
+        except (InvalidFileException, BadZipFile):
+            raise ValueError("Excel sheets are not in the right format")
+
+        try:
+            revenues = filled_rows(sheet_rows(workbook, "1. RECEITAS", 10, 3), 2)
+            expenses = filled_rows(sheet_rows(workbook, "2. DESPESAS", 13, 3), 2)
+            applications = filled_rows(
+                sheet_rows(workbook, "3. APLICACOES E RESGATES", 7, 3), 2
+            )
+
+            # Store mapping data
+            self._store_fd_ids(sheet_rows(workbook, "FD", 2))
+            self._store_cb_ids(sheet_rows(workbook, "CB", 2))
+            self._store_fv_ids(sheet_rows(workbook, "FV", 2))
+            self._store_ia_ids(sheet_rows(workbook, "IA", 2))
+        except KeyError:
             raise ValueError("Excel sheets are not in the right format")
+        finally:
+            workbook.close()
 
-        # Store mapping data
-        self._store_fd_ids(xls)
-        self._store_cb_ids(xls)
-        self._store_fv_ids(xls)
-        self._store_ia_ids(xls)
         self._store_fr_choices()
         self._store_nr_choices()
         self._store_nd_choices()
         self._store_td_choices()
 
+        total = len(revenues) + len(expenses) + len(applications)
+        progress = progress or (lambda processed, total: None)
+        progress(0, total)
+
         # Process each sheet
-        revenues_error = self._create_revenues(revenues_df)
-        expenses_error = self._create_expenses(expenses_df)
-        applications_error = self._create_applications(applications_df)
+        revenues_error = self._create_revenues(revenues)
+        progress(len(revenues), total)
+        expenses_error = self._create_expenses(expenses)
+        progress(len(revenues) + len(expenses), total)
+        applications_error = self._create_applications(applications)
+        progress(total, total)
 
         imported = not any([revenues_error, expenses_error, applications_error])
         return imported, revenues_error, expenses_error, applications_error
 
-    def _store_fd_ids(self, xls: pd.ExcelFile) -> None:
-        df = pd.read_excel(xls, sheet_name="FD")
-        self.mapped_fds = {line[0]: line[1] for line in df.values.tolist()}
+    def _store_fd_ids(self, rows: List[list]) -> None:
+        self.mapped_fds = {line[0]: line[1] for line in rows}
 
-    def _store_cb_ids(self, xls: pd.ExcelFile) -> None:
-        df = pd.read_excel(xls, sheet_name="CB")
-        self.mapped_cbs = {line[0]: line[1] for line in df.values.tolist()}
+    def _store_cb_ids(self, rows: List[list]) -> None:
+        self.mapped_cbs = {line[0]: line[1] for line in rows}
 
-    def _store_fv_ids(self, xls: pd.ExcelFile) -> None:
-        df = pd.read_excel(xls, sheet_name="FV")
+    def _store_fv_ids(self, rows: List[list]) -> None:
         organization = self.accountability.contract.organization
 
         records = [
@@ -83,7 +132,7 @@ class AccountabilityXLSXImporter:
                 "name": row[0],
                 "document": re.sub(r"\D", "", str(row[1])) if row[1] else None,
             }
-            for row in df.values.tolist()
+            for row in rows
             if row[0]
         ]
         documents = [record["document"] for record in records if record["document"]]
@@ -117,9 +166,8 @@ class AccountabilityXLSXImporter:
 
         self.mapped_fvs = {fav.name: str(fav.id) for fav in all_favored}
 
-    def _store_ia_ids(self, xls: pd.ExcelFile) -> None:
-        df = pd.read_excel(xls, sheet_name="IA")
-        self.mapped_ias = {line[0]: line[1] for line in df.values.tolist()}
+    def _store_ia_ids(self, rows: List[list]) -> None:
+        self.mapped_ias = {line[0]: line[1] for line in rows}
 
     def _store_fr_choices(self) -> None:
         self.mapped_frs = {
@@ -137,78 +185,67 @@ class AccountabilityXLSXImporter:
             label: value for value, label in Expense.DocumentChoices.choices
         }
 
-    def _create_revenues(self, revenues_df: pd.DataFrame) -> List[str]:
-        revenues_df = revenues_df.replace({np.nan: None})
+    def _create_revenues(self, lines: List[list]) -> List[str]:
+        values = parse_decimals(line[3] for line in lines)
+        receive_dates = parse_dates(line[4] for line in lines)
+        competencies = parse_dates(line[5] for line in lines)
 
-        revenues = []
-        errors = []
-        for index, line in enumerate(revenues_df.values.tolist()[1:], start=2):
-            if not line[2]:
-                break
-
-            receive_date = line[4]
-            competency = line[5]
-            revenue = Revenue(
+        revenues = [
+            Revenue(
                 accountability=self.accountability,
                 identification=line[2],
-                value=Decimal(line[3]).quantize(Decimal("0.01")),
-                receive_date=datetime(
-                    receive_date.year, receive_date.month, receive_date.day
-                ),
-                competency=datetime(competency.year, competency.month, competency.day),
+                value=value,
+                receive_date=receive_date,
+                competency=competency,
                 source=self.mapped_frs.get(line[6]),
                 bank_account_id=self.mapped_cbs.get(line[7]),
                 revenue_nature=self.mapped_nrs.get(line[8]),
                 observations=line[9],
             )
+            for line, value, receive_date, competency in zip(
+                lines, values, receive_dates, competencies
+            )
+        ]
 
-            try:
-                revenue.full_clean()
-                revenues.append(revenue)
-            except ValidationError as e:
-                errors.append(f"Receita {line[0]}: {' '.join(e.messages)}")
+        validator = RowValidator(Revenue, revenues, known=self.known_ids)
+        errors = []
+        for line, revenue in zip(lines, revenues):
+            if messages := validator.errors(revenue):
+                errors.append(f"Receita {line[0]}: {' '.join(messages)}")
 
         if errors:
             return errors
 
         try:
             with db_transaction.atomic():
-                Revenue.objects.bulk_create(revenues, batch_size=100)
+                Revenue.objects.bulk_create(revenues, batch_size=IMPORT_BATCH_SIZE)
             return []
         except (ValidationError, IntegrityError, DatabaseError) as e:
             logger.error("Error creating revenues: %s", str(e))
             return errors
 
-    def _create_expenses(self, expenses_df: pd.DataFrame) -> List[str]:
-        expenses_df = expenses_df.replace({np.nan: None})
-        expenses = []
-        errors = []
-
-        new_expense_per_item = {}
-
-        for index, line in enumerate(expenses_df.values.tolist()[1:], start=2):
-            if not line[2]:
-                break
+    def _create_expenses(self, lines: List[list]) -> List[str]:
+        values = parse_decimals(line[3] for line in lines)
+        due_dates = parse_dates(line[4] for line in lines)
+        competencies = parse_dates(line[5] for line in lines)
 
+        rows = []
+        for line, value, due_date, competency in zip(
+            lines, values, due_dates, competencies
+        ):
             planned = bool(line[9])
-            due_date = line[4]
-            competency = line[5]
             item_id = self.mapped_ias.get(line[9], None)
-
             if planned and not item_id:
-                errors.append(
-                    "Despesa {}: Despesa planejada precisa ter um item "
-                    "associado.".format(line[0])
-                )
+                rows.append((line, None))
                 continue
 
             expense = Expense(
                 accountability=self.accountability,
                 planned=planned,
                 identification=line[2],
-                value=Decimal(line[3]).quantize(Decimal("0.01")),
-                due_date=datetime(due_date.year, due_date.month, due_date.day),
-                competency=datetime(competency.year, competency.month, competency.day),
+                value=value,
+                due_date=due_date,
+                competency=competency,
                 source_id=self.mapped_fds.get(line[6], None),
                 nature=self.mapped_nds.get(line[7], None),
                 favored_id=self.mapped_fvs.get(line[8], None),
@@ -217,80 +254,102 @@ class AccountabilityXLSXImporter:
                 document_number=line[11],
                 observations=line[12],
             )
+            rows.append((line, expense))
 
-            try:
-                expense.full_clean()
-                expenses.append(expense)
-                if planned:
-                    new_expense_per_item.setdefault(item_id, Decimal("0.00"))
-                    new_expense_per_item[item_id] += expense.value
-            except ValidationError as e:
-                errors.append(f"Despesa {line[0]}: {' '.join(e.messages)}")
-
-        for item_id, new_value in new_expense_per_item.items():
-            existing_expenses = Expense.objects.filter(
-                item_id=item_id,
-                planned=True,
-                accountability__contract=self.accountability.contract,
-            ).aggregate(total=Sum("value"))["total"] or Decimal("0.00")
-
-            contract_item = ContractItem.objects.get(pk=item_id)
-            total_planned = existing_expenses + new_value
-            if total_planned > contract_item.anual_expense:
+        validator = RowValidator(
+            Expense, [expense for _, expense in rows if expense], known=self.known_ids
+        )
+        expenses = []
+        errors = []
+        new_expense_per_item = {}
+        for line, expense in rows:
+            if expense is None:
                 errors.append(
-                    "O total de despesas para o item "
-                    f"'{contract_item}' ({total_planned}) ultrapassa o "
-                    f"limite anual de {contract_item.anual_expense}."
+                    "Despesa {}: Despesa planejada precisa ter um item "
+                    "associado.".format(line[0])
                 )
+                continue
 
+            if messages := validator.errors(expense):
+                errors.append(f"Despesa {line[0]}: {' '.join(messages)}")
+                continue
+
+            expenses.append(expense)
+            if expense.planned:
+                new_expense_per_item.setdefault(expense.item_id, Decimal("0.00"))
+                new_expense_per_item[expense.item_id] += expense.value
+
+        errors += self._planned_limit_errors(new_expense_per_item)
         if errors:
             return errors
 
         try:
             with db_transaction.atomic():
-                Expense.objects.bulk_create(expenses, batch_size=10)
+                Expense.objects.bulk_create(expenses, batch_size=IMPORT_BATCH_SIZE)
             return []
         except (ValidationError, IntegrityError, DatabaseError) as e:
             logger.error("Error creating expenses: %s", str(e))
             return errors
 
-    def _create_applications(self, applications_df: pd.DataFrame) -> List[str]:
-        applications_df = applications_df.replace({np.nan: None})
+    def _planned_limit_errors(self, new_expense_per_item: dict) -> List[str]:
+        """Items whose planned expenses would pass their annual expense."""
+        if not new_expense_per_item:
+            return []
+
+        existing_expenses = dict(
+            Expense.objects.filter(
+                item_id__in=new_expense_per_item,
+                planned=True,
+                accountability__contract=self.accountability.contract,
+            )
+            .order_by()
+            .values("item_id")
+            .annotate(total=Sum("value"))
+            .values_list("item_id", "total")
+        )
+        contract_items = ContractItem.objects.in_bulk(list(new_expense_per_item))
 
-        transactions = []
         errors = []
-        for index, line in enumerate(applications_df.values.tolist()[1:], start=2):
-            if not line[2]:
-                break
+        for item_id, new_value in new_expense_per_item.items():
+            contract_item = contract_items[item_id]
+            total_planned = (
+                existing_expenses.get(item_id) or Decimal("0.00")
+            ) + new_value
+            if total_planned > contract_item.anual_expense:
+                errors.append(
+                    "O total de despesas para o item "
+                    f"'{contract_item}' ({total_planned}) ultrapassa o "
+                    f"limite anual de {contract_item.anual_expense}."
+                )
+        return errors
+
+    def _create_applications(self, lines: List[list]) -> List[str]:
+        amounts = parse_decimals(line[2] for line in lines)
+        dates = parse_dates(line[3] for line in lines)
+
+        rows = []
+        for line, amount, date in zip(lines, amounts, dates):
+            if isinstance(amount, Decimal):
+                amount = abs(amount)
 
             if line[4]:
-                transaction_date = line[3]
                 transaction = Transaction(
                     name="Aplicação / Resgate",
                     memo="Aplicação / Resgate",
                     transaction_type=Transaction.TransactionTypeChoices.OTHER,
-                    date=datetime(
-                        transaction_date.year,
-                        transaction_date.month,
-                        transaction_date.day,
-                    ),
-                    amount=Decimal(abs(line[2]) * -1).quantize(Decimal("0.01")),
+                    date=date,
+                    amount=-amount if isinstance(amount, Decimal) else amount,
                     transaction_number=line[4],
                     bank_account_id=self.mapped_cbs.get(line[5]),
                 )
 
             elif line[6]:
-                transaction_date = line[3]
                 transaction = Transaction(
                     transaction_type=Transaction.TransactionTypeChoices.INCOME,
                     name="Aplicação / Resgate",
                     memo="Aplicação / Resgate",
-                    date=datetime(
-                        transaction_date.year,
-                        transaction_date.month,
-                        transaction_date.day,
-                    ),
-                    amount=Decimal(abs(line[2])).quantize(Decimal("0.01")),
+                    date=date,
+                    amount=amount,
                     transaction_number=line[4],
                     bank_account_id=self.mapped_cbs.get(line[6]),
                 )
@@ -298,19 +357,38 @@ class AccountabilityXLSXImporter:
             else:
                 continue
 
-            try:
-                transaction.full_clean()
-                transactions.append(transaction)
-            except ValidationError as e:
-                errors.append(f"Aplicação {line[0]}: {' '.join(e.messages)}")
+            rows.append((line, transaction))
+
+        transactions = [transaction for _, transaction in rows]
+        validator = RowValidator(Transaction, transactions, known=self.known_ids)
+        errors = []
+        for line, transaction in rows:
+            if messages := validator.errors(transaction):
+                errors.append(f"Aplicação {line[0]}: {' '.join(messages)}")
+
+        if errors:
+            return errors
+
+        # A row imported before, even if deleted since, holds the same
+        # fingerprint: report it instead of letting the constraint fail.
+        assign_fingerprints(transactions)
+        stored = set(
+            Transaction._base_manager.filter(
+                bank_account_id__in={t.bank_account_id for t in transactions},
+                fingerprint__in=[t.fingerprint for t in transactions],
+            ).values_list("bank_account_id", "fingerprint")
+        )
+        for line, transaction in rows:
+            if (transaction.bank_account_id, transaction.fingerprint) in stored:
+                errors.append(f"Aplicação {line[0]}: Aplicação já importada.")
 
         if errors:
             return errors
 
         try:
             with db_transaction.atomic():
-                Transaction.objects.bulk_create(transactions, batch_size=10)
+                bulk_create_transactions(transactions, batch_size=IMPORT_BATCH_SIZE)
             return []
         except (ValidationError, IntegrityError, DatabaseError) as e:
             logger.error("Error creating applications: %s", str(e))
-            return errors
+            return ["Erro ao importar as aplicações."]
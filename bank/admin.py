@@ -33,6 +33,9 @@ class BankAccountAdmin(BaseModelAdmin):
         "account_type",
         "agency",
         "current_balance_display",
+        "last_statement_display",
+        "unreconciled_count_display",
+        "last_transaction_display",
         "origin",
     )
     list_filter = ("organization", "account_type", "origin", "bank_name")
@@ -60,12 +63,24 @@ class BankAccountAdmin(BaseModelAdmin):
     )
 
     def get_queryset(self, request):
-        return super().get_queryset(request).with_current_balance()
+        return super().get_queryset(request).with_overview()
 
     @admin.display(description=_("Saldo Atual"))
     def current_balance_display(self, obj):
         return obj.current_balance
 
+    @admin.display(description=_("Último Extrato"))
+    def last_statement_display(self, obj):
+        return obj.last_statement_update
+
+    @admin.display(description=_("Pendentes de Conciliação"))
+    def unreconciled_count_display(self, obj):
+        return obj.unreconciled_count
+
+    @admin.display(description=_("Última Transação"))
+    def last_transaction_display(self, obj):
+        return obj.last_transaction_date
+
 
 @admin.register(BankStatement)
 class BankStatementAdmin(BaseModelAdmin):
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class BankConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bank"
+
+    def ready(self):
+        from bank import signals
+        from bank.models import Transaction
+
+        pre_save.connect(signals.remember_transaction_contribution, sender=Transaction)
+        post_save.connect(signals.update_daily_balances_on_save, sender=Transaction)
+        post_delete.connect(signals.update_daily_balances_on_delete, sender=Transaction)
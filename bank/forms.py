@@ -1,7 +1,8 @@
 from django import forms
 
 from bank.models import BankAccount, BankStatement, Transaction
-from utils.fields import DecimalMaskedField
+from bank.services.ofx_batch import OFX_MAX_FILE_SIZE
+from utils.fields import DecimalMaskedField, MultipleFileField
 from utils.regex import only_digits
 from utils.widgets import (
     BaseCharFieldFormWidget,
@@ -9,6 +10,8 @@ from utils.widgets import (
     BaseSelectFormWidget,
 )
 
+BULK_OFX_MAX_UPLOAD_SIZE = 25 * 1024 * 1024
+
 
 class BankAccountForm(forms.ModelForm):
     opening_balance = DecimalMaskedField(
@@ -66,6 +69,32 @@ class UpdateOFXForm(forms.Form):
         return ofx_file
 
 
+class BulkOFXImportForm(forms.Form):
+    ofx_files = MultipleFileField()
+
+    def clean_ofx_files(self):
+        ofx_files = self.cleaned_data.get("ofx_files") or []
+
+        for ofx_file in ofx_files:
+            name = ofx_file.name.lower()
+            if not name.endswith((".ofx", ".zip")):
+                raise forms.ValidationError(
+                    "Somente arquivos OFX, ou um ZIP com arquivos OFX, são permitidos."
+                )
+
+            if name.endswith(".ofx") and ofx_file.size > OFX_MAX_FILE_SIZE:
+                raise forms.ValidationError(
+                    f"{ofx_file.name}: o tamanho máximo permitido para o arquivo é 5MB."
+                )
+
+            if ofx_file.size > BULK_OFX_MAX_UPLOAD_SIZE:
+                raise forms.ValidationError(
+                    f"{ofx_file.name}: o tamanho máximo permitido para o ZIP é 25MB."
+                )
+
+        return ofx_files
+
+
 class TransactionForm(forms.ModelForm):
     class Meta:
         model = Transaction
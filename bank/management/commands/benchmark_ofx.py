@@ -0,0 +1,184 @@
+"""Time the OFX upload normalization over a synthetic multi-megabyte statement.
+
+The statement is generated in memory with the quirks the parser repairs:
+open tags, over-long CHECKNUMs, unclosed STMTTRNs after a wrapped memo and
+accented memos in Windows-1252. No database access. `--full-parse` adds the
+whole `OFXFileParser` run, where `ofxtools` model conversion dominates.
+
+    python manage.py benchmark_ofx --transactions 50000 --output before.json
+"""
+
+import datetime as dt
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+
+from bank.services.ofx_parser import OFXFileParser
+from reports.management.commands.benchmark_reports import _git_commit
+
+DEFAULT_TRANSACTIONS = 20000
+
+OFX_HEADER = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+<OFX>
+<SIGNONMSGSRSV1>
+<SONRS>
+<STATUS>
+<CODE>0
+<SEVERITY>INFO
+</STATUS>
+<DTSERVER>20260331120000[-3:BRT]
+<LANGUAGE>POR
+<FI>
+<ORG>Banco Sintético
+<FID>001
+</FI>
+</SONRS>
+</SIGNONMSGSRSV1>
+<BANKMSGSRSV1>
+<STMTTRNRS>
+<TRNUID>1
+<STATUS>
+<CODE>0
+<SEVERITY>INFO
+</STATUS>
+<STMTRS>
+<CURDEF>BRL
+<BANKACCTFROM>
+<BANKID>001
+<BRANCHID>1234
+<ACCTID>567890
+<ACCTTYPE>CHECKING
+</BANKACCTFROM>
+<BANKTRANLIST>
+<DTSTART>{start_date:%Y%m%d}
+<DTEND>{end_date:%Y%m%d}
+"""
+
+OFX_FOOTER = """</BANKTRANLIST>
+<LEDGERBAL>
+<BALAMT>{balance}
+<DTASOF>{end_date:%Y%m%d}
+</LEDGERBAL>
+</STMTRS>
+</STMTTRNRS>
+</BANKMSGSRSV1>
+</OFX>
+"""
+
+
+def synthetic_ofx(
+    transactions: int,
+    encoding: str = "cp1252",
+    start_date: dt.date = dt.date(2026, 3, 1),
+    end_date: dt.date = dt.date(2026, 3, 31),
+) -> bytes:
+    """An OFX v1 statement for the period with `transactions` entries.
+
+    Entry ``i`` is the same in every statement with the same `start_date`,
+    posted within its first 28 days, so overlapping statements can be built
+    by varying `end_date` and `transactions`.
+    """
+    lines = [OFX_HEADER.format(start_date=start_date, end_date=end_date)]
+    balance = 1_000_000
+    for i in range(transactions):
+        amount = (i % 997 + 1) * (1 if i % 3 else -1)
+        balance += amount
+        posted = start_date + dt.timedelta(days=i % 28)
+        lines.append(
+            "<STMTTRN>\n"
+            f"<TRNTYPE>{'CREDIT' if amount > 0 else 'DEBIT'}\n"
+            f"<DTPOSTED>{posted:%Y%m%d}\n"
+            f"<TRNAMT>{amount}.00\n"
+            f"<FITID>{i:012d}\n"
+            f"<CHECKNUM>{i:012d}00000000\n"
+        )
+        if i % 10:
+            lines.append(f"<MEMO>Pagamento nº {i} - manutenção\n</STMTTRN>\n")
+        else:
+            # Memo wrapped onto a second line and no closing tag: the parser
+            # closes the STMTTRN when the next one starts.
+            lines.append(f"<MEMO>Pagamento nº {i} -\nmanutenção\n")
+    lines.append(OFX_FOOTER.format(balance=f"{balance}.00", end_date=end_date))
+    return "".join(lines).encode(encoding)
+
+
+def measure(function, content: bytes, repeat: int) -> dict:
+    runs, peaks = [], []
+    for _ in range(repeat):
+        upload = SimpleUploadedFile("extrato.ofx", content)
+        tracemalloc.start()
+        started = time.perf_counter()
+        function(upload)
+        runs.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "wall_ms": round(statistics.median(runs), 2),
+        "wall_ms_runs": [round(run, 2) for run in runs],
+        "peak_memory_kb": round(max(peaks) / 1024, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo e memória da normalização (e, opcionalmente, da leitura "
+        "completa) de um extrato OFX sintético e emite JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=DEFAULT_TRANSACTIONS,
+            help=f"Transações no extrato (padrão: {DEFAULT_TRANSACTIONS}).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Execuções de cada etapa."
+        )
+        parser.add_argument(
+            "--full-parse",
+            action="store_true",
+            help=(
+                "Mede também a leitura completa pelo ofxtools, dominada pela "
+                "conversão dos modelos (alguns segundos a cada mil transações)."
+            ),
+        )
+        parser.add_argument("--output", help="Grava o JSON neste arquivo.")
+
+    def handle(self, *args, **options):
+        content = synthetic_ofx(options["transactions"])
+        results = {
+            "normalize": measure(OFXFileParser.normalize, content, options["repeat"])
+        }
+        if options["full_parse"]:
+            results["parse"] = measure(OFXFileParser, content, options["repeat"])
+
+        payload = json.dumps(
+            {
+                "commit": _git_commit(),
+                "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+                "file_bytes": len(content),
+                "transactions": options["transactions"],
+                "repeat": options["repeat"],
+                "results": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(payload)
+        self.stdout.write(payload)
@@ -0,0 +1,190 @@
+"""Time the reconciliation auto-matching over synthetic expenses and bank lines.
+
+Everything is built in memory, with the amount collisions and name variations
+of a busy month (many payments of the same value, accented and abbreviated
+names); no database access. `--legacy` also times the per-expense rescan the
+batch reconciliation view used before `bank.services.matching`, which takes
+tens of seconds at the default sizes.
+
+    python manage.py benchmark_reconciliation --entries 5000 --output after.json
+"""
+
+import datetime as dt
+import json
+import statistics
+import time
+import unicodedata
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from bank.models import Transaction
+from bank.services.matching import expense_entry, match_entries
+from reports.management.commands.benchmark_reports import _git_commit
+
+DEFAULT_ENTRIES = 5000
+START_DATE = dt.date(2026, 3, 1)
+NAMES = (
+    "José Antônio da Silva",
+    "Maria Conceição Souza",
+    "Clínica São Lucas Ltda",
+    "Farmácia Popular Ltda",
+    "João Batista Pereira",
+    "Posto Ipiranga Centro",
+    "Ana Lúcia Gonçalves",
+    "Companhia de Saneamento",
+)
+
+
+def synthetic_reconciliation(entries: int, transactions: int):
+    """Expenses (as plain objects) and unsaved transactions paying most of them.
+
+    Amounts repeat every 400 entries, so each amount has a dozen candidates
+    at the default sizes and names are what tells most of them apart.
+    """
+    expenses, lines = [], []
+    for i in range(entries):
+        name = NAMES[i % len(NAMES)]
+        value = Decimal(i % 400 + 1) * Decimal("12.35")
+        expenses.append(
+            SimpleNamespace(
+                id=i,
+                value=value,
+                liquidation=START_DATE + dt.timedelta(days=i % 28),
+                due_date=None,
+                favored=SimpleNamespace(name=name, document=f"{i:011d}"),
+            )
+        )
+    for i in range(transactions):
+        name = NAMES[(i + i // 1000) % len(NAMES)]
+        lines.append(
+            Transaction(
+                amount=-Decimal(i % 400 + 1) * Decimal("12.35"),
+                date=START_DATE + dt.timedelta(days=(i + i // 400) % 28),
+                memo=f"PIX ENVIADO {name.upper()}",
+                name="Pagamento",
+            )
+        )
+    return expenses, lines
+
+
+def legacy_match(expenses, transactions) -> int:
+    """The batch view's matching before the index; returns how many matched."""
+
+    def normalize_text(text):
+        if not text:
+            return ""
+
+        text = unicodedata.normalize("NFD", text)
+        text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+        return text.upper()
+
+    matched, used_transaction_ids = 0, set()
+    for expense in expenses:
+        candidate_transactions = [
+            t
+            for t in transactions
+            if abs(abs(t.amount) - expense.value) < 0.01
+            and t.id not in used_transaction_ids
+        ]
+
+        matched_transaction = None
+        if len(candidate_transactions) == 1:
+            matched_transaction = candidate_transactions[0]
+        elif len(candidate_transactions) > 1 and expense.favored:
+            first_name = expense.favored.name.split()[0] if expense.favored.name else ""
+            first_name_normalized = normalize_text(first_name)
+            if first_name_normalized and len(first_name_normalized) > 2:
+                matching_by_name = [
+                    transaction
+                    for transaction in candidate_transactions
+                    if first_name_normalized
+                    in normalize_text(
+                        f"{transaction.memo or ''} {transaction.name or ''}"
+                    )
+                ]
+                if len(matching_by_name) == 1:
+                    matched_transaction = matching_by_name[0]
+
+        if matched_transaction:
+            used_transaction_ids.add(matched_transaction.id)
+            matched += 1
+    return matched
+
+
+def indexed_match(expenses, transactions) -> int:
+    matches = match_entries(map(expense_entry, expenses), transactions)
+    return sum(match.transaction is not None for match in matches)
+
+
+def measure(function, expenses, transactions, repeat: int) -> dict:
+    runs, matched = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matched = function(expenses, transactions)
+        runs.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "wall_ms": round(statistics.median(runs), 2),
+        "wall_ms_runs": [round(run, 2) for run in runs],
+        "matched": matched,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo da conciliação automática de despesas sobre dados "
+        "sintéticos em memória e emite JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--entries",
+            type=int,
+            default=DEFAULT_ENTRIES,
+            help=f"Despesas a conciliar (padrão: {DEFAULT_ENTRIES}).",
+        )
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=DEFAULT_ENTRIES,
+            help=f"Transações disponíveis (padrão: {DEFAULT_ENTRIES}).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Execuções de cada etapa."
+        )
+        parser.add_argument(
+            "--legacy",
+            action="store_true",
+            help="Mede também a busca linear anterior (lenta).",
+        )
+        parser.add_argument("--output", help="Grava o JSON neste arquivo.")
+
+    def handle(self, *args, **options):
+        expenses, transactions = synthetic_reconciliation(
+            options["entries"], options["transactions"]
+        )
+        results = {
+            "indexed": measure(indexed_match, expenses, transactions, options["repeat"])
+        }
+        if options["legacy"]:
+            results["legacy"] = measure(
+                legacy_match, expenses, transactions, options["repeat"]
+            )
+
+        payload = json.dumps(
+            {
+                "commit": _git_commit(),
+                "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+                "entries": options["entries"],
+                "transactions": options["transactions"],
+                "repeat": options["repeat"],
+                "results": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(payload)
+        self.stdout.write(payload)
@@ -0,0 +1,70 @@
+"""Import several OFX statements (or ZIPs of them) into one bank account.
+
+python manage.py import_ofx_statements <bank_account_id> 2025/*.ofx
+python manage.py import_ofx_statements <bank_account_id> extratos-2025.zip
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from easy_tenants import tenant_context, tenant_context_disabled
+
+from bank.models import BankAccount
+from bank.services.ofx_batch import OFXFileStatus, import_ofx_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa vários extratos OFX, soltos ou em ZIP, para uma conta "
+        "bancária e mostra o resultado de cada arquivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("bank_account", help="ID da conta bancária.")
+        parser.add_argument("paths", nargs="+", help="Arquivos .ofx ou .zip.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.OFX_IMPORT_MAX_WORKERS,
+            help="Processos em paralelo (padrão: OFX_IMPORT_MAX_WORKERS).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with tenant_context_disabled():
+                bank_account = BankAccount.objects.select_related("organization").get(
+                    pk=options["bank_account"]
+                )
+        except (BankAccount.DoesNotExist, ValidationError) as exc:
+            raise CommandError("Conta bancária não encontrada.") from exc
+
+        uploads = []
+        for path in map(Path, options["paths"]):
+            if not path.is_file():
+                raise CommandError(f"Arquivo não encontrado: {path}")
+            uploads.append(File(path.open("rb"), name=path.name))
+
+        try:
+            with tenant_context(bank_account.organization):
+                reports = import_ofx_uploads(
+                    bank_account, uploads, max_workers=options["workers"]
+                )
+        finally:
+            for upload in uploads:
+                upload.close()
+
+        for report in reports:
+            line = (
+                f"{report.filename}: {report.status_label} — "
+                f"{report.transactions} transação(ões), "
+                f"{report.duplicates} repetida(s)"
+            )
+            if report.message:
+                line += f" ({report.message})"
+            if report.status == OFXFileStatus.IMPORTED:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stderr.write(line)
@@ -0,0 +1,42 @@
+"""Recompute `BankAccountDailyBalance` from the transactions.
+
+The table is kept in sync on every write that goes through the ORM; run this
+after loading transactions by other means (raw SQL, `QuerySet.update`, a
+restored dump) or to repair drift.
+"""
+
+from django.core.management.base import BaseCommand
+
+from bank.models import BankAccount
+from bank.services.balances import rebuild_daily_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os saldos diários das contas bancárias a partir das movimentações."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--account",
+            action="append",
+            dest="accounts",
+            metavar="ID",
+            help="Recalcula apenas a conta informada (pode ser repetido).",
+        )
+
+    def handle(self, *args, **options):
+        accounts = BankAccount._base_manager.order_by("pk")
+        if options["accounts"]:
+            accounts = accounts.filter(pk__in=options["accounts"])
+
+        total_accounts = total_days = 0
+        for account_id in accounts.values_list("pk", flat=True).iterator():
+            total_days += rebuild_daily_balances(account_id)
+            total_accounts += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total_accounts} conta(s) recalculada(s), {total_days} dia(s) com movimentação."
+            )
+        )
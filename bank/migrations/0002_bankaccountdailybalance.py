@@ -0,0 +1,98 @@
+# Generated by Django 6.0.5 on 2026-10-18 09:04
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_daily_balances(apps, schema_editor):
+    Transaction = apps.get_model("bank", "Transaction")
+    BankAccountDailyBalance = apps.get_model("bank", "BankAccountDailyBalance")
+
+    rows, running_totals = [], {}
+    day_totals = (
+        Transaction.objects.filter(deleted_at__isnull=True)
+        .order_by()
+        .values("bank_account_id", "date")
+        .annotate(total=Sum("amount"))
+        .order_by("bank_account_id", "date")
+        .values_list("bank_account_id", "date", "total")
+    )
+    for bank_account_id, date, day_total in day_totals:
+        running_total = running_totals.get(bank_account_id, Decimal("0.00")) + day_total
+        running_totals[bank_account_id] = running_total
+        rows.append(
+            BankAccountDailyBalance(
+                bank_account_id=bank_account_id,
+                date=date,
+                day_total=day_total,
+                running_total=running_total,
+            )
+        )
+    BankAccountDailyBalance.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bank", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BankAccountDailyBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Data")),
+                (
+                    "day_total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of the account's transactions on this day",
+                        max_digits=14,
+                        verbose_name="Movimentação do Dia",
+                    ),
+                ),
+                (
+                    "running_total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of the account's transactions up to and including this day",
+                        max_digits=14,
+                        verbose_name="Movimentação Acumulada",
+                    ),
+                ),
+                (
+                    "bank_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_balances",
+                        to="bank.bankaccount",
+                        verbose_name="Conta Bancária",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Saldo Diário",
+                "verbose_name_plural": "Saldos Diários",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("bank_account", "date"),
+                        name="unique_daily_balance_per_bank_account",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_daily_balances, migrations.RunPython.noop),
+    ]
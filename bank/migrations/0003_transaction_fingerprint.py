@@ -0,0 +1,86 @@
+# Generated by Django 6.0.5 on 2026-10-18 09:32
+
+import hashlib
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # Existing rows have no FITID stored: they get the content fingerprint
+    # `bank.services.fingerprints` gives a line without one.
+    Transaction = apps.get_model("bank", "Transaction")
+
+    occurrences, batch = Counter(), []
+    rows = Transaction.objects.order_by(
+        "bank_account_id", "date", "created_at", "id"
+    ).only("id", "bank_account_id", "date", "amount", "memo")
+    for transaction in rows.iterator(chunk_size=2000):
+        key = (
+            transaction.bank_account_id,
+            transaction.date,
+            transaction.amount,
+            transaction.memo,
+        )
+        parts = (
+            "content",
+            transaction.bank_account_id,
+            transaction.date.isoformat(),
+            f"{transaction.amount:.2f}",
+            transaction.memo or "",
+            occurrences[key],
+        )
+        occurrences[key] += 1
+        transaction.fingerprint = hashlib.sha256(
+            "\x1f".join(map(str, parts)).encode()
+        ).hexdigest()
+        batch.append(transaction)
+        if len(batch) == 2000:
+            Transaction.objects.bulk_update(batch, ["fingerprint"])
+            batch = []
+    Transaction.objects.bulk_update(batch, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bank", "0002_bankaccountdailybalance"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="transaction",
+            name="unique_transaction_number_per_bank_account",
+        ),
+        migrations.AddField(
+            model_name="historicaltransaction",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash of the FITID or of the line's contents, set by imports",
+                max_length=64,
+                null=True,
+                verbose_name="Identificador de Importação",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash of the FITID or of the line's contents, set by imports",
+                max_length=64,
+                null=True,
+                verbose_name="Identificador de Importação",
+            ),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="transaction",
+            constraint=models.UniqueConstraint(
+                fields=("bank_account", "fingerprint"),
+                name="unique_transaction_fingerprint_per_bank_account",
+            ),
+        ),
+    ]
@@ -2,7 +2,8 @@ from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import OuterRef, Subquery, Sum
+from django.db import transaction as db_transaction
+from django.db.models import Count, Min, OuterRef, Subquery
 from django.db.models.functions import Coalesce
 from simple_history.models import HistoricalRecords
 
@@ -17,15 +18,51 @@ ZERO_AMOUNT = Decimal("0.00")
 
 class BankAccountQuerySet(SoftDeleteQueryset):
     def with_current_balance(self):
-        transactions_sum = (
-            Transaction.objects.filter(bank_account=OuterRef("pk"))
-            .values("bank_account")
-            .annotate(total=Sum("amount"))
-            .values("total")
+        last_running_total = (
+            BankAccountDailyBalance.objects.filter(bank_account=OuterRef("pk"))
+            .order_by("-date")
+            .values("running_total")[:1]
         )
         return self.annotate(
             _current_balance_annotation=models.F("opening_balance")
-            + Coalesce(Subquery(transactions_sum), ZERO_AMOUNT),
+            + Coalesce(Subquery(last_running_total), ZERO_AMOUNT),
+        )
+
+    def with_overview(self):
+        """What account listings show, in the same query as the accounts.
+
+        Adds the current balance, the last statement's month and year, how many
+        transactions are not reconciled yet and the date of the last one, which
+        the properties of the same names read instead of querying per account.
+        """
+        from bank.services.reconciliation import linked_transactions
+
+        # The base managers: the account already scopes the rows, and the
+        # admin lists accounts with the tenant disabled.
+        last_statement = BankStatement._base_manager.filter(
+            bank_account=OuterRef("pk"), deleted_at__isnull=True
+        ).order_by("-reference_year", "-reference_month")
+        transactions = Transaction._base_manager.filter(
+            bank_account=OuterRef("pk"), deleted_at__isnull=True
+        )
+        unreconciled_count = (
+            transactions.exclude(linked_transactions())
+            .order_by()
+            .values("bank_account")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.with_current_balance().annotate(
+            _last_statement_year_annotation=Subquery(
+                last_statement.values("reference_year")[:1]
+            ),
+            _last_statement_month_annotation=Subquery(
+                last_statement.values("reference_month")[:1]
+            ),
+            _unreconciled_count_annotation=Coalesce(Subquery(unreconciled_count), 0),
+            _last_transaction_date_annotation=Subquery(
+                transactions.order_by("-date").values("date")[:1]
+            ),
         )
 
 
@@ -145,17 +182,18 @@ class BankAccount(BaseOrganizationTenantModel):
         annotated = self.__dict__.get("_current_balance_annotation")
         if annotated is not None:
             return annotated
-        total = self.transactions.aggregate(total=Sum("amount"))["total"] or ZERO_AMOUNT
-        return (self.opening_balance or ZERO_AMOUNT) + total
+        return self._balance_from(self.daily_balances.all())
 
     def balance_at(self, date) -> Decimal:
-        total = (
-            self.transactions.filter(date__lte=date).aggregate(total=Sum("amount"))[
-                "total"
-            ]
-            or ZERO_AMOUNT
+        return self._balance_from(self.daily_balances.filter(date__lte=date))
+
+    def _balance_from(self, daily_balances) -> Decimal:
+        running_total = (
+            daily_balances.order_by("-date")
+            .values_list("running_total", flat=True)
+            .first()
         )
-        return (self.opening_balance or ZERO_AMOUNT) + total
+        return (self.opening_balance or ZERO_AMOUNT) + (running_total or ZERO_AMOUNT)
 
     @property
     def recent_logs(self):
@@ -171,14 +209,37 @@ class BankAccount(BaseOrganizationTenantModel):
 
     @property
     def last_statement_update(self):
-        last_statement = self.statements.order_by(
-            "-reference_year", "-reference_month"
-        ).first()
-        if last_statement:
-            return f"{last_statement.month_label} de {last_statement.reference_year}"
+        if "_last_statement_month_annotation" in self.__dict__:
+            month = self.__dict__["_last_statement_month_annotation"]
+            year = self.__dict__["_last_statement_year_annotation"]
+        else:
+            month, year = (
+                self.statements.order_by("-reference_year", "-reference_month")
+                .values_list("reference_month", "reference_year")
+                .first()
+            ) or (None, None)
+        if month is not None:
+            return f"{MonthChoices(month).label.capitalize()} de {year}"
 
         return "---"
 
+    @property
+    def unreconciled_count(self) -> int:
+        if "_unreconciled_count_annotation" in self.__dict__:
+            return self.__dict__["_unreconciled_count_annotation"]
+
+        from bank.services.reconciliation import unreconciled_transactions
+
+        return unreconciled_transactions(self.transactions.all()).count()
+
+    @property
+    def last_transaction_date(self):
+        if "_last_transaction_date_annotation" in self.__dict__:
+            return self.__dict__["_last_transaction_date_annotation"]
+        return (
+            self.transactions.order_by("-date").values_list("date", flat=True).first()
+        )
+
     @property
     def last_transactions(self):
         return self.transactions.order_by("-date")[:10]
@@ -192,6 +253,51 @@ class BankAccount(BaseOrganizationTenantModel):
         return None
 
 
+class BankAccountDailyBalance(models.Model):
+    """Transaction totals of a bank account per day with transactions.
+
+    Derived from `Transaction` and kept up to date by `bank.services.balances`,
+    so balances are read from one row instead of summing the whole history.
+    `running_total` excludes the account's opening balance, which can be
+    edited without touching this table.
+    """
+
+    bank_account = models.ForeignKey(
+        BankAccount,
+        verbose_name="Conta Bancária",
+        related_name="daily_balances",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField(verbose_name="Data")
+    day_total = models.DecimalField(
+        verbose_name="Movimentação do Dia",
+        decimal_places=2,
+        max_digits=14,
+        default=ZERO_AMOUNT,
+        help_text="Sum of the account's transactions on this day",
+    )
+    running_total = models.DecimalField(
+        verbose_name="Movimentação Acumulada",
+        decimal_places=2,
+        max_digits=14,
+        default=ZERO_AMOUNT,
+        help_text="Sum of the account's transactions up to and including this day",
+    )
+
+    class Meta:
+        verbose_name = "Saldo Diário"
+        verbose_name_plural = "Saldos Diários"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("bank_account", "date"),
+                name="unique_daily_balance_per_bank_account",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.bank_account_id} - {self.date}: {self.running_total}"
+
+
 class BankStatement(BaseOrganizationTenantModel):
     """Model representing a bank statement with opening and closing balances."""
 
@@ -279,6 +385,46 @@ class BankStatement(BaseOrganizationTenantModel):
         return f"Statement for {self.month_label}/{self.reference_year} - {self.bank_account}"
 
 
+class TransactionQuerySet(SoftDeleteQueryset):
+    """Transactions whose bulk soft deletes and restores keep the balances.
+
+    Both are plain UPDATEs that skip the model signals keeping
+    `BankAccountDailyBalance` in sync, so they rebuild the accounts they touch
+    from the earliest date affected.
+    """
+
+    def _with_balances_rebuilt(self, update):
+        from bank.services.balances import rebuild_daily_balances
+
+        with db_transaction.atomic():
+            since = dict(
+                self.order_by()
+                .values("bank_account_id")
+                .annotate(since=Min("date"))
+                .values_list("bank_account_id", "since")
+            )
+            updated = update()
+            for account_id, date in since.items():
+                rebuild_daily_balances(account_id, since=date)
+        return updated
+
+    def delete(self):
+        return self._with_balances_rebuilt(super().delete)
+
+    def restore(self):
+        return self._with_balances_rebuilt(super().restore)
+
+
+class TransactionManager(TenantManager.from_queryset(TransactionQuerySet)):
+    pass
+
+
+class TransactionManagerAllObjects(
+    TenantManagerAllObjects.from_queryset(TransactionQuerySet)
+):
+    pass
+
+
 class Transaction(BaseOrganizationTenantModel):
     """Model representing a bank transaction with its associated expenses/revenues."""
 
@@ -350,6 +496,14 @@ class Transaction(BaseOrganizationTenantModel):
         blank=True,
         help_text="Additional notes or comments about the transaction",
     )
+    fingerprint = models.CharField(
+        verbose_name="Identificador de Importação",
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Hash of the FITID or of the line's contents, set by imports",
+    )
 
     expense = models.ForeignKey(
         "accountability.Expense",
@@ -383,6 +537,9 @@ class Transaction(BaseOrganizationTenantModel):
         help_text="Multiple revenues associated with this transaction",
     )
 
+    objects = TransactionManager()
+    all_objects = TransactionManagerAllObjects()
+
     history = HistoricalRecords()
 
     class Meta:
@@ -394,25 +551,25 @@ class Transaction(BaseOrganizationTenantModel):
             models.Index(fields=["transaction_number"]),
         ]
         constraints = [
+            # Not partial, so imports can upsert on it (ON CONFLICT needs a
+            # plain unique index); many NULLs are allowed.
             models.UniqueConstraint(
-                fields=["transaction_number", "memo", "bank_account"],
-                name="unique_transaction_number_per_bank_account",
-                condition=models.Q(deleted_at__isnull=True),
+                fields=["bank_account", "fingerprint"],
+                name="unique_transaction_fingerprint_per_bank_account",
             ),
         ]
         ordering = ["-date", "-id"]
 
     def clean(self):
         """Validate the transaction data."""
-        if self.transaction_number:
-            existing = Transaction.objects.filter(
-                transaction_number=self.transaction_number,
-                memo=self.memo,
+        if self.fingerprint:
+            existing = Transaction.all_objects.filter(
+                fingerprint=self.fingerprint,
                 bank_account=self.bank_account,
             ).exclude(pk=self.pk)
             if existing.exists():
                 raise ValidationError(
-                    "A transaction with this number already exists for this account"
+                    "This transaction was already imported for this account"
                 )
 
         if self.expense and self.revenue:
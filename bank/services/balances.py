@@ -0,0 +1,166 @@
+"""Maintenance of `BankAccountDailyBalance`, the per-day transaction totals.
+
+Single saves and deletes are applied as a delta: the day's row is created if
+missing and every row from that day on is shifted with one `UPDATE`. Bulk
+inserts skip model signals, so they go through `bulk_create_transactions`,
+which rebuilds the affected accounts from the earliest date inserted; queryset
+soft deletes and restores rebuild too (`TransactionQuerySet`). Both paths lock
+the account row first, so concurrent writers of one account take turns. The
+`rebuild_balances` command rebuilds everything, to repair drift from writes
+that bypass both paths.
+"""
+
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import F, Sum
+
+from bank.models import ZERO_AMOUNT, BankAccount, BankAccountDailyBalance, Transaction
+
+
+def _lock_account(bank_account_id) -> None:
+    """Lock the account's row until the transaction ends.
+
+    Writers of an account's daily rows go one at a time: a delta reads, inserts
+    and updates them in several statements, and a rebuild deletes and
+    recreates them.
+    """
+    list(
+        BankAccount._base_manager.select_for_update()
+        .filter(pk=bank_account_id)
+        .values_list("pk", flat=True)
+    )
+
+
+def _running_total_before(bank_account_id, date) -> Decimal:
+    running_total = (
+        BankAccountDailyBalance.objects.filter(
+            bank_account_id=bank_account_id, date__lt=date
+        )
+        .order_by("-date")
+        .values_list("running_total", flat=True)
+        .first()
+    )
+    return running_total or ZERO_AMOUNT
+
+
+def apply_transaction_delta(bank_account_id, date, delta: Decimal) -> None:
+    """Add `delta` to the account's total on `date` and every later day."""
+    if not delta:
+        return
+
+    daily_balances = BankAccountDailyBalance.objects.filter(
+        bank_account_id=bank_account_id
+    )
+    with db_transaction.atomic():
+        _lock_account(bank_account_id)
+        if not daily_balances.filter(date=date).exists():
+            BankAccountDailyBalance.objects.bulk_create(
+                [
+                    BankAccountDailyBalance(
+                        bank_account_id=bank_account_id,
+                        date=date,
+                        running_total=_running_total_before(bank_account_id, date),
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+        daily_balances.filter(date=date).update(day_total=F("day_total") + delta)
+        daily_balances.filter(date__gte=date).update(
+            running_total=F("running_total") + delta
+        )
+
+
+def rebuild_daily_balances(bank_account_id, since=None) -> int:
+    """Recompute the account's rows from `since` (or from the start).
+
+    Returns how many daily rows were written.
+    """
+    daily_balances = BankAccountDailyBalance.objects.filter(
+        bank_account_id=bank_account_id
+    )
+    # The base manager: rebuilds run from signals and commands, with or without
+    # a tenant in context, and the account already scopes the rows.
+    transactions = Transaction._base_manager.filter(
+        bank_account_id=bank_account_id, deleted_at__isnull=True
+    )
+    if since is not None:
+        daily_balances = daily_balances.filter(date__gte=since)
+        transactions = transactions.filter(date__gte=since)
+
+    with db_transaction.atomic():
+        _lock_account(bank_account_id)
+        daily_balances.delete()
+        running_total = (
+            _running_total_before(bank_account_id, since)
+            if since is not None
+            else ZERO_AMOUNT
+        )
+        rows = []
+        day_totals = (
+            transactions.order_by()
+            .values("date")
+            .annotate(total=Sum("amount"))
+            .order_by("date")
+            .values_list("date", "total")
+        )
+        for date, day_total in day_totals:
+            running_total += day_total
+            rows.append(
+                BankAccountDailyBalance(
+                    bank_account_id=bank_account_id,
+                    date=date,
+                    day_total=day_total,
+                    running_total=running_total,
+                )
+            )
+        BankAccountDailyBalance.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def bulk_create_transactions(
+    transactions: Iterable[Transaction], **kwargs
+) -> list[Transaction]:
+    """`Transaction.objects.bulk_create`, keeping the daily balances in sync.
+
+    Accepts the same keyword arguments; rows skipped by ``ignore_conflicts``
+    are accounted for, since the balances are recomputed from the table.
+    """
+    transactions = list(transactions)
+    since = {}
+    for transaction in transactions:
+        account_id = transaction.bank_account_id
+        if account_id not in since or transaction.date < since[account_id]:
+            since[account_id] = transaction.date
+
+    with db_transaction.atomic():
+        created = Transaction.objects.bulk_create(transactions, **kwargs)
+        for account_id, date in since.items():
+            rebuild_daily_balances(account_id, since=date)
+    return created
+
+
+def transaction_contribution(transaction: Transaction):
+    """``(bank_account_id, date, amount)`` a transaction adds to the balances.
+
+    None for soft-deleted transactions, which balances leave out.
+    """
+    if transaction.deleted_at is not None:
+        return None
+    return (
+        transaction.bank_account_id,
+        Transaction._meta.get_field("date").to_python(transaction.date),
+        Transaction._meta.get_field("amount").to_python(transaction.amount),
+    )
+
+
+def apply_contribution_change(before, after) -> None:
+    """Move the balances from one `transaction_contribution` to another."""
+    if before and after and before[:2] == after[:2]:
+        apply_transaction_delta(*after[:2], after[2] - before[2])
+        return
+    if before:
+        apply_transaction_delta(*before[:2], -before[2])
+    if after:
+        apply_transaction_delta(*after)
@@ -0,0 +1,200 @@
+"""Stable identity of imported transactions, so imports can be repeated.
+
+An OFX line is identified by its FITID, which banks keep across statements.
+Some omit it, or repeat it for unrelated lines of the same file, so those
+lines fall back to a hash of the account, date, amount and memo plus how many
+identical lines came before it in the same import: two equal fees on one day
+are two transactions, the same fee in two overlapping statements is one.
+
+Imports upsert on ``(bank_account, fingerprint)``; transactions typed in by
+hand have no fingerprint and are never matched. A line imported again only
+refreshes its descriptive fields: the amount and date already stored are what
+the balances and reconciliations were built on, and an upsert writes no
+history, so a bank that changes them across statements does not silently
+rewrite the books.
+
+Rows imported before fingerprints existed were given content fingerprints by
+the migration that added them, since no FITID was stored. A line that is not
+found under its own fingerprint, a FITID one above all, first takes over such
+a row with the same account, date, amount and memo, so the first import after
+the migration does not duplicate the lines an overlapping statement repeats.
+
+Application lines from the accountability spreadsheet import carry no FITID
+either, so they hold content fingerprints too. A later OFX import with a line
+of the same account, date, amount and memo adopts such a row instead of
+adding a second one, and the row takes the line's fingerprint.
+"""
+
+import hashlib
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+
+from django.db import transaction as db_transaction
+
+from bank.models import BankAccount, Transaction
+from bank.services.balances import bulk_create_transactions
+
+# Refreshed from the file when a line is imported again. Never the amount or
+# the date: the daily balances are rebuilt only from the incoming lines' dates.
+UPSERT_FIELDS = ("name", "memo", "updated_at")
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+
+def fitid_fingerprint(bank_account_id, fitid: str) -> str:
+    return _digest("fitid", bank_account_id, fitid)
+
+
+def content_fingerprint(bank_account_id, date, amount, memo, occurrence: int) -> str:
+    date = Transaction._meta.get_field("date").to_python(date)
+    amount = Transaction._meta.get_field("amount").to_python(amount)
+    return _digest(
+        "content",
+        bank_account_id,
+        date.isoformat(),
+        f"{amount:.2f}",
+        memo or "",
+        occurrence,
+    )
+
+
+def assign_fingerprints(
+    transactions: list[Transaction], fitids: Iterable[str | None] = ()
+) -> list[Transaction]:
+    """Set `fingerprint` on unsaved `transactions`, one import's worth.
+
+    `fitids` pairs with `transactions`; missing entries count as no FITID.
+    """
+    fitids = list(fitids)
+    fitids += [None] * (len(transactions) - len(fitids))
+    counts = Counter(fitid for fitid in fitids if fitid)
+    occurrences = Counter()
+    for transaction, fitid in zip(transactions, fitids):
+        if fitid and counts[fitid] == 1:
+            transaction.fingerprint = fitid_fingerprint(
+                transaction.bank_account_id, fitid
+            )
+            continue
+
+        key = (
+            transaction.bank_account_id,
+            transaction.date,
+            transaction.amount,
+            transaction.memo,
+        )
+        transaction.fingerprint = content_fingerprint(*key, occurrences[key])
+        occurrences[key] += 1
+    return transactions
+
+
+def fingerprinted_transactions(
+    bank_account: BankAccount, rows: Iterable[dict]
+) -> list[Transaction]:
+    """Unsaved transactions for OFX lines (`ParsedStatement.transactions`)."""
+    transactions, fitids = [], []
+    for row in rows:
+        fields = dict(row)
+        fitids.append(fields.pop("fitid", None))
+        transactions.append(
+            Transaction(
+                organization_id=bank_account.organization_id,
+                bank_account=bank_account,
+                **fields,
+            )
+        )
+    return assign_fingerprints(transactions, fitids)
+
+
+def _content_key(transaction: Transaction) -> tuple:
+    return (
+        Transaction._meta.get_field("date").to_python(transaction.date),
+        Transaction._meta.get_field("amount").to_python(transaction.amount),
+        transaction.memo or "",
+    )
+
+
+def adopt_legacy_transactions(transactions: list[Transaction]) -> int:
+    """Give stored content-fingerprinted rows the fingerprints of new lines.
+
+    Only lines whose fingerprint is not stored yet adopt a row, and only a
+    row with the same contents whose fingerprint is a content one this
+    import does not produce itself, oldest first. Returns how many rows were
+    re-fingerprinted.
+    """
+    by_account = defaultdict(list)
+    for transaction in transactions:
+        by_account[transaction.bank_account_id].append(transaction)
+
+    adopted = []
+    for account_id, lines in by_account.items():
+        # The base manager: soft-deleted rows hold their fingerprint too.
+        stored = Transaction._base_manager.filter(bank_account_id=account_id)
+        incoming = {line.fingerprint for line in lines}
+        known = set(
+            stored.filter(fingerprint__in=incoming).values_list(
+                "fingerprint", flat=True
+            )
+        )
+        new = [line for line in lines if line.fingerprint not in known]
+        if not new:
+            continue
+
+        rows = defaultdict(list)
+        for pk, date, amount, memo, fingerprint in (
+            stored.filter(date__in={line.date for line in new})
+            .order_by("date", "created_at", "id")
+            .values_list("id", "date", "amount", "memo", "fingerprint")
+        ):
+            rows[(date, amount, memo or "")].append((pk, fingerprint))
+
+        legacy = {}
+        for key, candidates in rows.items():
+            content = {
+                content_fingerprint(account_id, *key, occurrence)
+                for occurrence in range(len(candidates))
+            }
+            legacy[key] = [
+                pk
+                for pk, fingerprint in candidates
+                if fingerprint in content and fingerprint not in incoming
+            ]
+
+        for line in new:
+            if pks := legacy.get(_content_key(line)):
+                adopted.append(Transaction(pk=pks.pop(0), fingerprint=line.fingerprint))
+
+    Transaction._base_manager.bulk_update(adopted, ["fingerprint"], batch_size=1000)
+    return len(adopted)
+
+
+def upsert_transactions(transactions: Iterable[Transaction], **kwargs):
+    """Insert new transactions and refresh the ones already imported.
+
+    Keyed on the fingerprint, so repeating an import changes nothing; only
+    `UPSERT_FIELDS` of a line seen before are taken from the file. The
+    returned transactions carry the pk of the row they were written to:
+    ``bulk_create`` keeps the client-side pk of a line that updated a stored
+    row, so the stored pks are read back.
+    """
+    transactions = list(transactions)
+    with db_transaction.atomic():
+        adopt_legacy_transactions(transactions)
+        upserted = bulk_create_transactions(
+            transactions,
+            update_conflicts=True,
+            unique_fields=("bank_account", "fingerprint"),
+            update_fields=UPSERT_FIELDS,
+            **kwargs,
+        )
+        stored = {
+            (account_id, fingerprint): pk
+            for account_id, fingerprint, pk in Transaction._base_manager.filter(
+                bank_account_id__in={t.bank_account_id for t in upserted},
+                fingerprint__in=[t.fingerprint for t in upserted],
+            ).values_list("bank_account_id", "fingerprint", "pk")
+        }
+    for transaction in upserted:
+        transaction.pk = stored[(transaction.bank_account_id, transaction.fingerprint)]
+    return upserted
@@ -0,0 +1,173 @@
+"""Suggest which bank line pays each expense or received each revenue.
+
+Candidates must have the entry's exact amount, so transactions are bucketed by
+amount in cents once and every entry looks up a single bucket instead of
+rescanning the statement. Memo and name are normalized into word tokens and
+digits once per transaction, too. Within a bucket, candidates are scored on
+the favored's document and name words found in the bank text and on how close
+the dates are.
+
+A lone candidate is taken as is. Among several, the best one is taken only if
+the bank text names the favored (or carries the document) and no other
+candidate scores as high; otherwise the entry is left for the user to pick.
+"""
+
+import datetime
+import re
+import unicodedata
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from decimal import Decimal
+
+from bank.models import Transaction
+
+# Days after which dates stop adding to the score.
+DATE_WINDOW_DAYS = 31
+DOCUMENT_WEIGHT = 3
+NAME_WEIGHT = 2
+DATE_WEIGHT = 1
+# Shorter words ("DA", "DE", "SA") name nobody.
+MIN_TOKEN_LENGTH = 3
+# Shorter digit runs are too common in bank text to identify a CPF/CNPJ.
+MIN_DOCUMENT_LENGTH = 11
+
+WORD_REGEX = re.compile(r"[A-Z0-9]+")
+
+
+def normalize_text(text: str | None) -> str:
+    """`text` upper-cased and without accents."""
+    if not text:
+        return ""
+
+    text = unicodedata.normalize("NFD", text)
+    return "".join(c for c in text if unicodedata.category(c) != "Mn").upper()
+
+
+def text_tokens(text: str | None) -> frozenset[str]:
+    return frozenset(
+        word
+        for word in WORD_REGEX.findall(normalize_text(text))
+        if len(word) >= MIN_TOKEN_LENGTH and not word.isdigit()
+    )
+
+
+def only_digits(text: str | None) -> str:
+    return "".join(c for c in text or "" if c.isdigit())
+
+
+def to_cents(amount) -> int:
+    return int((abs(Decimal(amount)) * 100).to_integral_value())
+
+
+@dataclass(frozen=True)
+class MatchEntry:
+    """An expense or revenue to match, with its text already tokenized."""
+
+    obj: object
+    amount: Decimal
+    date: datetime.date | None = None
+    tokens: frozenset[str] = frozenset()
+    document: str = ""
+
+
+@dataclass
+class Candidate:
+    transaction: Transaction
+    tokens: frozenset[str]
+    digits: str
+
+
+@dataclass
+class Match:
+    entry: MatchEntry
+    transaction: Transaction | None = None
+    score: float = 0.0
+
+
+def expense_entry(expense) -> MatchEntry:
+    favored = expense.favored
+    return MatchEntry(
+        obj=expense,
+        amount=expense.value,
+        date=expense.liquidation or expense.due_date,
+        tokens=text_tokens(favored.name) if favored else frozenset(),
+        document=only_digits(favored.document) if favored else "",
+    )
+
+
+def revenue_entry(revenue) -> MatchEntry:
+    return MatchEntry(
+        obj=revenue,
+        amount=revenue.value,
+        date=revenue.receive_date,
+        tokens=text_tokens(revenue.identification),
+    )
+
+
+class TransactionIndex:
+    """Unmatched transactions bucketed by absolute amount in cents."""
+
+    def __init__(self, transactions: Iterable[Transaction]):
+        self.buckets = defaultdict(list)
+        for transaction in transactions:
+            text = f"{transaction.memo or ''} {transaction.name or ''}"
+            self.buckets[to_cents(transaction.amount)].append(
+                Candidate(transaction, text_tokens(text), only_digits(text))
+            )
+        self.used = set()
+
+    def candidates(self, amount) -> list[Candidate]:
+        return [
+            candidate
+            for candidate in self.buckets.get(to_cents(amount), ())
+            if candidate.transaction.pk not in self.used
+        ]
+
+    def match(self, entry: MatchEntry) -> Match:
+        """The entry's best transaction, if unambiguous; marks it as used."""
+        scored = sorted(
+            (
+                (score(entry, candidate), candidate)
+                for candidate in self.candidates(entry.amount)
+            ),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        if not scored:
+            return Match(entry)
+
+        (best, evidence), candidate = scored[0]
+        if len(scored) > 1 and (not evidence or scored[1][0][0] == best):
+            return Match(entry)
+
+        self.used.add(candidate.transaction.pk)
+        return Match(entry, candidate.transaction, best)
+
+
+def score(entry: MatchEntry, candidate: Candidate) -> tuple[float, float]:
+    """``(score, evidence)``: evidence is the part that names the favored."""
+    evidence = 0.0
+    if (
+        len(entry.document) >= MIN_DOCUMENT_LENGTH
+        and entry.document in candidate.digits
+    ):
+        evidence += DOCUMENT_WEIGHT
+    if entry.tokens:
+        evidence += (
+            NAME_WEIGHT * len(entry.tokens & candidate.tokens) / len(entry.tokens)
+        )
+
+    closeness = 0.0
+    if entry.date:
+        days = abs((candidate.transaction.date - entry.date).days)
+        closeness = DATE_WEIGHT * max(0.0, 1 - days / DATE_WINDOW_DAYS)
+    return evidence + closeness, evidence
+
+
+def match_entries(
+    entries: Iterable[MatchEntry], transactions: Iterable[Transaction]
+) -> list[Match]:
+    """One `Match` per entry, in order; each transaction is matched once."""
+    index = TransactionIndex(transactions)
+    return [index.match(entry) for entry in entries]
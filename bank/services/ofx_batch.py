@@ -0,0 +1,236 @@
+"""Import many OFX statements into one bank account at once.
+
+Organizations send a year of monthly statements at year end, often zipped.
+The `import_ofx_statements` command parses files in parallel in *spawned*
+processes, as in `reports.batch`: `ofxtools` is pure Python and holds the GIL.
+The web upload parses them in the request process, since every child would
+set Django up again. Only plain data crosses the process boundary, never
+model instances or parser objects.
+
+Statements overlap (a file "for January" starting on December 28th, or the
+same month sent twice), so transactions are deduplicated across files by
+fingerprint before everything is written in a single database transaction.
+
+This module is imported by the workers before `django.setup()` runs, so it
+must not import models at module level.
+"""
+
+import logging
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+logger = logging.getLogger(__name__)
+
+# Uncompressed size accepted for each OFX file, loose or inside a ZIP.
+OFX_MAX_FILE_SIZE = 5 * 1024 * 1024
+# OFX files, and their total uncompressed size, accepted from one ZIP; checked
+# before anything is decompressed.
+OFX_ZIP_MAX_ENTRIES = 120
+OFX_ZIP_MAX_TOTAL_SIZE = 50 * 1024 * 1024
+OFX_IMPORT_BATCH_SIZE = 1000
+
+
+class OFXFileStatus(models.TextChoices):
+    IMPORTED = "imported", "Importado"
+    SKIPPED = "skipped", "Ignorado"
+    FAILED = "failed", "Com erro"
+
+
+@dataclass
+class OFXFileReport:
+    filename: str
+    status: str = OFXFileStatus.IMPORTED
+    message: str = ""
+    start_date: date | None = None
+    end_date: date | None = None
+    transactions: int = 0
+    # Lines already present in another file of the same import.
+    duplicates: int = 0
+
+    @property
+    def status_label(self) -> str:
+        return OFXFileStatus(self.status).label
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _parse_file(filename: str, content: bytes):
+    """The file's `ParsedStatement`; runs in the workers."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    from bank.services.ofx_parser import OFXFileParser
+
+    return OFXFileParser(
+        ofx_file=SimpleUploadedFile(filename, content)
+    ).parsed_statement()
+
+
+def import_ofx_uploads(
+    bank_account, uploads, max_workers: int = 1
+) -> list[OFXFileReport]:
+    """Import every OFX in `uploads` into `bank_account`; one report per file.
+
+    `uploads` are Django uploaded files, or anything with ``name`` and
+    ``read()``; ZIPs are expanded. Files that cannot be read or parsed,
+    repeat a statement already registered (or an earlier file of the batch)
+    or fail validation are reported and left out. The rest are written
+    together, or not at all.
+    ``max_workers <= 1`` parses in the calling process, without a pool.
+    """
+    reports, files = [], []
+    for filename, content, error in _read_uploads(uploads):
+        reports.append(OFXFileReport(filename))
+        if error:
+            reports[-1].status = OFXFileStatus.FAILED
+            reports[-1].message = error
+        else:
+            files.append((len(reports) - 1, filename, content))
+
+    parsed = []
+    for index, statement, error in _parse_all(files, max_workers):
+        if statement is None:
+            reports[index].status = OFXFileStatus.FAILED
+            reports[index].message = error
+        else:
+            parsed.append((index, statement))
+
+    _import_statements(bank_account, parsed, reports)
+    return reports
+
+
+def _read_uploads(uploads):
+    """Yield ``(filename, content, error message)`` per OFX, ZIPs expanded."""
+    for upload in uploads:
+        name = upload.name
+        if not name.lower().endswith(".zip"):
+            yield name, upload.read(), ""
+            continue
+
+        try:
+            archive = zipfile.ZipFile(BytesIO(upload.read()))
+        except zipfile.BadZipFile:
+            yield name, b"", "Arquivo ZIP inválido."
+            continue
+
+        with archive:
+            entries = [
+                info
+                for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(".ofx")
+            ]
+            if len(entries) > OFX_ZIP_MAX_ENTRIES:
+                yield name, b"", "O ZIP pode conter no máximo 120 arquivos OFX."
+                continue
+            if sum(info.file_size for info in entries) > OFX_ZIP_MAX_TOTAL_SIZE:
+                yield name, b"", "Os arquivos do ZIP podem somar no máximo 50MB."
+                continue
+
+            for info in entries:
+                entry = f"{name}/{info.filename}"
+                if info.file_size > OFX_MAX_FILE_SIZE:
+                    yield entry, b"", "O tamanho máximo permitido para o arquivo é 5MB."
+                    continue
+                try:
+                    content = archive.read(info)
+                except zipfile.BadZipFile:
+                    yield entry, b"", "Arquivo corrompido dentro do ZIP."
+                else:
+                    yield entry, content, ""
+
+
+def _parse_all(files, max_workers):
+    """Yield ``(index, ParsedStatement | None, error message)`` per file."""
+
+    def outcome(index, filename, parse):
+        try:
+            return index, parse(), ""
+        except ValidationError as exc:
+            return index, None, exc.messages[0]
+        except Exception:
+            logger.exception("Failed to parse OFX file %s", filename)
+            return index, None, "Erro ao analisar arquivo OFX."
+
+    if max_workers <= 1 or len(files) <= 1:
+        for index, filename, content in files:
+            yield outcome(index, filename, lambda: _parse_file(filename, content))
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(files)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool:
+        futures = {
+            pool.submit(_parse_file, filename, content): (index, filename)
+            for index, filename, content in files
+        }
+        for future in as_completed(futures):
+            yield outcome(*futures[future], future.result)
+
+
+def _import_statements(bank_account, parsed, reports):
+    from bank.models import BankStatement
+    from bank.services.fingerprints import (
+        fingerprinted_transactions,
+        upsert_transactions,
+    )
+
+    registered = {
+        date(year, month, day)
+        for day, month, year in bank_account.statements.filter(
+            reference_day__isnull=False
+        ).values_list("reference_day", "reference_month", "reference_year")
+    }
+
+    # Oldest statement first: it keeps the lines later files repeat.
+    parsed.sort(key=lambda item: (item[1].end_date, item[0]))
+    statements, transactions, seen = [], [], set()
+    for index, statement in parsed:
+        report = reports[index]
+        report.start_date, report.end_date = statement.start_date, statement.end_date
+        if statement.end_date in registered:
+            report.status = OFXFileStatus.SKIPPED
+            report.message = "Extrato bancário já cadastrado."
+            continue
+
+        bank_statement = BankStatement(
+            organization_id=bank_account.organization_id,
+            bank_account=bank_account,
+            opening_balance=statement.opening_balance,
+            closing_balance=statement.closing_balance,
+            reference_day=statement.end_date.day,
+            reference_month=statement.end_date.month,
+            reference_year=statement.end_date.year,
+        )
+        try:
+            bank_statement.clean()
+        except ValidationError as exc:
+            report.status = OFXFileStatus.FAILED
+            report.message = exc.messages[0]
+            continue
+        registered.add(statement.end_date)
+        statements.append(bank_statement)
+
+        for line in fingerprinted_transactions(bank_account, statement.transactions):
+            if line.fingerprint in seen:
+                report.duplicates += 1
+                continue
+            seen.add(line.fingerprint)
+            report.transactions += 1
+            transactions.append(line)
+
+    if statements:
+        with transaction.atomic():
+            BankStatement.objects.bulk_create(statements)
+            upsert_transactions(transactions, batch_size=OFX_IMPORT_BATCH_SIZE)
@@ -1,43 +1,22 @@
-import datetime
-
-from bank.models import BankAccount, Transaction
+"""OFX (SGML, version 102) export of a bank account's transactions.
 
+`stream` yields the document in chunks while the transactions are read from
+the database, so memory stays flat however long the period: the view sends it
+in a `StreamingHttpResponse`. `handle` joins the chunks into one string.
+"""
 
-class OFXStatementExporter:
-    def handle(
-        account: BankAccount,
-        transactions: list[Transaction],
-        start_date: datetime.date,
-        end_date: datetime.date,
-    ):
-        def format_dt(dt):
-            if isinstance(dt, datetime.date) and not isinstance(dt, datetime.datetime):
-                dt = datetime.datetime.combine(dt, datetime.time.min)
-            return dt.strftime("%Y%m%d%H%M%S")
-
-        dtstart = format_dt(start_date)
-        dtend = format_dt(end_date)
-        dtnow = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+import datetime
+from collections.abc import Iterable, Iterator
 
-        stmttrn_items = []
-        for idx, t in enumerate(transactions, start=1):
-            trntype = "DEBIT" if t.amount < 0 else "CREDIT"
+from django.db.models import QuerySet
 
-            dtposted = format_dt(t.date)
-            fitid = f"{dtnow}{idx}"
+from bank.models import BankAccount, Transaction
 
-            stmttrn_items.append(f"""
-                <STMTTRN>
-                    <TRNTYPE>{trntype}</TRNTYPE>
-                    <DTPOSTED>{dtposted}</DTPOSTED>
-                    <TRNAMT>{t.amount}</TRNAMT>
-                    <FITID>{fitid}</FITID>
-                    <NAME>{t.name}</NAME>
-                </STMTTRN>
-            """)
+# Transactions fetched per query, and characters buffered per chunk yielded.
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
 
-        stmttrn_items_str = "\n".join(stmttrn_items)
-        ofx_content = f"""OFXHEADER:100
+OFX_HEADER = """OFXHEADER:100
             DATA:OFXSGML
             VERSION:102
             SECURITY:NONE
@@ -68,17 +47,29 @@ class OFXStatementExporter:
                 <STMTRS>
                 <CURDEF>BRL</CURDEF>
                 <BANKACCTFROM>
-                    <BANKID>{account.bank_id}</BANKID>
-                    <ACCTID>{account.account}</ACCTID>
-                    <ACCTTYPE>{account.account_type.upper()}</ACCTTYPE>
+                    <BANKID>{bank_id}</BANKID>
+                    <ACCTID>{account}</ACCTID>
+                    <ACCTTYPE>{account_type}</ACCTTYPE>
                 </BANKACCTFROM>
                 <BANKTRANLIST>
                     <DTSTART>{dtstart}</DTSTART>
                     <DTEND>{dtend}</DTEND>
-                    {stmttrn_items_str}
+                    """
+
+STMTTRN = """
+                <STMTTRN>
+                    <TRNTYPE>{trntype}</TRNTYPE>
+                    <DTPOSTED>{dtposted}</DTPOSTED>
+                    <TRNAMT>{amount}</TRNAMT>
+                    <FITID>{fitid}</FITID>
+                    <NAME>{name}</NAME>
+                </STMTTRN>
+            """
+
+OFX_FOOTER = """
                 </BANKTRANLIST>
                 <LEDGERBAL>
-                    <BALAMT>{account.current_balance}</BALAMT>
+                    <BALAMT>{balance}</BALAMT>
                     <DTASOF>{dtnow}</DTASOF>
                 </LEDGERBAL>
                 </STMTRS>
@@ -87,4 +78,66 @@ class OFXStatementExporter:
             </OFX>
         """
 
-        return ofx_content
+
+def format_dt(dt) -> str:
+    if isinstance(dt, datetime.date) and not isinstance(dt, datetime.datetime):
+        dt = datetime.datetime.combine(dt, datetime.time.min)
+    return dt.strftime("%Y%m%d%H%M%S")
+
+
+class OFXStatementExporter:
+    @staticmethod
+    def handle(
+        account: BankAccount,
+        transactions: Iterable[Transaction],
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> str:
+        return "".join(
+            OFXStatementExporter.stream(account, transactions, start_date, end_date)
+        )
+
+    @staticmethod
+    def stream(
+        account: BankAccount,
+        transactions: Iterable[Transaction],
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> Iterator[str]:
+        """The OFX document in chunks of about `EXPORT_BUFFER_SIZE` characters.
+
+        A queryset is read with `.iterator()`, without filling its cache.
+        """
+        if isinstance(transactions, QuerySet):
+            transactions = transactions.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        dtnow = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+
+        buffer, size = (
+            [
+                OFX_HEADER.format(
+                    dtnow=dtnow,
+                    bank_id=account.bank_id,
+                    account=account.account,
+                    account_type=account.account_type.upper(),
+                    dtstart=format_dt(start_date),
+                    dtend=format_dt(end_date),
+                )
+            ],
+            0,
+        )
+        for idx, t in enumerate(transactions, start=1):
+            item = STMTTRN.format(
+                trntype="DEBIT" if t.amount < 0 else "CREDIT",
+                dtposted=format_dt(t.date),
+                amount=t.amount,
+                fitid=f"{dtnow}{idx}",
+                name=t.name,
+            )
+            buffer.append(item if idx == 1 else "\n" + item)
+            size += len(item) + 1
+            if size >= EXPORT_BUFFER_SIZE:
+                yield "".join(buffer)
+                buffer, size = [], 0
+
+        buffer.append(OFX_FOOTER.format(balance=account.current_balance, dtnow=dtnow))
+        yield "".join(buffer)
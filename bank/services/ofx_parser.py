@@ -1,19 +1,89 @@
+import codecs
 import logging
 import re
-import tempfile
-from dataclasses import dataclass
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime
 from decimal import Decimal
+from io import BytesIO
+from itertools import islice
 
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.db import transaction
+from ofxtools.header import OFXHeaderV1, OFXHeaderV2
 from ofxtools.Parser import OFXTree
 
-from bank.models import BankAccount, BankStatement, Transaction
+from bank.models import BankAccount, BankStatement
+from bank.services.fingerprints import fingerprinted_transactions, upsert_transactions
 
 logger = logging.getLogger(__name__)
 
+# Bytes at the top of the file searched for the OFX header.
+HEADER_SIZE = 1024
+CHARSET_REGEX = re.compile(rb"CHARSET:\s*([\w-]+)")
+# Most statements come from Brazilian banks, in Windows-1252.
+DEFAULT_CODEC = "cp1252"
+
+# Tags some banks leave open on lines where `ofxtools` expects them closed.
+UNCLOSED_TAGS = (
+    "DTSERVER",
+    "LANGUAGE",
+    "DTACCTUP",
+    "TRNUID",
+    "CODE",
+    "SEVERITY",
+    "CURDEF",
+    "BALAMT",
+    "DTASOF",
+    "MKTGINFO",
+)
+UNCLOSED_TAG_REGEX = re.compile(f"<({'|'.join(UNCLOSED_TAGS)})>")
+CHECKNUM_REGEX = re.compile(r"<CHECKNUM>([^<\r\n]*)")
+CHECKNUM_MAX_LENGTH = 12
+# Normalized lines encoded per write.
+NORMALIZE_CHUNK_LINES = 4096
+
+
+@dataclass
+class ParsedStatement:
+    """What importing a statement needs from an OFX file, as plain data.
+
+    Picklable, so it can cross process boundaries or sit in the cache between
+    the preparse and the import of an upload.
+    """
+
+    start_date: date
+    end_date: date
+    opening_balance: Decimal
+    closing_balance: Decimal
+    transactions: list[dict] = field(default_factory=list)
+
+    def import_statement(self, bank_account: BankAccount) -> None:
+        if BankStatement.objects.filter(
+            bank_account=bank_account,
+            reference_day=self.end_date.day,
+            reference_month=self.end_date.month,
+            reference_year=self.end_date.year,
+        ).exists():
+            logger.warning(
+                f"Bank Statement for {self.end_date.month}/{self.end_date.year} already exists"
+            )
+            raise ValidationError("Extrato bancário já cadastrada.")
+
+        with transaction.atomic():
+            BankStatement.objects.create(
+                bank_account=bank_account,
+                opening_balance=self.opening_balance,
+                closing_balance=self.closing_balance,
+                reference_day=self.end_date.day,
+                reference_month=self.end_date.month,
+                reference_year=self.end_date.year,
+            )
+            upsert_transactions(
+                fingerprinted_transactions(bank_account, self.transactions)
+            )
+
 
 @dataclass
 class OFXFileParser:
@@ -66,175 +136,152 @@ class OFXFileParser:
         return self.ofx_data.statements[0].transactions
 
     def import_statement(self, bank_account: BankAccount) -> None:
-        if BankStatement.objects.filter(
-            bank_account=bank_account,
-            reference_day=self.balance_date.day,
-            reference_month=self.balance_date.month,
-            reference_year=self.balance_date.year,
-        ).exists():
-            logger.warning(
-                f"Bank Statement for {self.balance_date.month}/{self.balance_date.year} already exists"
-            )
-            raise ValidationError("Extrato bancário já cadastrada.")
-
-        with transaction.atomic():
-            BankStatement.objects.create(
-                bank_account=bank_account,
-                opening_balance=self.opening_balance_amount,
-                closing_balance=self.closing_balance_amount,
-                reference_day=self.balance_date.day,
-                reference_month=self.balance_date.month,
-                reference_year=self.balance_date.year,
-            )
-
-            transactions = self._updated_transactions(bank_account)
-            Transaction.objects.bulk_create(transactions, ignore_conflicts=True)
+        self.parsed_statement().import_statement(bank_account)
+
+    def parsed_statement(self) -> ParsedStatement:
+        return ParsedStatement(
+            start_date=self.statement_start_date.date(),
+            end_date=self.balance_date.date(),
+            opening_balance=self.opening_balance_amount,
+            closing_balance=self.closing_balance_amount,
+            transactions=self.transaction_fields(),
+        )
 
-            return
+    def transaction_fields(self) -> list[dict]:
+        """`Transaction` field values for each statement line, as plain data.
 
-    def _updated_transactions(self, bank_account: BankAccount) -> None:
+        Each also carries the line's ``fitid``, which only the fingerprint uses.
+        """
         return [
-            Transaction(
-                bank_account=bank_account,
-                transaction_type=tran.trntype,
-                transaction_number=tran.checknum,
-                name=tran.name,
-                amount=tran.trnamt,
-                date=(
+            {
+                "fitid": getattr(tran, "fitid", None),
+                "transaction_type": tran.trntype,
+                "transaction_number": tran.checknum,
+                "name": tran.name,
+                "amount": tran.trnamt,
+                "date": (
                     tran.dtposted.date()
                     if isinstance(tran.dtposted, datetime)
                     else datetime.strptime(tran.dtposted, "%Y%m%d").date()
                 ),
-                memo=getattr(tran, "memo", None),
-            )
+                "memo": getattr(tran, "memo", None),
+            }
             for tran in self.transactions_list
         ]
 
     def _parse_ofx_file(self, ofx_file: InMemoryUploadedFile):
-        # Try multiple encodings to handle different OFX file formats
-        encodings_to_try = ["cp1252", "windows-1252", "latin1", "utf-8", "iso-8859-1"]
-        ofx_content = None
-        for encoding in encodings_to_try:
-            try:
-                ofx_file.seek(0)
-                ofx_content = ofx_file.read().decode(encoding, errors="replace")
-                logger.info(f"Successfully decoded OFX file using {encoding} encoding")
-                break
-            except Exception as e:
-                logger.warning(f"Failed to decode with {encoding}: {str(e)}")
-                continue
-
-        if ofx_content is None:
-            try:
-                ofx_file.seek(0)
-                raw_content = ofx_file.read()
-                ofx_content = raw_content.decode("cp1252", errors="replace")
-                logger.warning("Used forced cp1252 decoding with error replacement")
-            except Exception:
-                raise ValidationError(
-                    "Não foi possível decodificar o arquivo OFX. Verifique se o arquivo não está corrompido."
-                )
-
-        fixed_ofx_content = self._fix_malformed_ofx(ofx_content)
-        modified_ofx_content = self._truncate_checknum_in_memory(fixed_ofx_content)
-
-        # Simple approach: try different encodings for the temp file
-        for encoding in ["cp1252", "latin1", "utf-8"]:
-            try:
-                with tempfile.NamedTemporaryFile(
-                    delete=False, mode="w", suffix=".ofx", encoding=encoding
-                ) as temp_file:
-                    temp_file.write(modified_ofx_content)
-                    temp_file_path = temp_file.name
-
-                ofx_tree = OFXTree()
-                ofx_tree.parse(temp_file_path)
-                ofx = ofx_tree.convert()
-                logger.info(f"Successfully parsed OFX file with {encoding}")
-                return ofx
-
-            except Exception as e:
-                logger.warning(f"Failed with {encoding}: {str(e)}")
-                continue
-
-        raise ValidationError("Arquivo OFX corrompido e não pode ser processado.")
-
-    def _truncate_checknum_in_memory(self, ofx_content, max_length=12):
+        normalized = self.normalize(ofx_file)
+        try:
+            ofx_tree = OFXTree()
+            ofx_tree.parse(normalized)
+            return ofx_tree.convert()
+        except Exception as e:
+            logger.warning(f"Failed to parse OFX file: {str(e)}")
+            raise ValidationError(
+                "Arquivo OFX corrompido e não pode ser processado."
+            ) from e
+
+    @classmethod
+    def normalize(cls, ofx_file: InMemoryUploadedFile) -> BytesIO:
+        """The upload repaired for `ofxtools`, as an in-memory binary file.
+
+        The body is decoded once, repaired line by line and re-encoded with
+        the codec the OFX header declares, which is what `ofxtools` decodes
+        it with; nothing is written to disk.
         """
-        Truncate the values of 'checknum' OFX file content in memory.
-        Some values of checknum has more than 12 digist which is the max_length for the field
+        ofx_file.seek(0)
+        raw_content = ofx_file.read()
+        codec = cls._header_codec(raw_content)
+        ofx_content = cls._decode(raw_content, codec)
+        del raw_content
+
+        normalized = BytesIO()
+        lines = cls._normalized_lines(cls._split_lines(ofx_content))
+        while chunk := "".join(islice(lines, NORMALIZE_CHUNK_LINES)):
+            normalized.write(chunk.encode(codec, errors="replace"))
+        normalized.seek(0)
+        return normalized
+
+    @staticmethod
+    def _split_lines(content: str) -> Iterator[str]:
+        """`content` line by line, newlines kept, sliced rather than copied whole."""
+        start, size = 0, len(content)
+        while start < size:
+            end = content.find("\n", start) + 1 or size
+            yield content[start:end]
+            start = end
+
+    @staticmethod
+    def _header_codec(raw_content: bytes) -> str:
+        """Codec `ofxtools` will decode the body with, per the OFX header."""
+        head = raw_content[:HEADER_SIZE].lstrip()
+        if head.startswith(b"<?xml"):
+            return OFXHeaderV2.codec
+
+        match = CHARSET_REGEX.search(head)
+        if match:
+            charset = match.group(1).decode("ascii").upper()
+            return OFXHeaderV1.codecs.get(charset, DEFAULT_CODEC)
+        return DEFAULT_CODEC
+
+    @staticmethod
+    def _decode(raw_content: bytes, codec: str) -> str:
+        # Banks declare CHARSET:1252 and send UTF-8 often enough that a body
+        # which is valid UTF-8 is taken as such, whatever the header says.
+        try:
+            return raw_content.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+
+        if codecs.lookup(codec).name == "utf-8":
+            codec = DEFAULT_CODEC
+        logger.info(f"Decoding OFX file using {codec} encoding")
+        return raw_content.decode(codec, errors="replace")
+
+    @classmethod
+    def _normalized_lines(cls, lines: Iterable[str]) -> Iterator[str]:
+        """Repair `lines` as they stream by, keeping one line of lookahead.
+
+        - closes the tags in `UNCLOSED_TAGS` when a line leaves them open;
+        - truncates CHECKNUM values to what `ofxtools` accepts;
+        - closes a STMTTRN left open before the next one or the end of the
+          transaction list.
         """
-
-        def truncate_match(match):
-            value = match.group(1)
-            return f"<CHECKNUM>{value[:max_length]} \r\n\t"
-
-        pattern = r"<CHECKNUM>(.*?) \r\n\t"
-        modified_ofx_content = re.sub(pattern, truncate_match, ofx_content)
-        return modified_ofx_content
-
-    def _fix_malformed_ofx(self, ofx_content):
-        logger.info("Fixing missing closing tags...")
-
-        lines = ofx_content.split("\n")
-        fixed_lines = self._fix_missing_closing_tags(lines)
-        result_lines = self._fix_stmttrn_blocks(fixed_lines)
-
-        result = "\n".join(result_lines)
-        logger.info("Missing closing tags fixed")
-        return result
-
-    def _fix_missing_closing_tags(self, lines):
-        tags_to_fix = [
-            "DTSERVER",
-            "LANGUAGE",
-            "DTACCTUP",
-            "TRNUID",
-            "CODE",
-            "SEVERITY",
-            "CURDEF",
-            "BALAMT",
-            "DTASOF",
-            "MKTGINFO",
-        ]
-
-        fixed_lines = []
+        previous = None
         for line in lines:
-            processed_line = line
-
-            for tag in tags_to_fix:
-                if self._needs_closing_tag(processed_line, tag):
-                    processed_line = processed_line.rstrip() + f"</{tag}>"
-                    break
-
-            fixed_lines.append(processed_line)
-
-        return fixed_lines
-
-    def _needs_closing_tag(self, line, tag):
-        opening_tag = f"<{tag}>"
-        closing_tag = f"</{tag}>"
-        return opening_tag in line and closing_tag not in line
-
-    def _fix_stmttrn_blocks(self, lines):
-        result_lines = []
-
-        for i, line in enumerate(lines):
-            result_lines.append(line)
-
-            if self._should_close_stmttrn(lines, i, line):
-                result_lines.append("\t </STMTTRN>")
+            line = cls._fix_line(line)
+            if previous is not None:
+                yield previous
+                if cls._should_close_stmttrn(previous, line):
+                    yield "\t </STMTTRN>\n"
+            previous = line
+
+        if previous is not None:
+            yield previous
+
+    @classmethod
+    def _fix_line(cls, line: str) -> str:
+        for match in UNCLOSED_TAG_REGEX.finditer(line):
+            closing_tag = f"</{match.group(1)}>"
+            if closing_tag not in line:
+                ending = "\n" if line.endswith("\n") else ""
+                line = line.rstrip() + closing_tag + ending
+                break
 
-        return result_lines
+        if "<CHECKNUM>" in line:
+            line = CHECKNUM_REGEX.sub(cls._truncate_checknum, line)
+        return line
 
-    def _should_close_stmttrn(self, lines, current_index, current_line):
-        if current_index + 1 >= len(lines):
-            return False
+    @staticmethod
+    def _truncate_checknum(match: re.Match) -> str:
+        # Some banks send check numbers longer than the 12 characters OFX
+        # allows, which `ofxtools` rejects.
+        return f"<CHECKNUM>{match.group(1).strip()[:CHECKNUM_MAX_LENGTH]}"
 
-        if not current_line.strip() or current_line.strip().startswith("<"):
+    @staticmethod
+    def _should_close_stmttrn(current_line: str, next_line: str) -> bool:
+        current_line = current_line.strip()
+        if not current_line or current_line.startswith("<"):
             return False
 
-        next_line = lines[current_index + 1].strip()
-        return next_line.startswith("<STMTTRN>") or next_line.startswith(
-            "</BANKTRANLIST>"
-        )
+        return next_line.strip().startswith(("<STMTTRN>", "</BANKTRANLIST>"))
@@ -0,0 +1,54 @@
+"""Parsed OFX uploads kept between the preparse and the import requests.
+
+The upload page sends the file twice: once to `preparse_ofx_file_view`, to
+show the statement period, and again with the form. The preparse stores the
+`ParsedStatement` in the cache under the SHA-256 of the file and the bank
+account, so the import only hashes the bytes instead of decoding, repairing
+and parsing them again. A miss — expired entry, another worker with a local
+memory cache, a different file — falls back to parsing.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bank.models import BankAccount
+from bank.services.ofx_parser import OFXFileParser, ParsedStatement
+
+OFX_STAGING_PREFIX = "bank:ofx-staging"
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(ofx_file) -> str:
+    ofx_file.seek(0)
+    digest = hashlib.sha256()
+    while chunk := ofx_file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    ofx_file.seek(0)
+    return digest.hexdigest()
+
+
+def staging_key(bank_account: BankAccount, digest: str) -> str:
+    return f"{OFX_STAGING_PREFIX}:{bank_account.pk}:{digest}"
+
+
+def stage_statement(
+    bank_account: BankAccount, ofx_file, statement: ParsedStatement
+) -> None:
+    cache.set(
+        staging_key(bank_account, file_digest(ofx_file)),
+        statement,
+        settings.OFX_STAGING_TIMEOUT,
+    )
+
+
+def pop_parsed_statement(bank_account: BankAccount, ofx_file) -> ParsedStatement:
+    """The statement staged for this file, or the file parsed now."""
+    key = staging_key(bank_account, file_digest(ofx_file))
+    statement = cache.get(key)
+    if statement is None:
+        return OFXFileParser(ofx_file=ofx_file).parsed_statement()
+
+    cache.delete(key)
+    return statement
@@ -0,0 +1,119 @@
+"""Differences between the bank statement and what the system reconciled.
+
+A transaction counts as reconciled when any expense or revenue points at it,
+either through the `expenses`/`revenues` M2M used by the reconcile views or
+through the older single `expense`/`revenue` FK. Each side of the diff is a
+single query with `NOT EXISTS` anti-joins, so the cost does not grow with one
+lookup per statement line.
+"""
+
+import datetime
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from bank.models import Transaction
+
+
+@dataclass(frozen=True)
+class ReconciliationEntry:
+    date: datetime.date | None
+    description: str
+    value: Decimal
+
+
+@dataclass
+class ReconciliationDiff:
+    # Bank lines in the period that no expense or revenue was reconciled with.
+    unmatched_transactions: list[ReconciliationEntry] = field(default_factory=list)
+    # Reconciled expenses and revenues of the period with no linked bank line
+    # inside the period.
+    unmatched_entries: list[ReconciliationEntry] = field(default_factory=list)
+
+
+def linked_transactions() -> Q:
+    """Bank lines linked to a live expense or revenue, by the M2M or the FK."""
+    expense_links = Transaction.expenses.through.objects.filter(
+        transaction=OuterRef("pk"), expense__deleted_at__isnull=True
+    )
+    revenue_links = Transaction.revenues.through.objects.filter(
+        transaction=OuterRef("pk"), revenue__deleted_at__isnull=True
+    )
+    return (
+        Q(expense__isnull=False, expense__deleted_at__isnull=True)
+        | Q(revenue__isnull=False, revenue__deleted_at__isnull=True)
+        | Exists(expense_links)
+        | Exists(revenue_links)
+    )
+
+
+def unreconciled_transactions(transactions: QuerySet) -> QuerySet:
+    return transactions.exclude(linked_transactions())
+
+
+def _in_period(start_date, end_date) -> Q:
+    return Q(date__gte=start_date, date__lte=end_date)
+
+
+def without_transaction_in_period(
+    entries: QuerySet, start_date, end_date, relation: str
+) -> QuerySet:
+    """Reconciled `entries` with no linked transaction dated in the period.
+
+    `relation` is ``"expense"`` or ``"revenue"``: the name of the FK and the
+    M2M (plural) on `Transaction` that point at the entries' model.
+    """
+    period = _in_period(start_date, end_date)
+    through = getattr(Transaction, f"{relation}s").through
+    by_m2m = through.objects.filter(
+        **{relation: OuterRef("pk")},
+        transaction__date__gte=start_date,
+        transaction__date__lte=end_date,
+        transaction__deleted_at__isnull=True,
+    )
+    by_fk = Transaction.objects.filter(period, **{relation: OuterRef("pk")})
+    return entries.filter(conciled=True).exclude(Exists(by_m2m)).exclude(Exists(by_fk))
+
+
+def reconciliation_diff(
+    transactions: QuerySet,
+    expenses: QuerySet,
+    revenues: QuerySet,
+    start_date,
+    end_date,
+) -> ReconciliationDiff:
+    """Both sides of the reconciliation for the given period.
+
+    `transactions` are the bank lines to check, `expenses` and `revenues` the
+    system entries; all three are narrowed to the period here.
+    """
+    diff = ReconciliationDiff()
+
+    bank_lines = (
+        unreconciled_transactions(transactions.filter(_in_period(start_date, end_date)))
+        .order_by("date", "id")
+        .values_list("date", "memo", "name", "amount")
+    )
+    diff.unmatched_transactions = [
+        ReconciliationEntry(date, memo or name or "", amount)
+        for date, memo, name, amount in bank_lines
+    ]
+
+    unmatched_expenses = without_transaction_in_period(
+        expenses, start_date, end_date, "expense"
+    ).values_list("liquidation", "identification", "value")
+    unmatched_revenues = without_transaction_in_period(
+        revenues, start_date, end_date, "revenue"
+    ).values_list("receive_date", "identification", "value")
+    entries = [
+        ReconciliationEntry(date, f"Despesa: {identification}", -value)
+        for date, identification, value in unmatched_expenses
+    ] + [
+        ReconciliationEntry(date, f"Receita: {identification}", value)
+        for date, identification, value in unmatched_revenues
+    ]
+    diff.unmatched_entries = sorted(
+        entries, key=lambda entry: (entry.date or datetime.date.min, entry.description)
+    )
+    return diff
@@ -0,0 +1,123 @@
+"""Day-by-day bank statement with opening and closing balances.
+
+Balances come from a running `SUM(...) OVER (ORDER BY date)` over the daily
+totals, offset by everything posted before the period, so a page of days costs
+the same few queries however long the period or busy the account is.
+"""
+
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.core.paginator import Page, Paginator
+from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, F, Sum, Window
+
+from bank.models import BankAccount, Transaction
+from bank.services.reconciliation import linked_transactions
+
+STATEMENT_DAYS_PER_PAGE = 31
+
+
+class StatementStatus(models.TextChoices):
+    ALL = "all", "Todas"
+    RECONCILED = "reconciled", "Conciliadas"
+    PENDING = "pending", "Pendentes"
+
+
+@dataclass
+class StatementDay:
+    date: datetime.date
+    open_balance: Decimal
+    close_balance: Decimal
+    transactions: list[Transaction] = field(default_factory=list)
+
+
+def with_reconciled_flag(transactions):
+    """Annotate `is_reconciled` on each transaction, in the same query."""
+    return transactions.annotate(
+        is_reconciled=ExpressionWrapper(
+            linked_transactions(), output_field=BooleanField()
+        )
+    )
+
+
+def daily_balances(account: BankAccount, start_date, end_date):
+    """One row per day with transactions: ``date``, ``total`` and ``running``.
+
+    ``running`` is the sum of the period's amounts up to and including the
+    day; add the balance before `start_date` to get the closing balance.
+    Soft-deleted rows are left out, as in the daily snapshots `balance_at`
+    reads.
+    """
+    # Both windows are computed per transaction: same-day rows share the day's
+    # total and, being peers in the default RANGE frame, the running sum too,
+    # so DISTINCT collapses them into one row per day.
+    return (
+        account.transactions.filter(
+            date__gte=start_date, date__lte=end_date, deleted_at__isnull=True
+        )
+        .annotate(
+            total=Window(Sum("amount"), partition_by=F("date")),
+            running=Window(Sum("amount"), order_by=F("date").asc()),
+        )
+        .values("date", "total", "running")
+        .order_by("date")
+        .distinct()
+    )
+
+
+def balance_before(account: BankAccount, date) -> Decimal:
+    return account.balance_at(date - datetime.timedelta(days=1))
+
+
+def statement_page(
+    account: BankAccount,
+    start_date,
+    end_date,
+    status: str = StatementStatus.ALL,
+    page_number=None,
+    per_page: int = STATEMENT_DAYS_PER_PAGE,
+) -> tuple[Page, list[StatementDay]]:
+    """A page of statement days, each with its balances and transactions.
+
+    `status` filters the transactions listed under each day, not the days or
+    their balances, which always account for every transaction.
+    """
+    page = Paginator(daily_balances(account, start_date, end_date), per_page).get_page(
+        page_number
+    )
+    rows = list(page.object_list)
+    if not rows:
+        return page, []
+
+    base = balance_before(account, start_date)
+    days = {
+        row["date"]: StatementDay(
+            date=row["date"],
+            open_balance=base + row["running"] - row["total"],
+            close_balance=base + row["running"],
+        )
+        for row in rows
+    }
+
+    transactions = with_reconciled_flag(
+        account.transactions.filter(
+            date__gte=rows[0]["date"],
+            date__lte=rows[-1]["date"],
+            deleted_at__isnull=True,
+        )
+    ).order_by("date", "id")
+    if status == StatementStatus.RECONCILED:
+        transactions = transactions.filter(is_reconciled=True)
+    elif status == StatementStatus.PENDING:
+        transactions = transactions.filter(is_reconciled=False)
+
+    by_day = defaultdict(list)
+    for transaction in transactions:
+        by_day[transaction.date].append(transaction)
+    for date, day in days.items():
+        day.transactions = by_day[date]
+
+    return page, list(days.values())
@@ -0,0 +1,32 @@
+from bank.models import Transaction
+from bank.services.balances import apply_contribution_change, transaction_contribution
+
+
+def remember_transaction_contribution(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._balance_contribution = None
+        return
+
+    stored = (
+        Transaction._base_manager.filter(pk=instance.pk)
+        .values_list("bank_account_id", "date", "amount", "deleted_at")
+        .first()
+    )
+    if stored is None or stored[3] is not None:
+        instance._balance_contribution = None
+    else:
+        instance._balance_contribution = stored[:3]
+
+
+def update_daily_balances_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_contribution_change(
+        getattr(instance, "_balance_contribution", None),
+        transaction_contribution(instance),
+    )
+    instance._balance_contribution = transaction_contribution(instance)
+
+
+def update_daily_balances_on_delete(sender, instance, **kwargs):
+    apply_contribution_change(transaction_contribution(instance), None)
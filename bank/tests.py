@@ -1 +1,987 @@
-# Create your tests here.
+import datetime
+import importlib
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from easy_tenants import tenant_context, tenant_context_disabled
+
+from accountability.models import Accountability, Expense
+from accounts.models import User
+from bank.management.commands.benchmark_ofx import synthetic_ofx
+from bank.models import BankAccount, Transaction
+from bank.services.balances import bulk_create_transactions
+from bank.services.fingerprints import (
+    fingerprinted_transactions,
+    upsert_transactions,
+)
+from bank.services.matching import expense_entry, match_entries
+from bank.services.ofx_batch import OFXFileStatus, import_ofx_uploads
+from bank.services.ofx_exporter import EXPORT_BUFFER_SIZE, OFXStatementExporter
+from bank.services.ofx_parser import OFXFileParser
+from bank.services.statement import statement_page
+from contracts.models import Contract
+
+
+class LegacyOFXStatementExporter:
+    """`OFXStatementExporter` before it streamed, kept as the reference."""
+
+    def handle(
+        account: BankAccount,
+        transactions: list[Transaction],
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ):
+        def format_dt(dt):
+            if isinstance(dt, datetime.date) and not isinstance(dt, datetime.datetime):
+                dt = datetime.datetime.combine(dt, datetime.time.min)
+            return dt.strftime("%Y%m%d%H%M%S")
+
+        dtstart = format_dt(start_date)
+        dtend = format_dt(end_date)
+        dtnow = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+
+        stmttrn_items = []
+        for idx, t in enumerate(transactions, start=1):
+            trntype = "DEBIT" if t.amount < 0 else "CREDIT"
+
+            dtposted = format_dt(t.date)
+            fitid = f"{dtnow}{idx}"
+
+            stmttrn_items.append(f"""
+                <STMTTRN>
+                    <TRNTYPE>{trntype}</TRNTYPE>
+                    <DTPOSTED>{dtposted}</DTPOSTED>
+                    <TRNAMT>{t.amount}</TRNAMT>
+                    <FITID>{fitid}</FITID>
+                    <NAME>{t.name}</NAME>
+                </STMTTRN>
+            """)
+
+        stmttrn_items_str = "\n".join(stmttrn_items)
+        ofx_content = f"""OFXHEADER:100
+            DATA:OFXSGML
+            VERSION:102
+            SECURITY:NONE
+            ENCODING:USASCII
+            CHARSET:1252
+            COMPRESSION:NONE
+            OLDFILEUID:NONE
+            NEWFILEUID:NONE
+
+            <OFX>
+            <SIGNONMSGSRSV1>
+            <SONRS>
+                <STATUS>
+                <CODE>0</CODE>
+                <SEVERITY>INFO</SEVERITY>
+                </STATUS>
+                <DTSERVER>{dtnow}</DTSERVER>
+                <LANGUAGE>POR</LANGUAGE>
+            </SONRS>
+            </SIGNONMSGSRSV1>
+            <BANKMSGSRSV1>
+            <STMTTRNRS>
+                <TRNUID>1</TRNUID>
+                <STATUS>
+                <CODE>0</CODE>
+                <SEVERITY>INFO</SEVERITY>
+                </STATUS>
+                <STMTRS>
+                <CURDEF>BRL</CURDEF>
+                <BANKACCTFROM>
+                    <BANKID>{account.bank_id}</BANKID>
+                    <ACCTID>{account.account}</ACCTID>
+                    <ACCTTYPE>{account.account_type.upper()}</ACCTTYPE>
+                </BANKACCTFROM>
+                <BANKTRANLIST>
+                    <DTSTART>{dtstart}</DTSTART>
+                    <DTEND>{dtend}</DTEND>
+                    {stmttrn_items_str}
+                </BANKTRANLIST>
+                <LEDGERBAL>
+                    <BALAMT>{account.current_balance}</BALAMT>
+                    <DTASOF>{dtnow}</DTASOF>
+                </LEDGERBAL>
+                </STMTRS>
+            </STMTTRNRS>
+            </BANKMSGSRSV1>
+            </OFX>
+        """
+
+        return ofx_content
+
+
+class SeededAccountMixin:
+    """Contract 1001 from `seed_dev` and its checking account."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            cls.contract = Contract.objects.get(internal_code=1001)
+            cls.account = cls.contract.checking_account
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+
+class BankStatementViewTests(SeededAccountMixin, TestCase):
+    def statement(self, **params):
+        params = {"start_date": "2026-03-01", "end_date": "2026-12-31", **params}
+        return self.client.get(
+            reverse("bank:bank-accounts-statement", args=[self.account.pk]), params
+        )
+
+    def add_transactions(self, count, start=datetime.date(2026, 6, 1)):
+        with tenant_context(self.user.organization):
+            bulk_create_transactions(
+                [
+                    Transaction(
+                        organization=self.account.organization,
+                        bank_account=self.account,
+                        transaction_number=f"BUSY{start:%Y%m%d}{i:05d}",
+                        memo="Movimento",
+                        amount=Decimal("10.00") if i % 2 else Decimal("-3.00"),
+                        date=start + datetime.timedelta(days=i % 200),
+                    )
+                    for i in range(count)
+                ]
+            )
+
+    def test_balances_match_balance_at(self):
+        with tenant_context(self.user.organization):
+            _, days = statement_page(
+                self.account, datetime.date(2026, 3, 1), datetime.date(2026, 12, 31)
+            )
+            self.assertTrue(days)
+            for day in days:
+                self.assertEqual(day.close_balance, self.account.balance_at(day.date))
+                self.assertEqual(
+                    day.open_balance,
+                    day.close_balance - sum(t.amount for t in day.transactions),
+                )
+            self.assertEqual(days[0].date, datetime.date(2026, 3, 5))
+
+    def test_soft_deleted_transactions_are_left_out(self):
+        with tenant_context(self.user.organization):
+            line = Transaction.objects.filter(
+                bank_account=self.account, date__month=3
+            ).first()
+            Transaction.all_objects.filter(pk=line.pk).delete()
+
+            _, days = statement_page(
+                self.account, datetime.date(2026, 3, 1), datetime.date(2026, 12, 31)
+            )
+
+            for day in days:
+                self.assertEqual(day.close_balance, self.account.balance_at(day.date))
+            self.assertEqual(days[-1].close_balance, self.account.current_balance)
+            self.assertNotIn(line.pk, [t.pk for day in days for t in day.transactions])
+
+    def test_query_count_does_not_grow_with_transactions(self):
+        with CaptureQueriesContext(connection) as quiet:
+            self.statement()
+        self.add_transactions(2000)
+        with CaptureQueriesContext(connection) as busy:
+            response = self.statement()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(busy.captured_queries), len(quiet.captured_queries))
+        self.assertEqual(response.context["page_obj"].paginator.num_pages, 7)
+
+    def test_status_filters_transactions_but_not_days(self):
+        with tenant_context(self.user.organization):
+            payroll = Expense.objects.get(identification="Folha equipe técnica 03/2026")
+            line = Transaction.objects.get(transaction_number="VP202603010")
+            payroll.bank_transactions.add(line)
+
+        reconciled = self.statement(status="reconciled").context["statement_days"]
+        pending = self.statement(status="pending").context["statement_days"]
+
+        self.assertEqual(
+            [t.pk for day in reconciled for t in day.transactions], [line.pk]
+        )
+        self.assertTrue(
+            all(t.is_reconciled for day in reconciled for t in day.transactions)
+        )
+        self.assertNotIn(line.pk, [t.pk for day in pending for t in day.transactions])
+        self.assertEqual(
+            [day.date for day in reconciled], [day.date for day in pending]
+        )
+
+    def test_pagination_keeps_filters_in_links(self):
+        self.add_transactions(100)
+
+        response = self.statement(status="pending", page=2)
+
+        self.assertEqual(response.context["page_obj"].number, 2)
+        self.assertContains(response, "status=pending")
+        self.assertContains(response, "start_date=2026-03-01")
+
+
+class DailyBalanceTests(SeededAccountMixin, TestCase):
+    def assertBalancesMatchTransactions(self):
+        transactions = Transaction._base_manager.filter(
+            bank_account=self.account, deleted_at__isnull=True
+        )
+        dates = set(transactions.values_list("date", flat=True))
+        dates |= set(self.account.daily_balances.values_list("date", flat=True))
+        for date in sorted(dates):
+            total = transactions.filter(date__lte=date).aggregate(total=Sum("amount"))[
+                "total"
+            ] or Decimal("0.00")
+            self.assertEqual(
+                self.account.balance_at(date), self.account.opening_balance + total
+            )
+        self.assertEqual(
+            self.account.current_balance,
+            self.account.opening_balance
+            + (transactions.aggregate(total=Sum("amount"))["total"] or 0),
+        )
+
+    def test_seeded_transactions_are_tracked(self):
+        self.assertTrue(self.account.daily_balances.exists())
+        self.assertBalancesMatchTransactions()
+
+    def test_balance_at_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.account.balance_at(datetime.date(2026, 3, 31))
+
+    def test_saves_and_deletes_shift_later_days(self):
+        with tenant_context(self.user.organization):
+            payroll = Transaction.objects.get(transaction_number="VP202603010")
+
+            payroll.amount = Decimal("-31000.00")
+            payroll.save()
+            self.assertBalancesMatchTransactions()
+
+            payroll.date = datetime.date(2026, 2, 20)
+            payroll.save()
+            self.assertBalancesMatchTransactions()
+
+            payroll.delete()
+            self.assertBalancesMatchTransactions()
+
+            payroll.restore()
+            self.assertBalancesMatchTransactions()
+
+            payroll.hard_delete()
+            self.assertBalancesMatchTransactions()
+
+            Transaction.objects.create(
+                bank_account=self.account,
+                transaction_number="LATE001",
+                amount=Decimal("12.34"),
+                date=datetime.date(2026, 1, 2),
+            )
+            self.assertBalancesMatchTransactions()
+
+    def test_bulk_create_skipping_conflicts_keeps_balances(self):
+        with tenant_context(self.user.organization):
+            existing = Transaction.objects.get(transaction_number="VP202603020")
+            existing.fingerprint = "imported-before"
+            existing.save()
+            bulk_create_transactions(
+                [
+                    Transaction(
+                        organization=self.account.organization,
+                        bank_account=self.account,
+                        fingerprint=existing.fingerprint,
+                        transaction_number=existing.transaction_number,
+                        memo=existing.memo,
+                        amount=existing.amount,
+                        date=existing.date,
+                    ),
+                    Transaction(
+                        organization=self.account.organization,
+                        bank_account=self.account,
+                        transaction_number="OFX0001",
+                        amount=Decimal("100.00"),
+                        date=datetime.date(2026, 3, 13),
+                    ),
+                ],
+                ignore_conflicts=True,
+            )
+        self.assertBalancesMatchTransactions()
+
+    def test_soft_delete_and_restore_of_a_queryset_keep_balances(self):
+        with tenant_context(self.user.organization):
+            march = Transaction.all_objects.filter(
+                bank_account=self.account, date__month=3
+            )
+            ids = list(march.values_list("pk", flat=True))
+
+            march.delete()
+            self.assertBalancesMatchTransactions()
+
+            Transaction.all_objects.filter(pk__in=ids).restore()
+            self.assertBalancesMatchTransactions()
+
+    def test_admin_delete_selected_keeps_balances(self):
+        ids = list(
+            Transaction._base_manager.filter(
+                bank_account=self.account, date__month=4
+            ).values_list("pk", flat=True)
+        )
+        response = self.client.post(
+            reverse("admin:bank_transaction_changelist"),
+            {"action": "delete_selected", "_selected_action": ids, "post": "yes"},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(
+            Transaction._base_manager.filter(
+                pk__in=ids, deleted_at__isnull=True
+            ).exists()
+        )
+        self.assertBalancesMatchTransactions()
+
+    def test_admin_delete_queryset_soft_deletes_through_objects(self):
+        self.assertEqual(Transaction._default_manager.name, "objects")
+        model_admin = admin.site._registry[Transaction]
+        request = RequestFactory().post("/")
+        request.user = self.user
+
+        with tenant_context(self.user.organization):
+            selected = Transaction.objects.filter(
+                bank_account=self.account, date__month=3
+            )
+            ids = list(selected.values_list("pk", flat=True))
+            model_admin.delete_queryset(request, selected)
+
+            self.assertFalse(Transaction.objects.filter(pk__in=ids).exists())
+            self.assertEqual(
+                Transaction.all_objects.filter(pk__in=ids).deleted().count(),
+                len(ids),
+            )
+        self.assertBalancesMatchTransactions()
+
+    def test_rebuild_balances_repairs_drift(self):
+        self.account.daily_balances.filter(date__month=3).update(
+            running_total=Decimal("1.00")
+        )
+        self.account.daily_balances.filter(date__month=4).delete()
+
+        call_command("rebuild_balances", stdout=StringIO())
+
+        self.assertBalancesMatchTransactions()
+
+
+class BankAccountOverviewTests(SeededAccountMixin, TestCase):
+    def add_transactions(self, count):
+        with tenant_context(self.user.organization):
+            bulk_create_transactions(
+                Transaction(
+                    organization=self.account.organization,
+                    bank_account=self.account,
+                    memo="Movimento",
+                    amount=Decimal("-7.00"),
+                    date=datetime.date(2026, 5, 1) + datetime.timedelta(days=i % 60),
+                )
+                for i in range(count)
+            )
+
+    def count_queries(self, url) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_annotations_match_the_properties(self):
+        self.add_transactions(5)
+        with tenant_context(self.user.organization):
+            account = BankAccount.objects.get(pk=self.account.pk)
+            expected = (
+                account.current_balance,
+                account.last_statement_update,
+                account.unreconciled_count,
+                account.last_transaction_date,
+            )
+            annotated = BankAccount.objects.with_overview().get(pk=self.account.pk)
+
+            with self.assertNumQueries(0):
+                overview = (
+                    annotated.current_balance,
+                    annotated.last_statement_update,
+                    annotated.unreconciled_count,
+                    annotated.last_transaction_date,
+                )
+
+        self.assertEqual(overview, expected)
+        self.assertGreaterEqual(overview[2], 5)
+        self.assertEqual(overview[3], datetime.date(2026, 5, 5))
+
+    def test_account_without_statements_or_transactions(self):
+        with tenant_context(self.user.organization):
+            account = BankAccount.objects.create(
+                organization=self.user.organization,
+                bank_name="Banco Vazio",
+                bank_id="001",
+                account="123456",
+                agency="0001",
+                account_type=BankAccount.AccountTypeChoices.CHECKING,
+                origin=BankAccount.OriginChoices.MUNICIPAL,
+            )
+            annotated = BankAccount.objects.with_overview().get(pk=account.pk)
+
+        self.assertEqual(annotated.last_statement_update, "---")
+        self.assertEqual(annotated.unreconciled_count, 0)
+        self.assertIsNone(annotated.last_transaction_date)
+
+    def test_listings_queries_do_not_grow_with_transactions(self):
+        urls = [
+            reverse("bank:bank-accounts-detail", args=[self.account.pk]),
+            reverse(
+                "contracts:contracts-detail-section",
+                args=[self.contract.pk, "accounts"],
+            ),
+        ]
+        before = [self.count_queries(url) for url in urls]
+
+        self.add_transactions(200)
+
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    def test_contract_accounts_section_shows_the_overview(self):
+        self.add_transactions(3)
+        with tenant_context(self.user.organization):
+            account = BankAccount.objects.with_overview().get(pk=self.account.pk)
+
+        response = self.client.get(
+            reverse(
+                "contracts:contracts-detail-section",
+                args=[self.contract.pk, "accounts"],
+            )
+        )
+
+        self.assertEqual(response.context["checking_account"], account)
+        self.assertContains(response, account.last_statement_update)
+        self.assertContains(response, "Pendentes de conciliação")
+
+    def test_overview_without_a_tenant(self):
+        # The admin lists every organization's accounts.
+        with tenant_context_disabled():
+            accounts = {
+                account.pk: account for account in BankAccount.objects.with_overview()
+            }
+
+        self.assertEqual(
+            accounts[self.account.pk].current_balance, self.account.current_balance
+        )
+
+
+class OFXFileParserTests(SeededAccountMixin, TestCase):
+    def upload(self, content):
+        return SimpleUploadedFile("extrato.ofx", content)
+
+    def test_repairs_and_parses_in_memory(self):
+        with (
+            mock.patch("tempfile.NamedTemporaryFile", side_effect=AssertionError),
+            mock.patch("tempfile.mkstemp", side_effect=AssertionError),
+        ):
+            parser = OFXFileParser(ofx_file=self.upload(synthetic_ofx(25)))
+
+        self.assertEqual(parser.account_data["bank_name"], "Banco Sintético")
+        self.assertEqual(len(parser.transactions_list), 25)
+        self.assertEqual(parser.transactions_list[0].checknum, "000000000000")
+        self.assertEqual(
+            parser.transactions_list[0].memo, "Pagamento nº 0 -\nmanutenção"
+        )
+        self.assertEqual(parser.statement_period_info["month"], 3)
+
+    def test_utf8_body_under_windows_1252_header(self):
+        parser = OFXFileParser(ofx_file=self.upload(synthetic_ofx(3, encoding="utf-8")))
+
+        self.assertEqual(parser.account_data["bank_name"], "Banco Sintético")
+        self.assertEqual(
+            parser.transactions_list[1].memo, "Pagamento nº 1 - manutenção"
+        )
+
+    def test_corrupted_file_raises_validation_error(self):
+        with self.assertRaises(ValidationError):
+            OFXFileParser(ofx_file=self.upload(synthetic_ofx(3)[:900]))
+
+    def test_import_statement_updates_balances(self):
+        parser = OFXFileParser(ofx_file=self.upload(synthetic_ofx(40)))
+        balance = self.account.balance_at(datetime.date(2026, 3, 31))
+
+        with tenant_context(self.user.organization):
+            self.account.statements.all().delete()
+            parser.import_statement(self.account)
+            imported = self.account.transactions.filter(memo__contains="nº")
+
+            self.assertEqual(imported.count(), 40)
+            self.assertEqual(
+                self.account.balance_at(datetime.date(2026, 3, 31)),
+                balance + sum(t.trnamt for t in parser.transactions_list),
+            )
+
+
+class TransactionFingerprintTests(SeededAccountMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        with tenant_context(self.user.organization):
+            self.account.statements.all().delete()
+
+    def rows(self, fitids):
+        fee = {
+            "transaction_type": "FEE",
+            "transaction_number": None,
+            "name": "Tarifa",
+            "amount": Decimal("-12.50"),
+            "date": datetime.date(2026, 3, 5),
+            "memo": "Tarifa pacote",
+        }
+        return [{**fee, "fitid": fitid} for fitid in fitids]
+
+    def fingerprints(self, fitids):
+        return [
+            t.fingerprint
+            for t in fingerprinted_transactions(self.account, self.rows(fitids))
+        ]
+
+    def test_fitid_or_content_with_occurrence(self):
+        by_fitid = self.fingerprints(["A1", "A2"])
+        by_content = self.fingerprints([None, None])
+        # A FITID repeated within the file can't tell the lines apart.
+        repeated = self.fingerprints(["X", "X"])
+
+        self.assertEqual(len(set(by_fitid + by_content)), 4)
+        self.assertEqual(repeated, by_content)
+        self.assertEqual(by_fitid, self.fingerprints(["A1", "A2"]))
+
+    def test_reimporting_an_overlapping_statement_upserts(self):
+        march = OFXFileParser(
+            ofx_file=SimpleUploadedFile("marco.ofx", synthetic_ofx(20))
+        ).parsed_statement()
+        april = OFXFileParser(
+            ofx_file=SimpleUploadedFile(
+                "abril.ofx", synthetic_ofx(30, end_date=datetime.date(2026, 4, 15))
+            )
+        ).parsed_statement()
+        april.transactions[0]["memo"] = "Corrigido pelo banco"
+        repeated = dict(april.transactions[1])
+        april.transactions[1]["amount"] += Decimal("1000.00")
+        april.transactions[1]["date"] = datetime.date(2026, 1, 2)
+
+        with tenant_context(self.user.organization):
+            march.import_statement(self.account)
+            april.import_statement(self.account)
+            imported = self.account.transactions.exclude(fingerprint=None)
+
+            self.assertEqual(imported.count(), 30)
+            self.assertTrue(imported.filter(memo="Corrigido pelo banco").exists())
+            # The amount and date of a line imported before are kept.
+            self.assertTrue(
+                imported.filter(
+                    amount=repeated["amount"], date=repeated["date"]
+                ).exists()
+            )
+            self.assertFalse(imported.filter(date=datetime.date(2026, 1, 2)).exists())
+            self.assertEqual(
+                self.account.balance_at(datetime.date(2026, 4, 15)),
+                self.account.opening_balance
+                + self.account.transactions.filter(
+                    date__lte=datetime.date(2026, 4, 15)
+                ).aggregate(total=Sum("amount"))["total"],
+            )
+
+    def test_upsert_returns_the_stored_pks_of_updated_lines(self):
+        march = OFXFileParser(
+            ofx_file=SimpleUploadedFile("marco.ofx", synthetic_ofx(20))
+        ).parsed_statement()
+
+        with tenant_context(self.user.organization):
+            march.import_statement(self.account)
+            imported = self.account.transactions.exclude(fingerprint=None)
+            stored = dict(imported.values_list("fingerprint", "pk"))
+
+            upserted = upsert_transactions(
+                fingerprinted_transactions(self.account, march.transactions)
+            )
+
+            self.assertEqual(len(upserted), 20)
+            self.assertEqual({t.fingerprint: t.pk for t in upserted}, stored)
+            self.assertEqual(imported.count(), 20)
+
+    def test_reimporting_over_rows_imported_before_fingerprints(self):
+        march = OFXFileParser(
+            ofx_file=SimpleUploadedFile("marco.ofx", synthetic_ofx(20))
+        ).parsed_statement()
+        april = OFXFileParser(
+            ofx_file=SimpleUploadedFile(
+                "abril.ofx", synthetic_ofx(30, end_date=datetime.date(2026, 4, 15))
+            )
+        ).parsed_statement()
+        migration = importlib.import_module(
+            "bank.migrations.0003_transaction_fingerprint"
+        )
+
+        with tenant_context(self.user.organization):
+            # Imported by the code before fingerprints: no FITID kept.
+            legacy = fingerprinted_transactions(self.account, march.transactions)
+            for line in legacy:
+                line.fingerprint = None
+            bulk_create_transactions(legacy)
+            before = self.account.transactions.count()
+            migration.backfill_fingerprints(apps, None)
+
+            april.import_statement(self.account)
+
+            self.assertEqual(self.account.transactions.count(), before + 10)
+            self.assertEqual(
+                self.account.balance_at(datetime.date(2026, 4, 15)),
+                self.account.opening_balance
+                + self.account.transactions.filter(
+                    date__lte=datetime.date(2026, 4, 15)
+                ).aggregate(total=Sum("amount"))["total"],
+            )
+
+
+class OFXStagingTests(SeededAccountMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        with tenant_context(self.user.organization):
+            self.account.statements.all().delete()
+
+    def upload(self):
+        return SimpleUploadedFile("extrato.ofx", synthetic_ofx(20))
+
+    def import_upload(self):
+        return self.client.post(
+            reverse("bank:bank-statements-update", args=[self.account.id]),
+            {"ofx_file": self.upload()},
+        )
+
+    def imported(self):
+        with tenant_context(self.user.organization):
+            return self.account.transactions.filter(memo__contains="nº").count()
+
+    def test_import_reuses_the_preparsed_statement(self):
+        response = self.client.post(
+            reverse("bank:preparse-ofx", args=[self.account.id]),
+            {"ofx_file": self.upload()},
+        )
+        self.assertEqual(response.json()["period"]["month"], 3)
+
+        with mock.patch.object(
+            OFXFileParser, "_parse_ofx_file", side_effect=AssertionError
+        ):
+            response = self.import_upload()
+
+        self.assertRedirects(
+            response,
+            reverse("bank:bank-accounts-detail", args=[self.account.id]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(self.imported(), 20)
+
+    def test_import_without_preparse_parses_the_file(self):
+        self.import_upload()
+
+        self.assertEqual(self.imported(), 20)
+
+
+class OFXBatchImportTests(SeededAccountMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        with tenant_context(self.user.organization):
+            self.account.statements.all().delete()
+
+    def zipped(self, name, files):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for filename, content in files.items():
+                archive.writestr(filename, content)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def overlapping_uploads(self):
+        return [
+            self.zipped(
+                "extratos.zip",
+                {
+                    "marco.ofx": synthetic_ofx(30),
+                    # Repeats March's 30 lines and adds 10.
+                    "abril.ofx": synthetic_ofx(40, end_date=datetime.date(2026, 4, 15)),
+                },
+            )
+        ]
+
+    def imported(self):
+        return self.account.transactions.filter(memo__contains="nº")
+
+    def test_overlapping_statements_import_each_line_once(self):
+        balance = self.account.balance_at(datetime.date(2026, 4, 15))
+
+        with tenant_context(self.user.organization):
+            reports = import_ofx_uploads(self.account, self.overlapping_uploads())
+
+            self.assertEqual(
+                [(r.status, r.transactions, r.duplicates) for r in reports],
+                [
+                    (OFXFileStatus.IMPORTED, 30, 0),
+                    (OFXFileStatus.IMPORTED, 10, 30),
+                ],
+            )
+            self.assertEqual(self.imported().count(), 40)
+            self.assertEqual(self.account.statements.count(), 2)
+            self.assertEqual(
+                self.account.balance_at(datetime.date(2026, 4, 15)),
+                balance + self.imported().aggregate(total=Sum("amount"))["total"],
+            )
+
+    def test_bad_files_are_reported_and_the_rest_imported(self):
+        uploads = [
+            SimpleUploadedFile("lixo.ofx", b"not an ofx"),
+            SimpleUploadedFile("quebrado.zip", b"not a zip"),
+            SimpleUploadedFile("marco.ofx", synthetic_ofx(5)),
+            SimpleUploadedFile("marco-de-novo.ofx", synthetic_ofx(5)),
+        ]
+
+        with tenant_context(self.user.organization):
+            reports = import_ofx_uploads(self.account, uploads)
+
+            self.assertEqual(
+                [r.status for r in reports],
+                [
+                    OFXFileStatus.FAILED,
+                    OFXFileStatus.FAILED,
+                    OFXFileStatus.IMPORTED,
+                    OFXFileStatus.SKIPPED,
+                ],
+            )
+            self.assertEqual(self.imported().count(), 5)
+
+    def test_zip_over_the_limits_is_rejected_before_decompressing(self):
+        upload = self.zipped(
+            "muitos.zip", {f"{i}.ofx": synthetic_ofx(1) for i in range(3)}
+        )
+
+        with (
+            tenant_context(self.user.organization),
+            mock.patch("bank.services.ofx_batch.OFX_ZIP_MAX_ENTRIES", 2),
+            mock.patch.object(zipfile.ZipFile, "read") as read,
+        ):
+            reports = import_ofx_uploads(self.account, [upload])
+
+        read.assert_not_called()
+        self.assertEqual(
+            [(r.filename, r.status) for r in reports],
+            [("muitos.zip", OFXFileStatus.FAILED)],
+        )
+
+    def test_corrupted_zip_entry_is_reported_per_file(self):
+        content = synthetic_ofx(5)
+        upload = self.zipped("extratos.zip", {"marco.ofx": content})
+        # Stored uncompressed: flipping a byte of the data breaks its CRC.
+        data = upload.read()
+        offset = data.index(content) + len(content) // 2
+        corrupted = data[:offset] + bytes([data[offset] ^ 0xFF]) + data[offset + 1 :]
+
+        with tenant_context(self.user.organization):
+            reports = import_ofx_uploads(
+                self.account, [SimpleUploadedFile("extratos.zip", corrupted)]
+            )
+
+            self.assertEqual(
+                [(r.filename, r.status) for r in reports],
+                [("extratos.zip/marco.ofx", OFXFileStatus.FAILED)],
+            )
+            self.assertFalse(self.imported().exists())
+
+    def test_parses_in_worker_processes(self):
+        with tenant_context(self.user.organization):
+            reports = import_ofx_uploads(
+                self.account, self.overlapping_uploads(), max_workers=2
+            )
+
+            self.assertEqual([r.transactions for r in reports], [30, 10])
+            self.assertEqual(self.imported().count(), 40)
+
+    def test_view_renders_one_report_per_file(self):
+        response = self.client.post(
+            reverse("bank:bank-statements-bulk-update", args=[self.account.id]),
+            {"ofx_files": self.overlapping_uploads()},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "extratos.zip/abril.ofx")
+        self.assertContains(response, "Importado", count=2)
+        with tenant_context(self.user.organization):
+            self.assertEqual(self.imported().count(), 40)
+
+    def test_command_imports_files_from_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "marco.ofx"
+            path.write_bytes(synthetic_ofx(5))
+            stdout = StringIO()
+            call_command(
+                "import_ofx_statements", str(self.account.id), str(path), stdout=stdout
+            )
+
+        self.assertIn("marco.ofx", stdout.getvalue())
+        with tenant_context(self.user.organization):
+            self.assertEqual(self.imported().count(), 5)
+
+
+class OFXExportTests(SeededAccountMixin, TestCase):
+    start_date = datetime.date(2026, 1, 1)
+    end_date = datetime.date(2026, 12, 31)
+
+    def frozen_now(self):
+        class FrozenDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2026, 5, 1, 12, 0, 0)
+
+        frozen = SimpleNamespace(
+            date=datetime.date, datetime=FrozenDatetime, time=datetime.time
+        )
+        return (
+            mock.patch(f"{__name__}.datetime", frozen),
+            mock.patch("bank.services.ofx_exporter.datetime", frozen),
+        )
+
+    def transactions(self):
+        return self.account.transactions.filter(
+            date__range=[self.start_date, self.end_date]
+        ).order_by("date")
+
+    def add_transactions(self, count):
+        bulk_create_transactions(
+            Transaction(
+                organization=self.account.organization,
+                bank_account=self.account,
+                name=f"Lançamento {i}",
+                amount=Decimal(i % 500 + 1) * (1 if i % 2 else -1),
+                date=self.start_date + datetime.timedelta(days=i % 365),
+            )
+            for i in range(count)
+        )
+
+    def test_stream_matches_the_previous_exporter(self):
+        with tenant_context(self.user.organization):
+            self.add_transactions(3000)
+        patch_tests, patch_exporter = self.frozen_now()
+
+        with tenant_context(self.user.organization), patch_tests, patch_exporter:
+            expected = LegacyOFXStatementExporter.handle(
+                self.account, self.transactions(), self.start_date, self.end_date
+            )
+            chunks = list(
+                OFXStatementExporter.stream(
+                    self.account, self.transactions(), self.start_date, self.end_date
+                )
+            )
+
+        self.assertEqual("".join(chunks).encode(), expected.encode())
+        self.assertGreater(len(chunks), 1)
+        self.assertLess(max(map(len, chunks)), EXPORT_BUFFER_SIZE + 4096)
+
+    def test_view_streams_the_file(self):
+        _, patch_exporter = self.frozen_now()
+        with patch_exporter:
+            response = self.client.get(
+                reverse("bank:bank-accounts-ofx-statement", args=[self.account.id]),
+                {"start_date": "2026-01-01", "end_date": "2026-12-31"},
+            )
+            content = b"".join(response.streaming_content)
+
+        self.assertTrue(response.streaming)
+        self.assertIn(b"<DTSERVER>20260501120000</DTSERVER>", content)
+        with tenant_context(self.user.organization):
+            self.assertEqual(content.count(b"<STMTTRN>"), self.transactions().count())
+
+
+class MatchingEngineTests(SimpleTestCase):
+    def expense(self, value, name=None, document=None, day=10):
+        favored = SimpleNamespace(name=name, document=document) if name else None
+        return SimpleNamespace(
+            value=Decimal(value),
+            liquidation=datetime.date(2026, 3, day),
+            due_date=None,
+            favored=favored,
+        )
+
+    def line(self, amount, memo, day=10):
+        return Transaction(
+            amount=Decimal(amount), memo=memo, date=datetime.date(2026, 3, day)
+        )
+
+    def match(self, expenses, transactions):
+        return [
+            match.transaction
+            for match in match_entries(map(expense_entry, expenses), transactions)
+        ]
+
+    def test_a_lone_candidate_matches_on_amount(self):
+        line = self.line("-150.00", "TED ENVIADA")
+
+        self.assertEqual(
+            self.match([self.expense("150", "Fulano"), self.expense("99")], [line]),
+            [line, None],
+        )
+
+    def test_names_and_documents_pick_among_equal_amounts(self):
+        jose = self.line("-80.00", "PIX ENVIADO JOSE ANTONIO")
+        maria = self.line("-80.00", "PIX ENVIADO MARIA SOUZA")
+        cnpj = self.line("-80.00", "PAG BOLETO 12.345.678/0001-90", day=25)
+
+        matched = self.match(
+            [
+                self.expense("80", "Maria Conceição Souza"),
+                self.expense("80", "José Antônio"),
+                self.expense("80", "Clínica Ltda", "12345678000190"),
+            ],
+            [jose, maria, cnpj],
+        )
+
+        self.assertEqual(matched, [maria, jose, cnpj])
+
+    def test_ambiguous_candidates_are_left_to_the_user(self):
+        first = self.line("-80.00", "PIX ENVIADO JOSE")
+        second = self.line("-80.00", "PIX ENVIADO JOSE")
+
+        self.assertEqual(
+            self.match(
+                [self.expense("80", "Maria"), self.expense("80", "José")],
+                [first, second],
+            ),
+            [None, None],
+        )
+
+
+class ReconciliationViewTests(SeededAccountMixin, TestCase):
+    def test_batch_reconcile_suggests_matching_transactions(self):
+        with tenant_context(self.user.organization):
+            accountability = Accountability.objects.get(
+                contract=self.contract, month=4, year=2026
+            )
+
+        response = self.client.get(
+            reverse("accountability:batch-reconcile", args=[accountability.id])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        matched = [m for m in response.context["matches"] if m["matched"]]
+        self.assertTrue(matched)
+        for match in matched:
+            self.assertEqual(-match["transaction"].amount, match["expense"].value)
@@ -4,6 +4,7 @@ from bank.views import (
     BankAccountDetailView,
     bank_statement_ofx_export_view,
     bank_statement_view,
+    bulk_update_bank_account_ofx_view,
     preparse_ofx_file_view,
     update_bank_account_manual_view,
     update_bank_account_ofx_view,
@@ -30,6 +31,11 @@ urlpatterns = [
         update_bank_account_ofx_view,
         name="bank-statements-update",
     ),
+    path(
+        "detail/<uuid:pk>/bulk-update-statements/",
+        bulk_update_bank_account_ofx_view,
+        name="bank-statements-bulk-update",
+    ),
     path(
         "detail/<uuid:pk>/preparse-ofx/",
         preparse_ofx_file_view,
@@ -6,24 +6,29 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
 from django.db import transaction as django_transaction
-from django.db.models import Prefetch, Sum
 from django.db.models.query import QuerySet
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.timezone import now as tz_now
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import DetailView
+from easy_tenants import tenant_context
+from easy_tenants.utils import get_state
 
 from activity.models import ActivityLog
 from bank.forms import (
     BankAccountForm,
+    BulkOFXImportForm,
     TransactionFormSet,
     UpdateBankStatementForm,
     UpdateOFXForm,
 )
-from bank.models import BankAccount, BankStatement, Transaction
+from bank.models import BankAccount, BankStatement
+from bank.services.ofx_batch import OFXFileStatus, import_ofx_uploads
 from bank.services.ofx_exporter import OFXStatementExporter
 from bank.services.ofx_parser import OFXFileParser
+from bank.services.ofx_staging import pop_parsed_statement, stage_statement
+from bank.services.statement import statement_page
 from contracts.models import Contract
 
 logger = logging.getLogger(__name__)
@@ -38,25 +43,12 @@ class BankAccountDetailView(LoginRequiredMixin, DetailView):
         return (
             super()
             .get_queryset()
-            .select_related(
-                "contract",
-            )
-            .prefetch_related(
-                Prefetch(
-                    "statements",
-                    queryset=BankStatement.objects.order_by(
-                        "-reference_year", "-reference_month", "-reference_day"
-                    ),
-                ),
-                Prefetch(
-                    "transactions",
-                    queryset=Transaction.objects.order_by("-date"),
-                ),
-            )
+            .with_overview()
+            .select_related("checking_account", "investing_contract")
         )
 
     def get_object(self, queryset=None):
-        return self.model.objects.get(id=self.kwargs["pk"])
+        return get_object_or_404(self.get_queryset(), id=self.kwargs["pk"])
 
     def get_context_data(self, **kwargs) -> dict:
         context = super().get_context_data(**kwargs)
@@ -76,6 +68,9 @@ def preparse_ofx_file_view(request, pk):
     try:
         parser = OFXFileParser(ofx_file=request.FILES["ofx_file"])
         period_info = parser.statement_period_info
+        stage_statement(
+            bank_account, request.FILES["ofx_file"], parser.parsed_statement()
+        )
 
         existing_statement = BankStatement.objects.filter(
             bank_account=bank_account,
@@ -124,9 +119,9 @@ def update_bank_account_ofx_view(request, pk):
         form = UpdateOFXForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                OFXFileParser(ofx_file=request.FILES["ofx_file"]).import_statement(
-                    bank_account=bank_account
-                )
+                pop_parsed_statement(
+                    bank_account, request.FILES["ofx_file"]
+                ).import_statement(bank_account=bank_account)
 
                 logger.info(f"{request.user.id} - Updated bank account")
                 _ = ActivityLog.objects.create(
@@ -157,6 +152,36 @@ def update_bank_account_ofx_view(request, pk):
         )
 
 
+@login_required
+def bulk_update_bank_account_ofx_view(request, pk):
+    bank_account = get_object_or_404(BankAccount, id=pk)
+    reports = None
+    if request.method == "POST":
+        form = BulkOFXImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Parsed in this process: a pool would re-run Django's setup per
+            # child inside the request. `import_ofx_statements` uses one.
+            reports = import_ofx_uploads(bank_account, form.cleaned_data["ofx_files"])
+            if any(report.status == OFXFileStatus.IMPORTED for report in reports):
+                logger.info(f"{request.user.id} - Bulk updated bank account")
+                _ = ActivityLog.objects.create(
+                    user=request.user,
+                    user_email=request.user.email,
+                    action=ActivityLog.ActivityLogChoices.UPLOADED_BALANCE_FILE,
+                    target_object_id=bank_account.id,
+                    target_content_object=bank_account,
+                )
+            form = BulkOFXImportForm()
+    else:
+        form = BulkOFXImportForm()
+
+    return render(
+        request,
+        "bank-account/ofx-bulk-update.html",
+        {"form": form, "object": bank_account, "reports": reports},
+    )
+
+
 @login_required
 def create_bank_account_view(request, pk):
     contract = get_object_or_404(Contract, id=pk)
@@ -306,77 +331,18 @@ def bank_statement_view(request, pk):
     start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
     end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
 
-    all_transactions = (
-        account.transactions.filter(date__gte=start_date)
-        .prefetch_related(
-            "expenses",
-            "revenues",
-        )
-        .order_by("-date")
+    page_obj, statement_days = statement_page(
+        account,
+        start_date,
+        end_date,
+        status=status_filter,
+        page_number=request.GET.get("page"),
     )
 
-    daily_totals = (
-        all_transactions.values("date")
-        .annotate(total_day=Sum("amount"))
-        .order_by("-date")
-    )
-    daily_totals_dict = {item["date"]: item["total_day"] for item in daily_totals}
-
-    statement_days = []
-    current_balance = account.current_balance
-    sorted_dates_desc = sorted(daily_totals_dict.keys(), reverse=True)
-    for day in sorted_dates_desc:
-        total_day = daily_totals_dict[day]
-        close_balance = current_balance
-        open_balance = close_balance - total_day
-
-        transactions_day = [t for t in all_transactions if t.date == day]
-        statement_days.append(
-            {
-                "date": day,
-                "open_balance": open_balance,
-                "close_balance": close_balance,
-                "all_transactions": transactions_day,
-            }
-        )
-        current_balance = open_balance
-    statement_days.reverse()
-
-    display_statement_days = []
-    for day_info in statement_days:
-        if not (start_date <= day_info["date"] <= end_date):
-            continue
-
-        displayed_transactions = []
-        for t in day_info["all_transactions"]:
-            trans_status = (
-                "Conciliada"
-                if (t.expenses.exists() or t.revenues.exists())
-                else "Pendente"
-            )
-            if (
-                status_filter == "all"
-                or (
-                    status_filter == "reconciled"
-                    and (t.expenses.exists() or t.revenues.exists())
-                )
-                or (
-                    status_filter == "pending"
-                    and not (t.expenses.exists() or t.revenues.exists())
-                )
-            ):
-                displayed_transactions.append(
-                    {
-                        "obj": t,
-                        "status": trans_status,
-                    }
-                )
-        day_info["transactions"] = displayed_transactions
-        display_statement_days.append(day_info)
-
     context = {
         "account": account,
-        "statement_days": display_statement_days,
+        "statement_days": statement_days,
+        "page_obj": page_obj,
         "start_date": start_date_str,
         "end_date": end_date_str,
         "status": status_filter,
@@ -384,6 +350,13 @@ def bank_statement_view(request, pk):
     return render(request, "bank-account/statement.html", context)
 
 
+def _in_tenant_context(chunks, state):
+    # A streamed body is read after `TenantMiddleware` has left the request's
+    # tenant context, and tenant querysets resolve the tenant when they run.
+    with tenant_context(state["tenant"], enabled=state["enabled"]):
+        yield from chunks
+
+
 def bank_statement_ofx_export_view(request, pk):
     start_date_str = request.GET.get("start_date")
     end_date_str = request.GET.get("end_date")
@@ -399,17 +372,22 @@ def bank_statement_ofx_export_view(request, pk):
         end_date = tz_now().date()
 
     account = get_object_or_404(BankAccount, id=pk)
-    transactions = account.transactions.filter(
-        date__range=[start_date, end_date]
-    ).order_by("date")
+    transactions = (
+        account.transactions.filter(date__range=[start_date, end_date])
+        .order_by("date")
+        .only("date", "amount", "name")
+    )
 
-    ofx_content = OFXStatementExporter.handle(
+    ofx_content = OFXStatementExporter.stream(
         account=account,
         transactions=transactions,
         start_date=start_date,
         end_date=end_date,
     )
-    response = HttpResponse(ofx_content, content_type="application/x-ofx")
+    response = StreamingHttpResponse(
+        _in_tenant_context(ofx_content, get_state()),
+        content_type="application/x-ofx",
+    )
     filename = f"extrato_{account.account}.ofx"
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     response.set_cookie("fileDownload", "true", max_age=60)
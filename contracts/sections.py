@@ -83,6 +83,22 @@ def _interesteds_context(contract) -> dict:
     }
 
 
+def _accounts_context(contract) -> dict:
+    from bank.models import BankAccount
+
+    accounts = BankAccount.objects.with_overview().in_bulk(
+        [
+            pk
+            for pk in (contract.checking_account_id, contract.investing_account_id)
+            if pk is not None
+        ]
+    )
+    return {
+        "checking_account": accounts.get(contract.checking_account_id),
+        "investing_account": accounts.get(contract.investing_account_id),
+    }
+
+
 def _documents_context(contract) -> dict:
     return {
         "addendums": _recent(contract.addendums, "-created_at"),
@@ -217,7 +233,7 @@ SECTIONS: tuple[Section, ...] = (
         group=GROUP_CONTRACT,
         template="contracts/tabs/banks-tab.html",
         icon=ICON_BANK,
-        select_related=("checking_account", "investing_account"),
+        context=_accounts_context,
     ),
     Section(
         slug="addendums",
@@ -333,6 +333,24 @@ AUDESP_DEV_CREDENTIALS = {
 # Placeholder TTL until a real login response lets us read the JWT's own exp claim.
 AUDESP_TOKEN_TTL_SECONDS = env.int("AUDESP_TOKEN_TTL_SECONDS", default=600)
 
+# Run report, batch export and spreadsheet import jobs inside the request
+# that queues them, instead of leaving them for `run_report_jobs` and
+# `run_import_jobs`. On by default outside development: production deploys
+# no worker (see docs/DEPLOY.md), and a queued job would stay PENDING forever.
+BACKGROUND_JOBS_INLINE = env.bool("BACKGROUND_JOBS_INLINE", default=not DEVELOPMENT)
+
+# Processes used by the city-hall batch export (reports/batch.py). Each one
+# holds a DB connection and a full PDF in memory while rendering.
+REPORT_BATCH_MAX_WORKERS = env.int("REPORT_BATCH_MAX_WORKERS", default=2)
+
+# Processes parsing the files of the import_ofx_statements command
+# (bank/services/ofx_batch.py); the web upload parses in the request process.
+OFX_IMPORT_MAX_WORKERS = env.int("OFX_IMPORT_MAX_WORKERS", default=2)
+
+# Seconds a preparsed OFX upload waits in the cache for its import
+# (bank/services/ofx_staging.py).
+OFX_STAGING_TIMEOUT = env.int("OFX_STAGING_TIMEOUT", default=15 * 60)
+
 # Easy tenants configuration
 EASY_TENANTS_TENANT_MODEL = "accounts.Organization"
 EASY_TENANTS_TENANT_FIELD = "organization"
@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# Parse the report fonts before the first request instead of during it.
+from reports.exporters.commons.fonts import warm_fonts  # noqa: E402
+
+warm_fonts()
@@ -7,6 +7,7 @@ from django.views.generic import TemplateView
 from accountability.models import Accountability, Expense, Revenue
 from contracts.models import Contract, ContractMonthTransfer
 from utils.mixins import UserAccessViewMixin
+from utils.series import period_totals
 
 
 class DashboardView(UserAccessViewMixin, LoginRequiredMixin, TemplateView):
@@ -118,79 +119,49 @@ class DashboardView(UserAccessViewMixin, LoginRequiredMixin, TemplateView):
             .order_by("-year", "-month")[:10]
         )
 
-        months = []
-        monthly_data = []
-        revenue_data = []
-        expenses_data = []
-        transfer_data = []
-
         match period:
             case "last_year":
                 num_months = 12
-                start_date = (today - relativedelta(months=11)).replace(day=1)
             case "last_6_months":
                 num_months = 6
-                start_date = (today - relativedelta(months=5)).replace(day=1)
             case "last_3_months":
                 num_months = 3
-                start_date = (today - relativedelta(months=2)).replace(day=1)
-            case "current_month":
-                num_months = 1
-                start_date = today.replace(day=1)
             case _:
                 num_months = 1
-                start_date = today.replace(day=1)
+        start_date = (today - relativedelta(months=num_months - 1)).replace(day=1)
+        end_date = start_date + relativedelta(months=num_months - 1)
 
-        current_date = start_date
-        for _ in range(num_months):
-            month_name = current_date.strftime("%B")
-            months.append(month_name)
-
-            monthly_count = accountabilities.filter(
-                year=current_date.year,
-                month=current_date.month,
-            ).count()
-            monthly_data.append(monthly_count)
-
-            month_revenues = (
-                revenues.filter(
-                    accountability__year=current_date.year,
-                    accountability__month=current_date.month,
-                ).aggregate(total=Sum("value"))["total"]
-                or 0
-            )
-            revenue_data.append(float(month_revenues))
-
-            month_expenses = (
-                expenses.filter(
-                    accountability__year=current_date.year,
-                    accountability__month=current_date.month,
-                ).aggregate(total=Sum("value"))["total"]
-                or 0
+        if contract_list:
+            transfers = ContractMonthTransfer.objects.filter(
+                contract__id__in=contract_list
             )
-            expenses_data.append(float(month_expenses))
-
-            if contract_list:
-                month_transfer = (
-                    ContractMonthTransfer.objects.filter(
-                        contract__id__in=contract_list,
-                        year=current_date.year,
-                        month=current_date.month,
-                    ).aggregate(total=Sum("value"))["total"]
-                    or 0
-                )
-            else:
-                month_transfer = (
-                    ContractMonthTransfer.objects.filter(
-                        contract__in=contracts,
-                        year=current_date.year,
-                        month=current_date.month,
-                    ).aggregate(total=Sum("value"))["total"]
-                    or 0
-                )
-
-            transfer_data.append(float(month_transfer))
-            current_date = current_date + relativedelta(months=1)
+        else:
+            transfers = ContractMonthTransfer.objects.filter(contract__in=contracts)
+
+        monthly_counts = period_totals(
+            accountabilities, start_date, end_date, aggregate=Count("id"), default=0
+        )
+        monthly_revenues = period_totals(
+            revenues,
+            start_date,
+            end_date,
+            year_field="accountability__year",
+            month_field="accountability__month",
+        )
+        monthly_expenses = period_totals(
+            expenses,
+            start_date,
+            end_date,
+            year_field="accountability__year",
+            month_field="accountability__month",
+        )
+        monthly_transfers = period_totals(transfers, start_date, end_date)
+
+        months = [month.strftime("%B") for month in monthly_counts]
+        monthly_data = list(monthly_counts.values())
+        revenue_data = [float(value) for value in monthly_revenues.values()]
+        expenses_data = [float(value) for value in monthly_expenses.values()]
+        transfer_data = [float(value) for value in monthly_transfers.values()]
 
         context["monthly_labels"] = months
         context["monthly_data"] = monthly_data
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from reports.models import ReportJob
+from utils.admin import BaseModelAdmin
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(BaseModelAdmin):
+    list_display = (
+        "organization",
+        "contract",
+        "report_model",
+        "start_date",
+        "end_date",
+        "status",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("organization", "report_model", "status")
+    search_fields = ("id", "contract__name", "filename")
+    readonly_fields = ("responsibles", "error", "started_at", "finished_at")
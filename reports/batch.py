@@ -0,0 +1,157 @@
+"""One report model for many contracts at once, bundled into a ZIP.
+
+Each contract is rendered in its own process: fpdf is pure Python and holds
+the GIL, so threads would render one PDF at a time. Workers are *spawned*,
+not forked — the web process runs gunicorn threads, and forking a threaded
+process that holds open DB sockets is how connections get shared and
+corrupted. A spawned worker sets Django up from scratch and opens its own
+connection.
+
+This module is imported by the workers before `django.setup()` runs, so it
+must not import models at module level; the worker functions import them
+lazily.
+"""
+
+import logging
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+ERRORS_FILENAME = "ERROS.txt"
+
+
+@dataclass
+class BatchExportResult:
+    exported: list[str] = field(default_factory=list)
+    # Contract label -> reason, one entry per contract that did not render.
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _ContractTask:
+    contract_id: str
+    organization_id: str
+    label: str
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+    from reports.exporters.commons.fonts import warm_fonts
+
+    warm_fonts()
+
+
+def _render_contract(
+    task: _ContractTask,
+    report_model: str,
+    start_date: datetime,
+    end_date: datetime,
+) -> tuple[str, str]:
+    """Render one contract and return ``(zip entry name, storage name)``.
+
+    Goes through `render_report`, so a PDF already in the cache costs no
+    render, and only the storage name crosses the process boundary — not
+    megabytes of pickled PDF.
+    """
+    from easy_tenants import tenant_context
+
+    from accounts.models import Organization
+    from contracts.models import Contract
+    from reports.services import build_report_filename, render_report
+
+    organization = Organization.objects.get(pk=task.organization_id)
+    with tenant_context(organization):
+        contract = Contract.objects.get(pk=task.contract_id)
+        name = render_report(
+            contract=contract,
+            start_date=start_date,
+            end_date=end_date,
+            report_model=report_model,
+            responsibles=[],
+        )
+        return build_report_filename(report_model, contract), name
+
+
+def export_batch(
+    contracts,
+    report_model: str,
+    start_date: datetime,
+    end_date: datetime,
+    output,
+    max_workers: int = 1,
+) -> BatchExportResult:
+    """Write one PDF per contract into a ZIP on `output`.
+
+    A contract that fails is logged, listed in ``ERROS.txt`` inside the ZIP
+    and in the returned result; the others are still exported.
+    ``max_workers <= 1`` renders in the calling process, without a pool.
+    """
+    tasks = [
+        _ContractTask(
+            contract_id=str(contract.pk),
+            organization_id=str(contract.organization_id),
+            label=contract.name_with_code,
+        )
+        for contract in contracts
+    ]
+    result = BatchExportResult()
+
+    # PDF streams are already deflated; compressing them again buys nothing.
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+
+        def collect(task, render):
+            try:
+                entry, name = render()
+            except Exception as exc:
+                logger.exception("Batch export failed for contract %s", task.label)
+                result.failed[task.label] = f"{type(exc).__name__}: {exc}"
+                return
+            with default_storage.open(name, "rb") as pdf:
+                with archive.open(entry, "w") as target:
+                    for chunk in pdf.chunks():
+                        target.write(chunk)
+            result.exported.append(entry)
+
+        if max_workers <= 1:
+            for task in tasks:
+                collect(
+                    task,
+                    lambda task=task: _render_contract(
+                        task, report_model, start_date, end_date
+                    ),
+                )
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        _render_contract, task, report_model, start_date, end_date
+                    ): task
+                    for task in tasks
+                }
+                # Written as each contract finishes, not in submission order,
+                # so one slow contract does not hold the finished ones in memory.
+                for future in as_completed(futures):
+                    collect(futures[future], future.result)
+
+        if result.failed:
+            archive.writestr(
+                ERRORS_FILENAME,
+                "\n".join(
+                    f"{label}: {reason}" for label, reason in result.failed.items()
+                ),
+            )
+
+    return result
@@ -0,0 +1,135 @@
+"""Content-addressed storage for rendered report PDFs.
+
+A PDF is stored under the SHA-256 of everything that decides its bytes: the
+report model, contract, period, responsibles, the day it is rendered on and a
+stamp of the data it prints. Nothing is ever invalidated explicitly — when a
+revenue, expense, transaction, statement, item, addendum, favored or company
+changes, the stamp changes, the key changes and the next request renders a
+fresh file.
+Closed months audited over and over keep hitting the same key for the day.
+
+The termos print the day they are signed and every page footer the day it was
+rendered, so the day is part of the key: a PDF is never served on a later day
+with an older date. RP-01 lists every contract of the city hall, so its stamp
+covers those contracts and their accounts instead of only this contract.
+
+Entries are never deleted here either: a lifecycle rule on the media bucket
+removes them after two days (docs/DEPLOY.md, "Cache expiry"), by which time
+the day in their key has passed.
+
+The stamp reads `updated_at`, so writes that skip `save()` (`QuerySet.update`,
+M2M `add`/`remove`) must set `updated_at` themselves to be seen. Row counts
+are part of the stamp so hard deletes are caught too.
+"""
+
+import hashlib
+import json
+from datetime import date
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max, Q
+
+from accountability.models import Accountability, Expense, Favored, Revenue
+from accounts.models import Area, CityHall
+from bank.models import BankAccount, BankStatement, Transaction
+from contracts.models import Company, Contract, ContractAddendum, ContractItem
+
+# Bump when an exporter's layout changes so PDFs rendered by the old code
+# stop being served.
+REPORT_CACHE_VERSION = 5
+
+REPORT_CACHE_PREFIX = "reports/cache"
+
+
+def data_version(contract: Contract, report_model: str | None = None) -> list:
+    """Latest change and row count of each table the exporters read.
+
+    `all_objects` so a soft delete — which only touches `deleted_at` and
+    `updated_at` — still moves the stamp.
+    """
+    accounts = [
+        account.pk
+        for account in (contract.checking_account, contract.investing_account)
+        if account
+    ]
+    city_halls = {contract.organization.city_hall_id, contract.area.city_hall_id}
+    querysets = [
+        Accountability.all_objects.filter(contract=contract),
+        Revenue.all_objects.filter(
+            Q(accountability__contract=contract) | Q(bank_account__in=accounts)
+        ),
+        Expense.all_objects.filter(
+            Q(accountability__contract=contract) | Q(item__contract=contract)
+        ),
+        Transaction.all_objects.filter(bank_account__in=accounts),
+        BankStatement.all_objects.filter(bank_account__in=accounts),
+        ContractItem.all_objects.filter(contract=contract),
+        ContractAddendum.all_objects.filter(contract=contract),
+        Favored.all_objects.filter(organization=contract.organization_id),
+        Company.all_objects.filter(
+            pk__in=[contract.contractor_company_id, contract.hired_company_id]
+        ),
+        Area.all_objects.filter(pk=contract.area_id),
+        CityHall.all_objects.filter(pk__in=city_halls),
+    ]
+    if report_model == "rp_1":
+        contracts = Contract.all_objects.filter(
+            area__city_hall=contract.area.city_hall_id
+        )
+        querysets += [
+            contracts,
+            BankAccount.all_objects.filter(pk__in=contracts.values("checking_account")),
+        ]
+
+    stamp = [contract.updated_at.isoformat()]
+    for queryset in querysets:
+        totals = queryset.aggregate(last=Max("updated_at"), count=Count("id"))
+        stamp.append(
+            [totals["last"].isoformat() if totals["last"] else None, totals["count"]]
+        )
+    return stamp
+
+
+def report_cache_key(
+    contract: Contract,
+    start_date,
+    end_date,
+    report_model: str,
+    responsibles: list,
+) -> str:
+    payload = {
+        "version": REPORT_CACHE_VERSION,
+        "report_model": report_model,
+        "contract": str(contract.pk),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "rendered_on": date.today().isoformat(),
+        # Order is kept: it is the order the signatures are printed in.
+        "responsibles": [
+            [str(responsible["user"].pk), str(responsible["interest_label"])]
+            for responsible in responsibles
+        ],
+        "data": data_version(contract, report_model),
+    }
+    encoded = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def report_cache_name(key: str) -> str:
+    return f"{REPORT_CACHE_PREFIX}/{key[:2]}/{key}.pdf"
+
+
+def get_cached_report(key: str) -> str | None:
+    """Storage name of the PDF stored under `key`, or None on a miss."""
+    name = report_cache_name(key)
+    return name if default_storage.exists(name) else None
+
+
+def store_report(key: str, content: File) -> str:
+    name = report_cache_name(key)
+    # Two workers may render the same miss concurrently; the bytes are the
+    # same, so whoever lands second keeps the first copy.
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, content)
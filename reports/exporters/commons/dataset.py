@@ -0,0 +1,212 @@
+from decimal import Decimal
+from functools import cached_property
+
+from django.db.models import Q, Sum
+
+from accountability.models import Expense, Revenue
+from bank.models import BankStatement, Transaction
+from bank.services.reconciliation import ReconciliationDiff, reconciliation_diff
+from contracts.choices import NatureCategories
+
+ZERO = Decimal("0.00")
+
+TOTAL = "TOTAL"
+PLANNED = "PLANNED"
+UNPLANNED = "UNPLANNED"
+
+# Mesmas chaves usadas por `__categorize_expenses` nos demonstrativos RP.
+EXPENSE_CATEGORIES = (
+    "HUMAN_RESOURCES",
+    "OTHER_HUMAN_RESOURCES",
+    "PERMANENT_GOODS",
+    "OTHER_THIRD_PARTY",
+    "PUBLIC_UTILITIES",
+    "FUEL",
+    "FINANCIAL_AND_BANKING",
+    "FOODSTUFFS",
+    "REAL_STATE",
+    "MISCELLANEOUS",
+    "MEDICAL_AND_HOSPITAL",
+    "MEDICAL_SERVICES",
+    "MEDICINES",
+    "WORKS",
+    "OTHER_EXPENSES",
+    "OTHER_CONSUMABLES",
+)
+
+
+class ReportDataset:
+    """Dados do contrato no período, compartilhados pelos exportadores PDF.
+
+    Os demonstrativos faziam um ``aggregate(Sum("value"))`` por natureza de
+    receita e outro por categoria de despesa — mais de 20 idas ao banco sobre
+    os mesmos querysets. Aqui cada família de totais sai de uma única
+    agregação condicional (``Sum(..., filter=Q(...))``), avaliada na primeira
+    leitura e guardada na instância.
+    """
+
+    def __init__(self, contract, start_date, end_date):
+        self.contract = contract
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @cached_property
+    def checking_account(self):
+        return self.contract.checking_account
+
+    @cached_property
+    def investing_account(self):
+        return self.contract.investing_account
+
+    @cached_property
+    def accounts_filter(self) -> Q:
+        return Q(bank_account=self.checking_account) | Q(
+            bank_account=self.investing_account
+        )
+
+    @cached_property
+    def account_revenue_queryset(self):
+        """Todas as receitas das contas do contrato, sem recorte de período."""
+        return Revenue.objects.filter(self.accounts_filter).exclude(
+            bank_account__isnull=True
+        )
+
+    @cached_property
+    def revenue_queryset(self):
+        return self.account_revenue_queryset.filter(
+            receive_date__gte=self.start_date,
+            receive_date__lte=self.end_date,
+        )
+
+    @cached_property
+    def expense_queryset(self):
+        return Expense.objects.filter(
+            accountability__contract=self.contract,
+            liquidation__gte=self.start_date,
+            liquidation__lte=self.end_date,
+        )
+
+    @cached_property
+    def statement_queryset(self):
+        return (
+            BankStatement.objects.filter(self.accounts_filter)
+            .filter(
+                Q(
+                    reference_month__gte=self.start_date.month,
+                    reference_year__gte=self.start_date.year,
+                )
+                | Q(
+                    reference_month__lt=self.start_date.month,
+                    reference_year__gt=self.start_date.year,
+                )
+            )
+            .order_by("reference_year", "reference_month")
+            .exclude(bank_account__isnull=True)
+        )
+
+    @cached_property
+    def transaction_queryset(self):
+        return (
+            Transaction.objects.filter(self.accounts_filter)
+            .filter(date__gte=self.start_date, date__lte=self.end_date)
+            .exclude(bank_account__isnull=True)
+        )
+
+    @cached_property
+    def revenue_totals(self) -> dict[str, Decimal]:
+        """Total do período por `Revenue.Nature`, mais a chave ``TOTAL``."""
+        aggregates = {
+            nature.value: Sum("value", filter=Q(revenue_nature=nature))
+            for nature in Revenue.Nature
+        }
+        aggregates[TOTAL] = Sum("value")
+        return _zero_filled(self.revenue_queryset.aggregate(**aggregates))
+
+    @cached_property
+    def expense_totals(self) -> dict[str, Decimal]:
+        """Total do período por categoria de `NatureCategories`.
+
+        Traz também ``TOTAL``, ``PLANNED`` e ``UNPLANNED``.
+        """
+        aggregates = {
+            category: Sum(
+                "value", filter=Q(nature__in=getattr(NatureCategories, category))
+            )
+            for category in EXPENSE_CATEGORIES
+        }
+        aggregates[TOTAL] = Sum("value")
+        aggregates[PLANNED] = Sum("value", filter=Q(planned=True))
+        aggregates[UNPLANNED] = Sum("value", filter=Q(planned=False))
+        return _zero_filled(self.expense_queryset.aggregate(**aggregates))
+
+    @cached_property
+    def statement_balances(self) -> dict[str, Decimal]:
+        """Saldo de abertura do mês inicial e de fechamento do mês final."""
+        start_month = Q(
+            reference_month=self.start_date.month,
+            reference_year=self.start_date.year,
+        )
+        end_month = Q(
+            reference_month=self.end_date.month,
+            reference_year=self.end_date.year,
+        )
+        return _zero_filled(
+            self.statement_queryset.aggregate(
+                opening=Sum("opening_balance", filter=start_month),
+                closing_checking=Sum(
+                    "closing_balance",
+                    filter=end_month & Q(bank_account=self.checking_account),
+                ),
+                closing_investing=Sum(
+                    "closing_balance",
+                    filter=end_month & Q(bank_account=self.investing_account),
+                ),
+            )
+        )
+
+    @cached_property
+    def transaction_totals(self) -> dict[str, Decimal]:
+        """Entradas (``income``) e saídas (``outgoing``) das contas no período."""
+        return _zero_filled(
+            self.transaction_queryset.aggregate(
+                income=Sum("amount", filter=Q(amount__gt=ZERO)),
+                outgoing=Sum("amount", filter=Q(amount__lt=ZERO)),
+            )
+        )
+
+    @cached_property
+    def reconciliation(self) -> ReconciliationDiff:
+        """Lançamentos do extrato e do sistema que não se conciliam no período."""
+        return reconciliation_diff(
+            self.transaction_queryset,
+            self.expense_queryset,
+            self.revenue_queryset,
+            self.start_date,
+            self.end_date,
+        )
+
+    @cached_property
+    def latest_pass_on_info(self):
+        return (
+            self.revenue_queryset.filter(revenue_nature=Revenue.Nature.PUBLIC_TRANSFER)
+            .order_by("-receive_date")
+            .values("receive_date", "identification")
+            .first()
+        )
+
+    @cached_property
+    def due_expenses(self) -> list[Expense]:
+        """Despesas dos itens do contrato com vencimento no período.
+
+        Lista, não queryset: os demonstrativos categorizam essas despesas em
+        duas tabelas diferentes e antes liam tudo do banco duas vezes.
+        """
+        return list(
+            Expense.objects.filter(item__contract=self.contract).filter(
+                due_date__gte=self.start_date, due_date__lte=self.end_date
+            )
+        )
+
+
+def _zero_filled(totals: dict) -> dict[str, Decimal]:
+    return {key: value or ZERO for key, value in totals.items()}
@@ -9,6 +9,7 @@ class BasePdf(FPDF):
         self.set_y(-20)
         self.set_line_width(0.1)
         self.set_draw_color(0, 0, 0)
-        current_datetime = datetime.now().strftime("%d/%m/%Y %H:%M")
+        # The day only: rendered PDFs are cached for the day (`reports.cache`).
+        current_datetime = datetime.now().strftime("%d/%m/%Y")
         self.cell(w=160, h=3, text=f"Página {self.page_no()}", align="C")
         self.cell(w=30, h=3, text=(current_datetime), align="R")
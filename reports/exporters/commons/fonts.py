@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import defaultdict
+from io import BytesIO
+
+from django.conf import settings
+from fontTools import ttLib
+from fpdf import FPDF
+from fpdf.fonts import SubsetMap, TTFFont, get_color_font_object
+
+FONT_FAMILY = "FreeSans"
+
+FONT_FILES = {
+    "": "FreeSans.ttf",
+    "B": "FreeSansBold.ttf",
+    "I": "FreeSansOblique.ttf",
+    "BI": "FreeSansBoldOblique.ttf",
+}
+
+REGULAR_AND_BOLD = ("", "B")
+ALL_STYLES = tuple(FONT_FILES)
+
+
+class _FontRegistry:
+    """Fontes FreeSans lidas e analisadas uma vez por processo.
+
+    `pdf.add_font` relê o TTF do disco e reconstrói cmap e larguras a cada
+    documento — cerca de 35 ms por estilo. Aqui essa análise fica num
+    protótipo por estilo, e cada PDF recebe uma cópia barata dele.
+
+    Tabelas só de leitura (cmap, glyph ids, descritor) são compartilhadas.
+    O `TTFont` do fontTools não: na saída o fpdf faz o subset da fonte *in
+    place*, então cada documento abre o seu, a partir dos bytes em memória.
+
+    A cópia depende de detalhes internos do `TTFFont` (`__slots__`,
+    `_hbfont`, `SubsetMap`), por isso o fpdf2 está fixado no pyproject.toml.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prototypes: dict[str, tuple[TTFFont, bytes]] = {}
+
+    def _prototype(self, style: str) -> tuple[TTFFont, bytes]:
+        try:
+            return self._prototypes[style]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if style not in self._prototypes:
+                path = os.path.join(
+                    settings.BASE_DIR, "static/fonts", FONT_FILES[style]
+                )
+                with open(path, "rb") as font_file:
+                    data = font_file.read()
+
+                scratch = FPDF()
+                scratch.add_font(FONT_FAMILY, style, path)
+                prototype = scratch.fonts[f"{FONT_FAMILY.lower()}{style}"]
+                # Só o que já foi extraído do TTFont é reaproveitado.
+                prototype.ttfont.close()
+                self._prototypes[style] = (prototype, data)
+            return self._prototypes[style]
+
+    def warm(self, styles=ALL_STYLES):
+        for style in styles:
+            self._prototype(style)
+
+    def attach(self, pdf: FPDF, styles=REGULAR_AND_BOLD):
+        """Equivalente a `pdf.add_font(FONT_FAMILY, style, ...)` por estilo."""
+        for style in styles:
+            prototype, data = self._prototype(style)
+            fontkey = prototype.fontkey
+            if fontkey in pdf.fonts:
+                continue
+
+            font = TTFFont.__new__(TTFFont)
+            for slot in TTFFont.__slots__:
+                if hasattr(prototype, slot):
+                    setattr(font, slot, getattr(prototype, slot))
+
+            font.i = len(pdf.fonts) + 1
+            font.ttfont = ttLib.TTFont(BytesIO(data), recalcTimestamp=False, lazy=True)
+            font._hbfont = None
+            # `cw` é um defaultdict: ler um caractere ausente grava a chave.
+            font.cw = defaultdict(prototype.cw.default_factory, prototype.cw)
+            font.missing_glyphs = []
+            font.biggest_size_pt = 0
+            font.subset = SubsetMap(font)
+            font.color_font = (
+                get_color_font_object(pdf, font, font.palette_index)
+                if pdf.render_color_fonts
+                else None
+            )
+            pdf.fonts[fontkey] = font
+
+
+font_registry = _FontRegistry()
+
+
+def attach_fonts(pdf: FPDF, styles=REGULAR_AND_BOLD):
+    font_registry.attach(pdf, styles)
+
+
+def warm_fonts():
+    font_registry.warm()
@@ -0,0 +1,135 @@
+from collections.abc import Iterable, Sequence
+
+from fpdf import FPDF
+from fpdf.enums import MethodReturnValue
+
+
+class StreamingTable:
+    """Tabela desenhada linha a linha, para listagens sem limite de tamanho.
+
+    `pdf.table()` guarda todas as linhas até sair do bloco `with` e só então
+    desenha — com dezenas de milhares de despesas, a tabela inteira fica em
+    memória junto com a lista de textos já formatados. Aqui cada linha é
+    desenhada assim que chega do iterável e descartada em seguida; antes de
+    uma linha que não cabe na página, abre-se outra página e o cabeçalho é
+    repetido.
+    """
+
+    def __init__(
+        self,
+        pdf: FPDF,
+        headings: Sequence[str],
+        col_widths: Sequence[float],
+        line_height: float = 4,
+        font_family: str = "FreeSans",
+        font_size: float = 7,
+        heading_font_size: float = 6,
+        heading_fill_color: tuple[int, int, int] = (225, 225, 225),
+        align: str = "C",
+    ):
+        self.pdf = pdf
+        self.headings = headings
+        self.col_widths = col_widths
+        self.line_height = line_height
+        self.font_family = font_family
+        self.font_size = font_size
+        self.heading_font_size = heading_font_size
+        self.heading_fill_color = heading_fill_color
+        self.align = align
+
+    def write(self, rows: Iterable[Sequence[str]]) -> int:
+        """Desenha o cabeçalho e as linhas de `rows`; devolve quantas foram."""
+        self._draw_headings()
+        self.pdf.set_font(self.font_family, "", self.font_size)
+
+        count = 0
+        for row in rows:
+            self._draw_row(row)
+            count += 1
+        return count
+
+    def _draw_headings(self):
+        self.pdf.set_font(self.font_family, "B", self.heading_font_size)
+        self.pdf.set_fill_color(*self.heading_fill_color)
+        cells = self._wrap_row(self.headings)
+        if self.pdf.will_page_break(self._height(cells)):
+            self.pdf.add_page()
+        self._draw_cells(cells, fill=True)
+        self.pdf.set_fill_color(255, 255, 255)
+
+    def _draw_row(self, row: Sequence[str]):
+        cells = self._wrap_row(row)
+        if self.pdf.will_page_break(self._height(cells)):
+            self.pdf.add_page()
+            self._draw_headings()
+            self.pdf.set_font(self.font_family, "", self.font_size)
+        self._draw_cells(cells)
+
+    def _text_width(self, text: str) -> float:
+        # O mesmo cálculo de `pdf.get_string_width` para texto simples (sem
+        # markdown, espaçamento ou shaping), sem a cópia do estado gráfico que
+        # ele faz a cada chamada — e aqui são várias por célula.
+        widths = self.pdf.current_font.cw
+        return (
+            sum(widths[ord(char)] for char in text)
+            * self.pdf.font_size_pt
+            * 0.001
+            / self.pdf.k
+        )
+
+    def _wrap(self, text: str, width: float) -> list[str]:
+        """Quebra `text` em linhas de até `width`, palavra por palavra.
+
+        Cada linha vira um `cell` simples. `multi_cell` quebraria o mesmo
+        texto caractere a caractere — e duas vezes, uma para medir a altura
+        da linha da tabela e outra para desenhar.
+        """
+        available = width - 2 * self.pdf.c_margin
+        if self._text_width(text) <= available:
+            return [text]
+
+        lines, current = [], ""
+        for word in text.split():
+            candidate = f"{current} {word}" if current else word
+            if self._text_width(candidate) <= available:
+                current = candidate
+                continue
+            if current:
+                lines.append(current)
+            if self._text_width(word) <= available:
+                current = word
+            else:
+                # Palavra maior que a coluna: só aqui a quebra por caractere.
+                *head, current = self.pdf.multi_cell(
+                    width,
+                    self.line_height,
+                    word,
+                    dry_run=True,
+                    output=MethodReturnValue.LINES,
+                )
+                lines.extend(head)
+        if current:
+            lines.append(current)
+        return lines or [""]
+
+    def _wrap_row(self, row: Sequence[str]) -> list[list[str]]:
+        return [
+            self._wrap(str(text), width) for text, width in zip(row, self.col_widths)
+        ]
+
+    def _height(self, cells: list[list[str]]) -> float:
+        return max(len(lines) for lines in cells) * self.line_height
+
+    def _draw_cells(self, cells: list[list[str]], fill: bool = False):
+        height = self._height(cells)
+        x, y = self.pdf.l_margin, self.pdf.get_y()
+        for lines, width in zip(cells, self.col_widths):
+            self.pdf.rect(x, y, width, height, style="DF" if fill else "D")
+            # Centraliza o texto na altura da linha, como faz `pdf.table()`.
+            line_y = y + (height - len(lines) * self.line_height) / 2
+            for line in lines:
+                self.pdf.set_xy(x, line_y)
+                self.pdf.cell(width, self.line_height, line, align=self.align)
+                line_y += self.line_height
+            x += width
+        self.pdf.set_xy(self.pdf.l_margin, y + height)
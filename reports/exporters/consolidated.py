@@ -2,13 +2,12 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from django.db.models import Q, Sum
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
-from accountability.models import Expense, Revenue
-from bank.models import BankStatement, Transaction
+from accountability.models import Revenue
 from contracts.models import Contract
+from reports.exporters.commons.dataset import PLANNED, UNPLANNED, ReportDataset
 from reports.exporters.commons.exporters import BasePdf
 from utils.formats import (
     format_into_brazilian_currency,
@@ -31,6 +30,7 @@ class ConsolidatedPDFExporter:
         self.contract = contract
         self.start_date = start_date - timedelta(days=365)
         self.end_date = end_date
+        self.dataset = ReportDataset(contract, self.start_date, self.end_date)
 
     def __set_helvetica_font(self, font_size=7, bold=False):
         if bold:
@@ -39,32 +39,11 @@ class ConsolidatedPDFExporter:
             self.pdf.set_font("Helvetica", "", font_size)
 
     def __database_queries(self):
-        self.checking_account = self.contract.checking_account
-        self.investing_account = self.contract.investing_account
+        self.checking_account = self.dataset.checking_account
+        self.investing_account = self.dataset.investing_account
 
-        self.statement_queryset = (
-            BankStatement.objects.filter(
-                Q(bank_account=self.checking_account)
-                | Q(bank_account=self.investing_account)
-            )
-            .filter(
-                Q(
-                    reference_month__gte=self.start_date.month,
-                    reference_year__gte=self.start_date.year,
-                )
-                | Q(
-                    reference_month__lt=self.start_date.month,
-                    reference_year__gt=self.start_date.year,
-                )
-            )
-            .order_by("reference_year", "reference_month")
-            .exclude(bank_account__isnull=True)
-        )
-
-        self.revenue_queryset = Revenue.objects.filter(
-            Q(bank_account=self.checking_account)
-            | Q(bank_account=self.investing_account)
-        ).exclude(bank_account__isnull=True)
+        self.statement_queryset = self.dataset.statement_queryset
+        self.revenue_queryset = self.dataset.revenue_queryset
 
     def handle(self):
         self.__database_queries()
@@ -160,22 +139,10 @@ class ConsolidatedPDFExporter:
         self.pdf.set_y(self.pdf.get_y() + 5)
 
     def _draw_balance_table(self):
-        self.opening_balance = self.statement_queryset.filter(
-            reference_month=self.start_date.month,
-            reference_year=self.start_date.year,
-        ).aggregate(Sum("opening_balance"))["opening_balance__sum"] or Decimal("0.00")
-
-        self.closing_checking_account = self.statement_queryset.filter(
-            reference_month=self.end_date.month,
-            reference_year=self.end_date.year,
-            bank_account=self.checking_account,
-        ).aggregate(Sum("closing_balance"))["closing_balance__sum"] or Decimal("0.00")
-
-        self.closing_investing_account = self.statement_queryset.filter(
-            reference_month=self.end_date.month,
-            reference_year=self.end_date.year,
-            bank_account=self.investing_account,
-        ).aggregate(Sum("closing_balance"))["closing_balance__sum"] or Decimal("0.00")
+        balances = self.dataset.statement_balances
+        self.opening_balance = balances["opening"]
+        self.closing_checking_account = balances["closing_checking"]
+        self.closing_investing_account = balances["closing_investing"]
 
         self.closing_balance = (
             self.closing_checking_account + self.closing_investing_account
@@ -255,18 +222,6 @@ class ConsolidatedPDFExporter:
         self.pdf.ln(1)
 
     def _draw_revenue_group_table(self):
-        self.revenue_queryset = (
-            Revenue.objects.filter(
-                Q(bank_account=self.checking_account)
-                | Q(bank_account=self.investing_account)
-            )
-            .filter(
-                receive_date__gte=self.start_date,
-                receive_date__lte=self.end_date,
-            )
-            .exclude(bank_account__isnull=True)
-        )
-
         body_data = []
         total = Decimal("0.00")
 
@@ -327,21 +282,12 @@ class ConsolidatedPDFExporter:
         self.pdf.ln(1)
 
     def _draw_expenses_table(self):
-        self.all_expense = Expense.objects.filter(
-            liquidation__gte=self.start_date, liquidation__lte=self.end_date
-        )
+        self.all_expense = self.dataset.expense_queryset
 
         self.planned_expenses = self.all_expense.filter(planned=True)
         self.unplanned_expenses = self.all_expense.filter(planned=False)
-        if self.planned_expenses.count():
-            planned = self.planned_expenses.aggregate(Sum("value"))["value__sum"]
-        else:
-            planned = Decimal("0.00")
-
-        if self.unplanned_expenses.count():
-            unplanned = self.unplanned_expenses.aggregate(Sum("value"))["value__sum"]
-        else:
-            unplanned = Decimal("0.00")
+        planned = self.dataset.expense_totals[PLANNED]
+        unplanned = self.dataset.expense_totals[UNPLANNED]
 
         total = planned + unplanned
 
@@ -414,31 +360,9 @@ class ConsolidatedPDFExporter:
         self.pdf.ln(1)
 
     def _draw_bank_transfers_table(self):
-        self.transaction_queryset = (
-            Transaction.objects.filter(
-                Q(bank_account=self.checking_account)
-                | Q(bank_account=self.investing_account)
-            )
-            .filter(date__gte=self.start_date, date__lte=self.end_date)
-            .exclude(bank_account__isnull=True)
-        )
-
-        income_transaction = self.transaction_queryset.filter(
-            amount__gt=Decimal("0.00")
-        )
-        outgoing_transaction = self.transaction_queryset.filter(
-            amount__lt=Decimal("0.00")
-        )
-
-        if income_transaction.count():
-            income = income_transaction.aggregate(Sum("amount"))["amount__sum"]
-        else:
-            income = Decimal("0.00")
-
-        if outgoing_transaction.count():
-            outgoing = outgoing_transaction.aggregate(Sum("amount"))["amount__sum"]
-        else:
-            outgoing = Decimal("0.00")
+        self.transaction_queryset = self.dataset.transaction_queryset
+        income = self.dataset.transaction_totals["income"]
+        outgoing = self.dataset.transaction_totals["outgoing"]
 
         body_data = [
             [
@@ -725,17 +649,8 @@ class ConsolidatedPDFExporter:
                 footer.cell(text=text, align="C", border=0)
 
     def _draw_expenses_analysis_table(self):
-        if self.planned_expenses.count():
-            total_planned = self.planned_expenses.aggregate(Sum("value"))["value__sum"]
-        else:
-            total_planned = Decimal("0.00")
-
-        if self.unplanned_expenses.count():
-            total_unplanned = self.unplanned_expenses.aggregate(Sum("value"))[
-                "value__sum"
-            ]
-        else:
-            total_unplanned = Decimal("0.00")
+        total_planned = self.dataset.expense_totals[PLANNED]
+        total_unplanned = self.dataset.expense_totals[UNPLANNED]
 
         total_expenses = total_planned + total_unplanned
 
@@ -868,18 +783,28 @@ class ConsolidatedPDFExporter:
 
         self.pdf.ln(self.default_cell_height)
 
+    def __release_rows(self, entries):
+        if not entries:
+            return [["-", "Nenhum lançamento pendente", "-"]]
+
+        return [
+            [
+                format_into_brazilian_date(entry.date),
+                entry.description,
+                format_into_brazilian_currency(entry.value),
+            ]
+            for entry in entries
+        ]
+
     def _draw_release_table(self):
+        reconciliation = self.dataset.reconciliation
         not_in_sistem_data = [
             [
                 "**Data**",
                 "**Histórico**",
                 "**Valor**",
             ],
-            [
-                "22/22/22",
-                "ZZZ Contabilidade",
-                "R$XX.XXX,XX",
-            ],
+            *self.__release_rows(reconciliation.unmatched_transactions),
         ]
 
         not_in_bank_data = [
@@ -888,11 +813,7 @@ class ConsolidatedPDFExporter:
                 "**Histórico**",
                 "**Valor**",
             ],
-            [
-                "22/22/22",
-                "ZZZ Contabilidade",
-                "R$XX.XXX,XX",
-            ],
+            *self.__release_rows(reconciliation.unmatched_entries),
         ]
 
         self.__set_helvetica_font(font_size=9, bold=True)
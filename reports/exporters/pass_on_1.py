@@ -1,24 +1,20 @@
-import os
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 
-from django.conf import settings
 from django.db.models import Sum
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
 from contracts.models import Contract
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import attach_fonts
 from utils.choices import MonthChoices
 from utils.formats import (
     format_into_brazilian_currency,
     format_into_brazilian_date,
 )
 
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
-
 
 @dataclass
 class PassOn1PDFExporter:
@@ -29,8 +25,7 @@ class PassOn1PDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
+        attach_fonts(pdf)
         pdf.set_font("FreeSans", size=8)
         pdf.set_fill_color(233, 234, 236)
         self.pdf = pdf
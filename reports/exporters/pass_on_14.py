@@ -1,26 +1,22 @@
 import copy
-import os
 from dataclasses import dataclass
 from decimal import Decimal
 
-from django.conf import settings
-from django.db.models import Q, Sum
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
 from accountability.models import Expense, Revenue
 from contracts.choices import NatureCategories
 from contracts.models import ContractAddendum
+from reports.exporters.commons.dataset import TOTAL, UNPLANNED, ReportDataset
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import attach_fonts
 from utils.formats import (
     document_mask,
     format_into_brazilian_currency,
     format_into_brazilian_date,
 )
 
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
-
 
 @dataclass
 class PassOn14PDFExporter:
@@ -31,13 +27,13 @@ class PassOn14PDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
+        attach_fonts(pdf)
         pdf.set_font("FreeSans", "", 8)
         self.pdf = pdf
         self.contract = contract
         self.start_date = start_date
         self.end_date = end_date
+        self.dataset = ReportDataset(contract, start_date, end_date)
 
     def __set_font(self, font_size=7, bold=False):
         if bold:
@@ -46,118 +42,40 @@ class PassOn14PDFExporter:
             self.pdf.set_font("FreeSans", "", font_size)
 
     def __database_queries(self):
-        self.checking_account = self.contract.checking_account
-        self.investing_account = self.contract.investing_account
-
-        # Queries para Receitas
-        self.revenue_queryset = Revenue.objects.filter(
-            Q(bank_account=self.checking_account)
-            | Q(bank_account=self.investing_account),
-            receive_date__gte=self.start_date,
-            receive_date__lte=self.end_date,
-        ).exclude(bank_account__isnull=True)
-
-        self.all_pass_on_values = self.revenue_queryset.aggregate(Sum("value"))[
-            "value__sum"
-        ] or Decimal("0.00")
-
-        self.previous_balance = self.revenue_queryset.filter(
-            revenue_nature=Revenue.Nature.PREVIOUS_BALANCE
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.investment_income = self.revenue_queryset.filter(
-            revenue_nature=Revenue.Nature.INVESTMENT_INCOME
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.own_resources = self.revenue_queryset.filter(
-            revenue_nature=Revenue.Nature.OWN_RESOURCES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.other_revenues_value = self.revenue_queryset.filter(
-            revenue_nature=Revenue.Nature.OTHER_REVENUES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.latest_pass_on_info = (
-            self.revenue_queryset.filter(revenue_nature=Revenue.Nature.PUBLIC_TRANSFER)
-            .order_by("-receive_date")
-            .values("receive_date", "identification")
-            .first()
-        )
-
-        # Queries para Despesas
-        self.expense_queryset = Expense.objects.filter(
-            accountability__contract=self.contract,
-            liquidation__gte=self.start_date,
-            liquidation__lte=self.end_date,
-        )
-
-        self.hr_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.HUMAN_RESOURCES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.other_hr_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.OTHER_HUMAN_RESOURCES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.services_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.OTHER_THIRD_PARTY
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.other_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.OTHER_EXPENSES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.goods_materials_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.PERMANENT_GOODS
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.consumables_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.OTHER_CONSUMABLES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.medical_and_hospital_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.MEDICAL_AND_HOSPITAL
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.medical_services_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.MEDICAL_SERVICES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.medicines_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.MEDICINES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.works_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.WORKS
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.public_utilities_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.PUBLIC_UTILITIES
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.financial_banking_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.FINANCIAL_AND_BANKING
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.fuel_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.FUEL
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.foodstuffs_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.FOODSTUFFS
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.real_state_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.REAL_STATE
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.miscellaneous_expenses = self.expense_queryset.filter(
-            nature__in=NatureCategories.MISCELLANEOUS
-        ).aggregate(Sum("value"))["value__sum"] or Decimal("0.00")
-
-        self.all_expenses_value = self.expense_queryset.aggregate(Sum("value"))[
-            "value__sum"
-        ] or Decimal("0.00")
+        self.checking_account = self.dataset.checking_account
+        self.investing_account = self.dataset.investing_account
+
+        # Receitas e despesas: uma agregação condicional para cada família
+        self.revenue_queryset = self.dataset.revenue_queryset
+        revenue_totals = self.dataset.revenue_totals
+
+        self.all_pass_on_values = revenue_totals[TOTAL]
+        self.previous_balance = revenue_totals[Revenue.Nature.PREVIOUS_BALANCE]
+        self.investment_income = revenue_totals[Revenue.Nature.INVESTMENT_INCOME]
+        self.own_resources = revenue_totals[Revenue.Nature.OWN_RESOURCES]
+        self.other_revenues_value = revenue_totals[Revenue.Nature.OTHER_REVENUES]
+        self.latest_pass_on_info = self.dataset.latest_pass_on_info
+
+        self.expense_queryset = self.dataset.expense_queryset
+        expense_totals = self.dataset.expense_totals
+
+        self.hr_expenses = expense_totals["HUMAN_RESOURCES"]
+        self.other_hr_expenses = expense_totals["OTHER_HUMAN_RESOURCES"]
+        self.services_expenses = expense_totals["OTHER_THIRD_PARTY"]
+        self.other_expenses = expense_totals["OTHER_EXPENSES"]
+        self.goods_materials_expenses = expense_totals["PERMANENT_GOODS"]
+        self.consumables_expenses = expense_totals["OTHER_CONSUMABLES"]
+        self.medical_and_hospital_expenses = expense_totals["MEDICAL_AND_HOSPITAL"]
+        self.medical_services_expenses = expense_totals["MEDICAL_SERVICES"]
+        self.medicines_expenses = expense_totals["MEDICINES"]
+        self.works_expenses = expense_totals["WORKS"]
+        self.public_utilities_expenses = expense_totals["PUBLIC_UTILITIES"]
+        self.financial_banking_expenses = expense_totals["FINANCIAL_AND_BANKING"]
+        self.fuel_expenses = expense_totals["FUEL"]
+        self.foodstuffs_expenses = expense_totals["FOODSTUFFS"]
+        self.real_state_expenses = expense_totals["REAL_STATE"]
+        self.miscellaneous_expenses = expense_totals["MISCELLANEOUS"]
+        self.all_expenses_value = expense_totals[TOTAL]
 
         # Querie para Aditivos
         self.addendum_queryset = ContractAddendum.objects.filter(
@@ -786,9 +704,7 @@ class PassOn14PDFExporter:
         )
 
         expenses_dict = self.__categorize_expenses()
-        non_planned_paid_expenses_sum = self.expense_queryset.filter(
-            planned=False
-        ).aggregate(sum=Sum("value"))["sum"] or Decimal("0.00")
+        non_planned_paid_expenses_sum = self.dataset.expense_totals[UNPLANNED]
 
         j_value = expenses_dict["TOTAL"]["paid_on"]
         k_value = self.sum_items_a_to_d - (j_value - self.own_resources)
@@ -926,9 +842,7 @@ class PassOn14PDFExporter:
                     data.cell(text=text, align="L", border=0)
 
     def __categorize_expenses(self) -> dict:
-        expenses = Expense.objects.filter(item__contract=self.contract).filter(
-            due_date__gte=self.start_date, due_date__lte=self.end_date
-        )
+        expenses = self.dataset.due_expenses
 
         base_empty_dict = {
             "accounted_on": Decimal(0.00),
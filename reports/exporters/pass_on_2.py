@@ -1,29 +1,19 @@
-import os
 from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
 
-from django.conf import settings
-from django.db.models import Q, Sum
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
-from accountability.models import Expense, Revenue
-from bank.models import BankStatement
+from reports.exporters.commons.dataset import ReportDataset
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import ALL_STYLES, attach_fonts
 from utils.formats import (
     document_mask,
     format_into_brazilian_currency,
     format_into_brazilian_date,
 )
 
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
-font_italic_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansOblique.ttf")
-font_bold_italic_path = os.path.join(
-    settings.BASE_DIR, "static/fonts/FreeSansBoldOblique.ttf"
-)
-
 
 @dataclass
 class PassOn2PDFExporter:
@@ -34,15 +24,13 @@ class PassOn2PDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
-        pdf.add_font("FreeSans", "I", font_italic_path, uni=True)
-        pdf.add_font("FreeSans", "BI", font_bold_italic_path, uni=True)
+        attach_fonts(pdf, styles=ALL_STYLES)
         pdf.set_fill_color(233, 234, 236)
         self.pdf = pdf
         self.contract = contract
         self.start_date = start_date - timedelta(days=365)
         self.end_date = end_date
+        self.dataset = ReportDataset(contract, self.start_date, self.end_date)
 
     def __set_font(self, font_size=7, bold=False):
         if bold:
@@ -51,43 +39,18 @@ class PassOn2PDFExporter:
             self.pdf.set_font("FreeSans", "", font_size)
 
     def __database_queries(self):
-        self.checking_account = self.contract.checking_account
-        self.investing_account = self.contract.investing_account
+        self.checking_account = self.dataset.checking_account
+        self.investing_account = self.dataset.investing_account
 
-        self.statement_queryset = (
-            BankStatement.objects.filter(
-                Q(bank_account=self.checking_account)
-                | Q(bank_account=self.investing_account)
-            )
-            .filter(
-                Q(
-                    reference_month__gte=self.start_date.month,
-                    reference_year__gte=self.start_date.year,
-                )
-                | Q(
-                    reference_month__lt=self.start_date.month,
-                    reference_year__gt=self.start_date.year,
-                )
-            )
-            .order_by("reference_year", "reference_month")
-            .exclude(bank_account__isnull=True)
-        )
+        self.statement_queryset = self.dataset.statement_queryset
+        # TODO como filtrar por contrato
+        self.revenue_queryset = self.dataset.account_revenue_queryset
+        self.expense_queryset = self.dataset.expense_queryset
 
-        self.revenue_queryset = (
-            Revenue.objects.filter(  # TODO como filtrar por contrato
-                Q(bank_account=self.checking_account)
-                | Q(bank_account=self.investing_account)
-            ).exclude(bank_account__isnull=True)
+        self.paid_expenses = self.expense_queryset.filter(paid=True).select_related(
+            "favored"
         )
 
-        self.expense_queryset = Expense.objects.filter(
-            accountability__contract=self.contract,
-            liquidation__gte=self.start_date,
-            liquidation__lte=self.end_date,
-        )
-
-        self.paid_expenses = self.expense_queryset.filter(paid=True)
-
     def handle(self):
         self.__database_queries()
         self._draw_header()
@@ -265,28 +228,14 @@ class PassOn2PDFExporter:
         self.pdf.ln(2)
 
     def _draw_table_I(self):
-        opening_balance = self.statement_queryset.filter(
-            reference_month=self.start_date.month,
-            reference_year=self.start_date.year,
-        ).aggregate(Sum("opening_balance"))["opening_balance__sum"] or Decimal("0.00")
-
-        closing_checking_account = self.statement_queryset.filter(
-            reference_month=self.end_date.month,
-            reference_year=self.end_date.year,
-            bank_account=self.checking_account,
-        ).aggregate(Sum("closing_balance"))["closing_balance__sum"] or Decimal("0.00")
-
-        closing_investing_account = self.statement_queryset.filter(
-            reference_month=self.end_date.month,
-            reference_year=self.end_date.year,
-            bank_account=self.investing_account,
-        ).aggregate(Sum("closing_balance"))["closing_balance__sum"] or Decimal("0.00")
+        balances = self.dataset.statement_balances
+        opening_balance = balances["opening"]
+        closing_checking_account = balances["closing_checking"]
+        closing_investing_account = balances["closing_investing"]
 
         closing_balance = closing_checking_account + closing_investing_account
 
-        revenue_in_time = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        )
+        revenue_in_time = self.dataset.revenue_queryset
         self.revenue_total = Decimal("0.00")
 
         contract = self.contract
@@ -1,21 +1,17 @@
-import os
 from dataclasses import dataclass
 from datetime import date
 
-from django.conf import settings
 from fpdf import XPos, YPos
 
 from reports.exporters.commons.contract_info import expenditure_orderer_info
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import attach_fonts
 from utils.formats import (
     document_mask,
     format_into_brazilian_currency,
     format_into_brazilian_date,
 )
 
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
-
 
 @dataclass
 class PassOn3PDFExporter:
@@ -26,8 +22,7 @@ class PassOn3PDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
+        attach_fonts(pdf)
         pdf.set_font("FreeSans", "", 8)
         pdf.set_fill_color(233, 234, 236)
         self.pdf = pdf
@@ -1,23 +1,19 @@
-import os
+from collections import defaultdict
 from dataclasses import dataclass
 from decimal import Decimal
 
-from django.conf import settings
-from django.db.models import Q
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
-from accountability.models import Revenue
 from contracts.models import Contract
+from reports.exporters.commons.dataset import ReportDataset
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import attach_fonts
 from utils.formats import (
     format_into_brazilian_currency,
     format_into_brazilian_date,
 )
 
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
-
 
 @dataclass
 class PassOn4PDFExporter:
@@ -28,13 +24,13 @@ class PassOn4PDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
+        attach_fonts(pdf)
         pdf.set_font("FreeSans", "", 8)
         self.pdf = pdf
         self.contract = contract
         self.start_date = start_date
         self.end_date = end_date
+        self.dataset = ReportDataset(contract, start_date, end_date)
 
     def __set_font(self, font_size=7, bold=False):
         if bold:
@@ -49,13 +45,15 @@ class PassOn4PDFExporter:
             self.pdf.set_fill_color(255, 255, 255)
 
     def __database_queries(self):
-        self.checking_account = self.contract.checking_account
-        self.investing_account = self.contract.investing_account
+        self.checking_account = self.dataset.checking_account
+        self.investing_account = self.dataset.investing_account
 
-        self.revenue_queryset = Revenue.objects.filter(
-            Q(bank_account=self.checking_account)
-            | Q(bank_account=self.investing_account)
-        ).exclude(bank_account__isnull=True)
+        # Uma leitura só; cada tabela abaixo mostra um tipo de concessão.
+        self.revenue_queryset = self.dataset.revenue_queryset
+        self.revenues_by_concession_type = defaultdict(list)
+        for revenue in self.revenue_queryset.select_related("accountability__contract"):
+            concession_type = revenue.accountability.contract.concession_type
+            self.revenues_by_concession_type[concession_type].append(revenue)
 
     def handle(self):
         self.__database_queries()
@@ -116,11 +114,9 @@ class PassOn4PDFExporter:
         self.pdf.ln(12)
 
     def _draw_manager_table(self):
-        manager_queryset = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        ).filter(
-            accountability__contract__concession_type=Contract.ConcessionChoices.MANAGEMENT  # Não é Revenue
-        )
+        manager_revenues = self.revenues_by_concession_type[
+            Contract.ConcessionChoices.MANAGEMENT
+        ]
 
         self.pdf.ln()
         header_data = [
@@ -139,7 +135,7 @@ class PassOn4PDFExporter:
         contract = self.contract
         table_data = []
         total_revenue_value = Decimal("0.00")
-        for revenue in manager_queryset:
+        for revenue in manager_revenues:
             table_data.append(
                 [
                     f"{contract.code}",
@@ -200,11 +196,9 @@ class PassOn4PDFExporter:
         self.pdf.ln(10)
 
     def _draw_partner_table(self):
-        partner_queryset = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        ).filter(
-            accountability__contract__concession_type=Contract.ConcessionChoices.PARTNERSHIP
-        )
+        partner_revenues = self.revenues_by_concession_type[
+            Contract.ConcessionChoices.PARTNERSHIP
+        ]
         self.__set_font(font_size=7, bold=True)
         self.pdf.ln()
         header_data = [
@@ -223,7 +217,7 @@ class PassOn4PDFExporter:
         contract = self.contract
         table_data = []
         total_revenue_value = Decimal("0.00")
-        for revenue in partner_queryset:
+        for revenue in partner_revenues:
             table_data.append(
                 [
                     f"{contract.code}",
@@ -284,11 +278,9 @@ class PassOn4PDFExporter:
         self.pdf.ln(10)
 
     def _draw_collaborator_table(self):
-        collaborator_queryset = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        ).filter(
-            accountability__contract__concession_type=Contract.ConcessionChoices.COLLABORATION
-        )
+        collaborator_revenues = self.revenues_by_concession_type[
+            Contract.ConcessionChoices.COLLABORATION
+        ]
         self.__set_font(font_size=7, bold=True)
         self.pdf.ln()
         header_data = [
@@ -307,7 +299,7 @@ class PassOn4PDFExporter:
         contract = self.contract
         table_data = []
         total_revenue_value = Decimal("0.00")
-        for revenue in collaborator_queryset:
+        for revenue in collaborator_revenues:
             table_data.append(
                 [
                     f"{contract.code}",
@@ -368,11 +360,9 @@ class PassOn4PDFExporter:
         self.pdf.ln(10)
 
     def _draw_promotion_table(self):
-        promotion_queryset = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        ).filter(
-            accountability__contract__concession_type=Contract.ConcessionChoices.DEVELOPMENTO
-        )
+        promotion_revenues = self.revenues_by_concession_type[
+            Contract.ConcessionChoices.DEVELOPMENTO
+        ]
         self.__set_font(font_size=7, bold=True)
         self.pdf.ln(3)
         header_data = [
@@ -391,7 +381,7 @@ class PassOn4PDFExporter:
         contract = self.contract
         table_data = []
         total_revenue_value = Decimal("0.00")
-        for revenue in promotion_queryset:
+        for revenue in promotion_revenues:
             table_data.append(
                 [
                     f"{contract.code}",
@@ -452,11 +442,9 @@ class PassOn4PDFExporter:
         self.pdf.ln(10)
 
     def _draw_agreement_table(self):
-        agreement_queryset = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        ).filter(
-            accountability__contract__concession_type=Contract.ConcessionChoices.AGREEMENT
-        )
+        agreement_revenues = self.revenues_by_concession_type[
+            Contract.ConcessionChoices.AGREEMENT
+        ]
         self.__set_font(font_size=7, bold=True)
         self.pdf.ln()
         header_data = [
@@ -475,7 +463,7 @@ class PassOn4PDFExporter:
         contract = self.contract
         table_data = []
         total_revenue_value = Decimal("0.00")
-        for revenue in agreement_queryset:
+        for revenue in agreement_revenues:
             table_data.append(
                 [
                     f"{contract.code}",
@@ -536,11 +524,9 @@ class PassOn4PDFExporter:
         self.pdf.ln(10)
 
     def _draw_concession_table(self):
-        concession_queryset = self.revenue_queryset.filter(
-            receive_date__gte=self.start_date, receive_date__lte=self.end_date
-        ).filter(
-            accountability__contract__concession_type=Contract.ConcessionChoices.GRANT
-        )
+        concession_revenues = self.revenues_by_concession_type[
+            Contract.ConcessionChoices.GRANT
+        ]
         self.__set_font(font_size=8, bold=True)
         self.pdf.cell(
             text="II - AUXÍLIOS, SUBVENÇÕES E/OU CONTRIBUIÇÕES PAGOS:",
@@ -566,7 +552,7 @@ class PassOn4PDFExporter:
         contract = self.contract
         table_data = []
         total_revenue_value = Decimal("0.00")
-        for revenue in concession_queryset:
+        for revenue in concession_revenues:
             table_data.append(
                 [
                     f"{contract.concession_type}",
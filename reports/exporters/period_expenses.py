@@ -1,21 +1,20 @@
-import os
 from dataclasses import dataclass
 from datetime import datetime
 
-from django.conf import settings
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
 from accountability.models import Expense, Revenue
 from contracts.models import Contract
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import attach_fonts
+from reports.exporters.commons.streaming_table import StreamingTable
 from utils.formats import (
     format_into_brazilian_currency,
     format_into_brazilian_date,
 )
 
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
+EXPENSES_CHUNK_SIZE = 2000
 
 
 @dataclass
@@ -27,8 +26,7 @@ class PeriodEpensesPDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
+        attach_fonts(pdf)
         pdf.set_fill_color(233, 234, 236)
         self.pdf = pdf
         self.contract = contract
@@ -246,41 +244,71 @@ class PeriodEpensesPDFExporter:
 
         self.pdf.ln(6)
 
-    def _draw_expenses_table(self):
-        expenses_head = [
-            "**Item**",
-            "**Competência**",
-            "**Tipo**",
-            "**Nº do Documento**",
-            "**Favorecido**",
-            "**Identificação da Despesa**",
-            "**Forma de Liquidação**",
-            "**Data de Liquidação**",
-            "**Nº Docto. Vinculado**",
-            "**Valor**",
-        ]
+    def _expense_rows(self):
+        """Linhas da tabela de despesas, lidas do banco em blocos.
 
-        expenses = Expense.objects.filter(
-            accountability__contract=self.contract,
-            due_date__gte=self.start_date,
-            due_date__lte=self.end_date,
+        Tuplas de `values_list` em vez de instâncias de `Expense`: com dezenas
+        de milhares de linhas, montar cada modelo custa mais que desenhá-lo.
+        """
+        document_types = dict(Expense.DocumentChoices.choices)
+        liquidation_forms = dict(Expense.LiquidationChoices.choices)
+        contract_code = self.contract.code or ""
+
+        expenses = (
+            Expense.objects.filter(
+                accountability__contract=self.contract,
+                due_date__gte=self.start_date,
+                due_date__lte=self.end_date,
+            )
+            .order_by("due_date", "id")
+            .values_list(
+                "item__name",
+                "competency",
+                "document_type",
+                "document_number",
+                "favored__name",
+                "identification",
+                "liquidation_form",
+                "liquidation",
+                "value",
+            )
         )
-        expenses_data = [
-            *[
-                [
-                    expense.item.name if expense.item else "",
-                    format_into_brazilian_date(expense.competency),
-                    expense.document_type_label,
-                    expense.document_number,
-                    expense.favored.name if expense.favored else "",
-                    expense.identification,
-                    expense.liquidation_form_label,
-                    format_into_brazilian_date(expense.liquidation),
-                    self.contract.code,
-                    format_into_brazilian_currency(expense.value),
-                ]
-                for expense in expenses
+        for (
+            item,
+            competency,
+            document_type,
+            document_number,
+            favored,
+            identification,
+            liquidation_form,
+            liquidation,
+            value,
+        ) in expenses.iterator(chunk_size=EXPENSES_CHUNK_SIZE):
+            yield [
+                item or "",
+                format_into_brazilian_date(competency),
+                document_types.get(document_type, "-"),
+                document_number or "",
+                favored or "",
+                identification,
+                liquidation_forms.get(liquidation_form, ""),
+                format_into_brazilian_date(liquidation),
+                contract_code,
+                format_into_brazilian_currency(value),
             ]
+
+    def _draw_expenses_table(self):
+        expenses_head = [
+            "Item",
+            "Competência",
+            "Tipo",
+            "Nº do Documento",
+            "Favorecido",
+            "Identificação da Despesa",
+            "Forma de Liquidação",
+            "Data de Liquidação",
+            "Nº Docto. Vinculado",
+            "Valor",
         ]
 
         self.__set_font(font_size=10, bold=True)
@@ -293,27 +321,13 @@ class PeriodEpensesPDFExporter:
             align="L",
         )
 
-        self.__set_font(font_size=7, bold=False)
-        col_widths = [18, 20, 20, 15, 27, 20, 20, 20, 15, 15]  # Total: 190
-        font = FontFace("FreeSans", "", size_pt=6)
-        with self.pdf.table(
-            headings_style=font,
-            line_height=4,
-            align="C",
-            col_widths=col_widths,
-            repeat_headings=0,
-            markdown=True,
-        ) as table:
-            self.pdf.set_fill_color(225, 225, 225)
-            head = table.row()
-            for text in expenses_head:
-                head.cell(text=text, align="C")
-
-            self.pdf.set_fill_color(255, 255, 255)
-            for item in expenses_data:
-                data = table.row()
-                for text in item:
-                    data.cell(text=text, align="C")
+        # Períodos longos passam de centenas de páginas: as linhas são
+        # desenhadas conforme saem do cursor, sem montar a tabela em memória.
+        StreamingTable(
+            self.pdf,
+            headings=expenses_head,
+            col_widths=[18, 20, 20, 15, 27, 20, 20, 20, 15, 15],  # Total: 190
+        ).write(self._expense_rows())
 
         self.pdf.ln(8)
 
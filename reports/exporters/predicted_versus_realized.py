@@ -1,20 +1,16 @@
-import os
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
-from django.conf import settings
-from django.db.models import Sum
 from fpdf import XPos, YPos
 from fpdf.fonts import FontFace
 
 from accountability.models import Revenue
 from contracts.models import Contract
 from reports.exporters.commons.exporters import BasePdf
+from reports.exporters.commons.fonts import attach_fonts
 from utils.choices import MonthChoices
-from utils.formats import format_into_brazilian_currency, get_month_range
-
-font_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSans.ttf")
-font_bold_path = os.path.join(settings.BASE_DIR, "static/fonts/FreeSansBold.ttf")
+from utils.formats import format_into_brazilian_currency
+from utils.series import monthly_totals
 
 
 @dataclass
@@ -26,8 +22,7 @@ class PredictedVersusRealizedPDFExporter:
         pdf = BasePdf(orientation="portrait", unit="mm", format="A4")
         pdf.add_page()
         pdf.set_margins(10, 15, 10)
-        pdf.add_font("FreeSans", "", font_path, uni=True)
-        pdf.add_font("FreeSans", "B", font_bold_path, uni=True)
+        attach_fonts(pdf)
         pdf.set_fill_color(233, 234, 236)
         self.pdf = pdf
         self.contract = contract
@@ -100,12 +95,15 @@ class PredictedVersusRealizedPDFExporter:
         self.pdf.ln(8)
 
     def _draw_table(self):
-        months_range = get_month_range(self.start_date, self.end_date)
-        all_revenue = Revenue.objects.filter(
-            accountability_id__in=self.contract.accountabilities.values_list(
-                "id", flat=True
-            )
-        ).filter(receive_date__gte=self.start_date, receive_date__lte=self.end_date)
+        realized = monthly_totals(
+            Revenue.objects.filter(
+                accountability__contract=self.contract,
+                accountability__deleted_at__isnull=True,
+            ),
+            "receive_date",
+            self.start_date,
+            self.end_date,
+        )
         month_income_value = self.contract.month_income_value
 
         head_data = [
@@ -116,20 +114,14 @@ class PredictedVersusRealizedPDFExporter:
         body_data = []
         footer_data = [
             "**TOTAL**",
-            format_into_brazilian_currency(month_income_value * len(months_range)),
-            format_into_brazilian_currency(
-                all_revenue.aggregate(Sum("value"))["value__sum"]
-            ),
+            format_into_brazilian_currency(month_income_value * len(realized)),
+            format_into_brazilian_currency(sum(realized.values())),
         ]
 
-        for month, year in months_range:
-            revenue = all_revenue.filter(
-                receive_date__month=month, receive_date__year=year
-            ).aggregate(Sum("value"))["value__sum"]
-
+        for month, revenue in realized.items():
             body_data.append(
                 [
-                    f"{MonthChoices(month).label.capitalize()} de {year}",
+                    f"{MonthChoices(month.month).label.capitalize()} de {month.year}",
                     format_into_brazilian_currency(month_income_value),  # TODO
                     format_into_brazilian_currency(revenue),
                 ]
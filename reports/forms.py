@@ -128,6 +128,29 @@ def year_choices():
     return [(year, year) for year in range(2020, datetime.now().year + 1)]
 
 
+def clean_period(cleaned_data: dict) -> tuple[datetime, datetime]:
+    """First day of the start month and last day of the end month."""
+    try:
+        start_month = int(cleaned_data.get("start_month"))
+        start_year = int(cleaned_data.get("start_year"))
+        end_month = int(cleaned_data.get("end_month"))
+        end_year = int(cleaned_data.get("end_year"))
+    except (TypeError, ValueError) as exc:
+        raise forms.ValidationError("Valores inválidos para mês ou ano.") from exc
+
+    start_date = datetime(start_year, start_month, 1)
+
+    last_day = calendar.monthrange(end_year, end_month)[1]
+    end_date = datetime(end_year, end_month, last_day)
+
+    if start_date > end_date:
+        raise forms.ValidationError(
+            "A data de início deve ser anterior à data de término."
+        )
+
+    return start_date, end_date
+
+
 class AdditionalResponsibleForm(forms.Form):
     user = forms.ModelChoiceField(
         queryset=User.objects.none(),
@@ -296,26 +319,9 @@ class ReportForm(UserAccessFormMixin, forms.Form):
 
     def clean(self):
         cleaned_data = super().clean()
-        try:
-            start_month = int(cleaned_data.get("start_month"))
-            start_year = int(cleaned_data.get("start_year"))
-            end_month = int(cleaned_data.get("end_month"))
-            end_year = int(cleaned_data.get("end_year"))
-        except (TypeError, ValueError) as exc:
-            raise forms.ValidationError("Valores inválidos para mês ou ano.") from exc
-
-        start_date = datetime(start_year, start_month, 1)
-
-        last_day = calendar.monthrange(end_year, end_month)[1]
-        end_date = datetime(end_year, end_month, last_day)
-
-        if start_date > end_date:
-            raise forms.ValidationError(
-                "A data de início deve ser anterior à data de término."
-            )
-
-        cleaned_data["start_date"] = start_date
-        cleaned_data["end_date"] = end_date
+        cleaned_data["start_date"], cleaned_data["end_date"] = clean_period(
+            cleaned_data
+        )
 
         if "contract" in cleaned_data:
             contract = cleaned_data["contract"]
@@ -338,3 +344,20 @@ class ReportForm(UserAccessFormMixin, forms.Form):
                                 self.add_error(None, error_msg)
 
         return cleaned_data
+
+
+class BatchReportForm(forms.Form):
+    """Report model and period of `ReportForm`, for every contract at once."""
+
+    start_month = ReportForm.base_fields["start_month"]
+    start_year = ReportForm.base_fields["start_year"]
+    end_month = ReportForm.base_fields["end_month"]
+    end_year = ReportForm.base_fields["end_year"]
+    report_model = forms.ChoiceField(choices=REPORTS_OPTIONS)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        cleaned_data["start_date"], cleaned_data["end_date"] = clean_period(
+            cleaned_data
+        )
+        return cleaned_data
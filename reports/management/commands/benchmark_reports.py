@@ -0,0 +1,350 @@
+"""Time every report exporter over synthetic data of configurable size.
+
+Seeds the dev scenario (see `seed_dev`), piles N revenues, expenses and bank
+transactions onto contract 1001 and renders each report model registered in
+`reports.services.export_report`, recording wall time, query count and peak
+Python memory. Everything runs inside one transaction that is rolled back,
+so the database is left as it was.
+
+The output is JSON, tagged with the current commit, so two runs can be
+diffed:
+
+    python manage.py benchmark_reports --scale 10 --output before.json
+
+`--fonts` times only what every exporter's constructor pays for its fonts,
+`pdf.add_font` against `attach_fonts`, without touching the database:
+
+    python manage.py benchmark_reports --fonts --repeat 50
+"""
+
+import datetime as dt
+import json
+import os
+import statistics
+import subprocess
+import time
+import tracemalloc
+from decimal import Decimal
+from importlib.metadata import version
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from easy_tenants import tenant_context, tenant_context_disabled
+from fpdf import FPDF
+
+from accountability.models import Expense, Revenue
+from accounts.management.commands.seed_dev import ensure_accountability, run_seed
+from accounts.models import User
+from bank.models import Transaction
+from bank.services.balances import bulk_create_transactions
+from contracts.choices import NatureChoices
+from contracts.models import Contract
+from reports.exporters.commons.fonts import (
+    FONT_FAMILY,
+    FONT_FILES,
+    REGULAR_AND_BOLD,
+    attach_fonts,
+    warm_fonts,
+)
+from reports.forms import REPORT_MODEL_LABELS
+from reports.services import export_report
+from utils.choices import MonthChoices
+
+BENCHMARK_CONTRACT_CODE = 1001
+BENCHMARK_YEAR = 2026
+BENCHMARK_USER_EMAIL = "admin@admin.com"
+
+# Rows per scale unit. `--scale 10` gives 1 000 revenues, 1 000 expenses and
+# 2 000 transactions.
+BASE_REVENUES = 100
+BASE_EXPENSES = 100
+BASE_TRANSACTIONS = 200
+
+BULK_BATCH_SIZE = 1000
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_synthetic_rows(contract: Contract, *, revenues, expenses, transactions):
+    """Bulk-insert rows spread over the 12 months of `BENCHMARK_YEAR`.
+
+    Lists, not generators: the tenant manager's `bulk_create` iterates the
+    objects once to stamp the organization before inserting them.
+    """
+    template = Expense.objects.filter(accountability__contract=contract).first()
+    item = contract.items.first()
+    natures = list(NatureChoices.values)
+    revenue_natures = list(Revenue.Nature.values)
+    accounts = [
+        account
+        for account in (contract.checking_account, contract.investing_account)
+        if account
+    ]
+    accountabilities = [
+        ensure_accountability(contract, month=MonthChoices(month), year=BENCHMARK_YEAR)
+        for month in range(1, 13)
+    ]
+
+    organization = contract.organization
+
+    # The RP annexes print these authorities; the seed leaves them empty.
+    admin = User.objects.get(email=BENCHMARK_USER_EMAIL)
+    contract.supervision_autority = contract.supervision_autority or admin
+    contract.accountability_autority = contract.accountability_autority or admin
+    contract.save()
+
+    def day_of(index):
+        return dt.date(BENCHMARK_YEAR, index % 12 + 1, index % 28 + 1)
+
+    Revenue.objects.bulk_create(
+        [
+            Revenue(
+                organization=organization,
+                accountability=accountabilities[i % 12],
+                identification=f"Receita sintética {i}",
+                value=Decimal("100.00") + i,
+                competency=day_of(i).replace(day=1),
+                receive_date=day_of(i),
+                source=Revenue.RevenueSource.CITY_HALL,
+                bank_account=accounts[i % len(accounts)],
+                revenue_nature=revenue_natures[i % len(revenue_natures)],
+            )
+            for i in range(revenues)
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    Expense.objects.bulk_create(
+        [
+            Expense(
+                organization=organization,
+                accountability=accountabilities[i % 12],
+                identification=f"Despesa sintética {i}",
+                value=Decimal("50.00") + i,
+                source=template.source,
+                favored=template.favored,
+                item=item,
+                nature=natures[i % len(natures)],
+                planned=i % 3 != 0,
+                competency=day_of(i).replace(day=1),
+                due_date=day_of(i),
+                liquidation=day_of(i),
+            )
+            for i in range(expenses)
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    bulk_create_transactions(
+        [
+            Transaction(
+                organization=organization,
+                bank_account=accounts[i % len(accounts)],
+                transaction_number=f"BENCH{i:07d}",
+                memo="Lançamento sintético",
+                name="Benchmark",
+                amount=(Decimal("75.00") + i) * (1 if i % 2 else -1),
+                date=day_of(i),
+                transaction_type=(
+                    Transaction.TransactionTypeChoices.CREDIT
+                    if i % 2
+                    else Transaction.TransactionTypeChoices.PAYMENT
+                ),
+            )
+            for i in range(transactions)
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+def measure(contract, report_model, start_date, end_date, repeat):
+    runs, queries, peaks, size = [], 0, [], 0
+    for _ in range(repeat):
+        # Fresh instance: no FK cache carried over from the previous run.
+        contract = Contract.objects.get(pk=contract.pk)
+        tracemalloc.start()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            report = export_report(
+                contract=contract,
+                start_date=start_date,
+                end_date=end_date,
+                report_model=report_model,
+                responsibles=[],
+            )
+            buffer = BytesIO()
+            report.output(buffer)
+        runs.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        queries = len(context.captured_queries)
+        size = buffer.getbuffer().nbytes
+
+    return {
+        "report_model": report_model,
+        "wall_ms": round(statistics.median(runs), 2),
+        "wall_ms_runs": [round(run, 2) for run in runs],
+        "queries": queries,
+        "peak_memory_kb": round(max(peaks) / 1024, 1),
+        "pdf_bytes": size,
+    }
+
+
+def measure_fonts(repeat: int) -> dict:
+    """Median time to give a new FPDF the FreeSans styles the exporters use."""
+
+    def add_font():
+        pdf = FPDF()
+        for style in REGULAR_AND_BOLD:
+            path = os.path.join(settings.BASE_DIR, "static/fonts", FONT_FILES[style])
+            pdf.add_font(FONT_FAMILY, style, path)
+
+    def attach():
+        attach_fonts(FPDF())
+
+    results = {}
+    for name, function in (("add_font", add_font), ("attach_fonts", attach)):
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            runs.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            "wall_ms": round(statistics.median(runs), 3),
+            "wall_ms_runs": [round(run, 3) for run in runs],
+        }
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo, consultas e memória de cada relatório PDF sobre dados "
+        "sintéticos e emite JSON. Só roda com DEVELOPMENT=true."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1,
+            help=(
+                f"Multiplica a base de {BASE_REVENUES} receitas, {BASE_EXPENSES} "
+                f"despesas e {BASE_TRANSACTIONS} transações."
+            ),
+        )
+        parser.add_argument("--revenues", type=int, help="Sobrescreve a escala.")
+        parser.add_argument("--expenses", type=int, help="Sobrescreve a escala.")
+        parser.add_argument("--transactions", type=int, help="Sobrescreve a escala.")
+        parser.add_argument(
+            "--models",
+            nargs="+",
+            choices=sorted(REPORT_MODEL_LABELS),
+            help="Modelos a medir (padrão: todos).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Execuções por modelo."
+        )
+        parser.add_argument(
+            "--fonts",
+            action="store_true",
+            help="Mede só o custo das fontes no construtor dos relatórios.",
+        )
+        parser.add_argument("--output", help="Grava o JSON neste arquivo.")
+
+    def emit(self, payload: dict, output: str | None) -> None:
+        payload = json.dumps(
+            {
+                "commit": _git_commit(),
+                "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+                **payload,
+            },
+            indent=2,
+        )
+        if output:
+            with open(output, "w") as target:
+                target.write(payload)
+        self.stdout.write(payload)
+
+    def handle(self, *args, **options):
+        if options["fonts"]:
+            # Parsed once per process, like the workers do at startup.
+            warm_fonts()
+            self.emit(
+                {
+                    "fpdf2": version("fpdf2"),
+                    "repeat": options["repeat"],
+                    "fonts": measure_fonts(options["repeat"]),
+                },
+                options["output"],
+            )
+            return
+
+        if not getattr(settings, "DEVELOPMENT", False):
+            raise CommandError("Este comando só roda com DEVELOPMENT=true.")
+
+        scale = options["scale"]
+        sizes = {
+            "revenues": options["revenues"] or round(BASE_REVENUES * scale),
+            "expenses": options["expenses"] or round(BASE_EXPENSES * scale),
+            "transactions": options["transactions"] or round(BASE_TRANSACTIONS * scale),
+        }
+        report_models = options["models"] or list(REPORT_MODEL_LABELS)
+        start_date = dt.datetime(BENCHMARK_YEAR, 1, 1)
+        end_date = dt.datetime(BENCHMARK_YEAR, 12, 31)
+
+        # Fonts are a per-process cost; keep them out of every measurement.
+        warm_fonts()
+
+        with transaction.atomic():
+            run_seed()
+            with tenant_context_disabled():
+                organization = Contract.objects.get(
+                    internal_code=BENCHMARK_CONTRACT_CODE
+                ).organization
+            with tenant_context(organization):
+                contract = Contract.objects.get(internal_code=BENCHMARK_CONTRACT_CODE)
+                seed_synthetic_rows(contract, **sizes)
+
+                results = []
+                for report_model in report_models:
+                    try:
+                        results.append(
+                            measure(
+                                contract,
+                                report_model,
+                                start_date,
+                                end_date,
+                                options["repeat"],
+                            )
+                        )
+                    except Exception as exc:
+                        results.append(
+                            {
+                                "report_model": report_model,
+                                "error": f"{type(exc).__name__}: {exc}",
+                            }
+                        )
+
+            transaction.set_rollback(True)
+
+        self.emit(
+            {
+                "database": connection.vendor,
+                "sizes": sizes,
+                "repeat": options["repeat"],
+                "results": results,
+            },
+            options["output"],
+        )
@@ -0,0 +1,82 @@
+"""Export one report model for every contract of a city hall into a ZIP.
+
+    python manage.py export_city_hall_reports <city_hall_id> rp_1 \
+        --start 2026-01 --end 2026-03 --workers 4 --output rp1-1t.zip
+"""
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from easy_tenants import tenant_context_disabled
+
+from accounts.models import CityHall
+from contracts.models import Contract
+from reports.batch import export_batch
+from reports.forms import REPORT_MODEL_LABELS, clean_period
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o mesmo modelo de relatório para todos os contratos de uma "
+        "prefeitura e grava os PDFs em um ZIP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("city_hall", help="ID da prefeitura.")
+        parser.add_argument("report_model", choices=sorted(REPORT_MODEL_LABELS))
+        parser.add_argument("--start", required=True, help="Mês inicial, AAAA-MM.")
+        parser.add_argument("--end", required=True, help="Mês final, AAAA-MM.")
+        parser.add_argument("--output", required=True, help="Caminho do ZIP.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.REPORT_BATCH_MAX_WORKERS,
+            help="Processos em paralelo (padrão: REPORT_BATCH_MAX_WORKERS).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_year, start_month = options["start"].split("-")
+            end_year, end_month = options["end"].split("-")
+            start_date, end_date = clean_period(
+                {
+                    "start_month": start_month,
+                    "start_year": start_year,
+                    "end_month": end_month,
+                    "end_year": end_year,
+                }
+            )
+        except (ValueError, ValidationError) as exc:
+            raise CommandError("Período inválido; use AAAA-MM.") from exc
+
+        try:
+            city_hall = CityHall.objects.get(pk=options["city_hall"])
+        except (CityHall.DoesNotExist, ValidationError) as exc:
+            raise CommandError("Prefeitura não encontrada.") from exc
+
+        # Contracts of every organization under the city hall; each one is
+        # rendered inside its own organization's tenant context.
+        with tenant_context_disabled():
+            contracts = list(
+                Contract.objects.filter(organization__city_hall=city_hall)
+                .select_related("organization")
+                .order_by("internal_code")
+            )
+
+        with open(options["output"], "wb") as output:
+            result = export_batch(
+                contracts,
+                report_model=options["report_model"],
+                start_date=start_date,
+                end_date=end_date,
+                output=output,
+                max_workers=options["workers"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(result.exported)} relatório(s) em {options['output']}."
+            )
+        )
+        for label, reason in result.failed.items():
+            self.stderr.write(f"  falhou {label}: {reason}")
@@ -0,0 +1,49 @@
+"""Render queued `ReportJob`s outside the web process.
+
+Run alongside gunicorn (`make worker` locally). Several instances may run at
+once: jobs are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.exporters.commons.fonts import warm_fonts
+from reports.services import claim_next_report_job, run_report_job
+
+
+class Command(BaseCommand):
+    help = "Gera os relatórios PDF enfileirados pela tela de exportação."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa a fila atual e sai, em vez de aguardar novos pedidos.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Segundos entre consultas quando a fila está vazia (padrão: 2).",
+        )
+
+    def handle(self, *args, **options):
+        warm_fonts()
+        while True:
+            # Long-lived process: drop connections past CONN_MAX_AGE or broken
+            # while idle, as Django does at the edge of each request.
+            close_old_connections()
+
+            job = claim_next_report_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            job = run_report_job(job)
+            self.stdout.write(
+                f"{job.pk} {job.report_model}: {job.get_status_display()}"
+            )
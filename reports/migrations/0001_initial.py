@@ -0,0 +1,144 @@
+# Generated by Django 6.0.5 on 2026-10-18 07:56
+
+import uuid
+
+import django.db.models.deletion
+import django.db.models.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("accounts", "0003_unaccent_extension"),
+        ("contracts", "0004_supplement_review_metadata"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name=django.db.models.fields.UUIDField,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "deleted_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                (
+                    "report_model",
+                    models.CharField(max_length=32, verbose_name="Modelo"),
+                ),
+                ("start_date", models.DateField(verbose_name="Data inicial")),
+                ("end_date", models.DateField(verbose_name="Data final")),
+                (
+                    "responsibles",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Lista de {user_id, interest_label} impressa no rodapé",
+                        verbose_name="Responsáveis",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Na fila"),
+                            ("RUNNING", "Gerando"),
+                            ("DONE", "Concluído"),
+                            ("FAILED", "Falhou"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "filename",
+                    models.CharField(max_length=255, verbose_name="Nome do arquivo"),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        upload_to="reports/jobs/%Y/%m/",
+                        verbose_name="Arquivo",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Traceback da falha, para depuração — nunca exibido ao usuário",
+                        verbose_name="Erro",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Iniciado em"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Finalizado em"
+                    ),
+                ),
+                (
+                    "contract",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_jobs",
+                        to="contracts.contract",
+                        verbose_name="Contrato",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The organization associated with this tenant.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(app_label)s_%(class)s_related",
+                        to="accounts.organization",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Solicitado por",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Geração de Relatório",
+                "verbose_name_plural": "Gerações de Relatórios",
+                "ordering": ("-created_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="reports_rep_status_051565_idx",
+                    )
+                ],
+            },
+        ),
+    ]
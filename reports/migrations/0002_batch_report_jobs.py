@@ -0,0 +1,37 @@
+# Generated by Django 6.0.5 on 2026-10-18 10:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contracts", "0004_supplement_review_metadata"),
+        ("reports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportjob",
+            name="contracts",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="IDs dos contratos de uma exportação em lote, em ordem",
+                verbose_name="Contratos do lote",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reportjob",
+            name="contract",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Vazio nas exportações em lote",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="report_jobs",
+                to="contracts.contract",
+                verbose_name="Contrato",
+            ),
+        ),
+    ]
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import models
+
+from accounts.models import BaseOrganizationTenantModel
+from contracts.models import Contract
+
+
+class ReportJob(BaseOrganizationTenantModel):
+    """One PDF report requested from the export screen.
+
+    The request thread only records what to render; `run_report_jobs` picks
+    the row up, renders it with `export_report` and stores the PDF in the
+    default storage. The page polls the job until it is DONE or FAILED.
+
+    A batch export has no `contract`: `contracts` lists every contract to
+    render and the stored file is a ZIP with one PDF each.
+    """
+
+    class StatusChoices(models.TextChoices):
+        PENDING = "PENDING", "Na fila"
+        RUNNING = "RUNNING", "Gerando"
+        DONE = "DONE", "Concluído"
+        FAILED = "FAILED", "Falhou"
+
+    contract = models.ForeignKey(
+        Contract,
+        verbose_name="Contrato",
+        related_name="report_jobs",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Vazio nas exportações em lote",
+    )
+    contracts = models.JSONField(
+        verbose_name="Contratos do lote",
+        default=list,
+        blank=True,
+        help_text="IDs dos contratos de uma exportação em lote, em ordem",
+    )
+    report_model = models.CharField(verbose_name="Modelo", max_length=32)
+    start_date = models.DateField(verbose_name="Data inicial")
+    end_date = models.DateField(verbose_name="Data final")
+    responsibles = models.JSONField(
+        verbose_name="Responsáveis",
+        default=list,
+        blank=True,
+        help_text="Lista de {user_id, interest_label} impressa no rodapé",
+    )
+    status = models.CharField(
+        verbose_name="Status",
+        max_length=10,
+        choices=StatusChoices,
+        default=StatusChoices.PENDING,
+    )
+    filename = models.CharField(verbose_name="Nome do arquivo", max_length=255)
+    file = models.FileField(
+        verbose_name="Arquivo",
+        upload_to="reports/jobs/%Y/%m/",
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name="Erro",
+        blank=True,
+        default="",
+        help_text="Traceback da falha, para depuração — nunca exibido ao usuário",
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Solicitado por",
+        related_name="report_jobs",
+        on_delete=models.CASCADE,
+    )
+    started_at = models.DateTimeField(verbose_name="Iniciado em", null=True, blank=True)
+    finished_at = models.DateTimeField(
+        verbose_name="Finalizado em", null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = "Geração de Relatório"
+        verbose_name_plural = "Gerações de Relatórios"
+        ordering = ("-created_at",)
+        indexes = [
+            # The worker's claim query: oldest pending job first.
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.get_status_display()})"
+
+    @property
+    def is_batch(self) -> bool:
+        return self.contract_id is None
+
+    @property
+    def content_type(self) -> str:
+        return "application/zip" if self.is_batch else "application/pdf"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in {self.StatusChoices.DONE, self.StatusChoices.FAILED}
@@ -1,6 +1,18 @@
-from datetime import date, datetime
-
+import logging
+import tempfile
+import traceback
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from easy_tenants import tenant_context, tenant_context_disabled
+
+from accounts.models import User
 from contracts.models import Contract
+from reports.cache import get_cached_report, report_cache_key, store_report
 from reports.exporters import (
     ConsolidatedPDFExporter,
     PassOn1PDFExporter,
@@ -20,6 +32,11 @@ from reports.exporters import (
     PeriodEpensesPDFExporter,
     PredictedVersusRealizedPDFExporter,
 )
+from reports.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
 
 
 def export_pass_on_1(contract: Contract, start_date: date, end_date: date):
@@ -309,3 +326,218 @@ def export_report(
 
         case _:
             raise ValueError(f"Report model {report_model} is not a valid option")
+
+
+def build_report_filename(report_model: str, contract: Contract) -> str:
+    """Slug-based filename — no spaces, no accents, stable across platforms."""
+    return (
+        f"{slugify(report_model)}-{slugify(contract.name_with_code)}"
+        f"-{timezone.now().strftime('%Y-%m-%d')}.pdf"
+    )
+
+
+def render_report(
+    contract: Contract,
+    start_date: datetime,
+    end_date: datetime,
+    report_model: str,
+    responsibles: list,
+) -> str:
+    """Storage name of the report's PDF, rendering it only on a cache miss."""
+    key = report_cache_key(contract, start_date, end_date, report_model, responsibles)
+    cached = get_cached_report(key)
+    if cached:
+        return cached
+
+    report = export_report(
+        contract=contract,
+        start_date=start_date,
+        end_date=end_date,
+        report_model=report_model,
+        responsibles=responsibles,
+    )
+    # Spooled: a typical PDF never leaves memory, a year of a big contract
+    # rolls over to disk instead of being held whole next to fpdf's own copy.
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        report.output(spool)
+        spool.seek(0)
+        return store_report(key, File(spool))
+
+
+def enqueue_report_job(
+    contract: Contract,
+    start_date: datetime,
+    end_date: datetime,
+    report_model: str,
+    responsibles: list,
+    requested_by: User,
+    filename: str,
+) -> ReportJob:
+    """Record a report for `run_report_jobs` to render out of band.
+
+    Responsibles are stored by user id: the worker reloads them, so the row
+    stays plain JSON and a renamed user prints with the current name. When
+    the PDF is already cached the job is born DONE and never reaches the
+    worker. With `BACKGROUND_JOBS_INLINE` it is rendered before returning.
+    """
+    job = ReportJob(
+        contract=contract,
+        report_model=report_model,
+        start_date=start_date.date(),
+        end_date=end_date.date(),
+        responsibles=[
+            {
+                "user_id": str(responsible["user"].pk),
+                "interest_label": str(responsible["interest_label"]),
+            }
+            for responsible in responsibles
+        ],
+        requested_by=requested_by,
+        filename=filename,
+    )
+
+    cached = get_cached_report(
+        report_cache_key(contract, start_date, end_date, report_model, responsibles)
+    )
+    if cached:
+        job.file.name = cached
+        job.status = ReportJob.StatusChoices.DONE
+        job.started_at = job.finished_at = timezone.now()
+
+    job.save()
+    return _run_inline(job)
+
+
+def enqueue_batch_report_job(
+    contracts,
+    start_date: datetime,
+    end_date: datetime,
+    report_model: str,
+    requested_by: User,
+    filename: str,
+) -> ReportJob:
+    """Record a batch export for `run_report_jobs` to bundle out of band.
+
+    The contracts are resolved here, where the requesting user's access
+    filter applies, and stored by id in the order they go into the ZIP.
+    """
+    job = ReportJob.objects.create(
+        contracts=[str(pk) for pk in contracts.values_list("pk", flat=True)],
+        report_model=report_model,
+        start_date=start_date.date(),
+        end_date=end_date.date(),
+        requested_by=requested_by,
+        filename=filename,
+    )
+    return _run_inline(job)
+
+
+def _run_inline(job: ReportJob) -> ReportJob:
+    """Render a pending job in this process when no worker is deployed.
+
+    The batch is rendered without a process pool: each child would set
+    Django up again inside the request.
+    """
+    if job.status != ReportJob.StatusChoices.PENDING:
+        return job
+    if not settings.BACKGROUND_JOBS_INLINE:
+        return job
+
+    job.status = ReportJob.StatusChoices.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at", "updated_at"])
+    return run_report_job(job, max_workers=1)
+
+
+def _render_batch(job: ReportJob, max_workers: int) -> None:
+    from reports.batch import export_batch
+
+    order = {pk: index for index, pk in enumerate(job.contracts)}
+    contracts = sorted(
+        Contract.objects.filter(pk__in=job.contracts),
+        key=lambda contract: order[str(contract.pk)],
+    )
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        export_batch(
+            contracts,
+            report_model=job.report_model,
+            start_date=datetime.combine(job.start_date, time.min),
+            end_date=datetime.combine(job.end_date, time.min),
+            output=spool,
+            max_workers=max_workers,
+        )
+        spool.seek(0)
+        job.file.save(job.filename, File(spool), save=False)
+
+
+def claim_next_report_job() -> ReportJob | None:
+    """Move the oldest pending job to RUNNING and return it.
+
+    `skip_locked` lets several workers poll the same table: a row another
+    worker is claiming is skipped instead of waited on, so no job is
+    rendered twice.
+    """
+    with tenant_context_disabled(), transaction.atomic():
+        job = (
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ReportJob.StatusChoices.PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = ReportJob.StatusChoices.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at", "updated_at"])
+        return job
+
+
+def _job_responsibles(job: ReportJob) -> list:
+    users = {
+        str(pk): user
+        for pk, user in User.objects.in_bulk(
+            [responsible["user_id"] for responsible in job.responsibles]
+        ).items()
+    }
+    return [
+        {
+            "user": users[responsible["user_id"]],
+            "interest_label": responsible["interest_label"],
+        }
+        for responsible in job.responsibles
+        if responsible["user_id"] in users
+    ]
+
+
+def run_report_job(job: ReportJob, max_workers: int | None = None) -> ReportJob:
+    """Render a claimed job and store its PDF, or ZIP, or mark it FAILED.
+
+    `max_workers` bounds the batch's process pool; defaults to
+    `REPORT_BATCH_MAX_WORKERS`.
+    """
+    if max_workers is None:
+        max_workers = settings.REPORT_BATCH_MAX_WORKERS
+    with tenant_context(job.organization):
+        try:
+            if job.is_batch:
+                _render_batch(job, max_workers)
+            else:
+                job.file.name = render_report(
+                    contract=job.contract,
+                    start_date=datetime.combine(job.start_date, time.min),
+                    end_date=datetime.combine(job.end_date, time.min),
+                    report_model=job.report_model,
+                    responsibles=_job_responsibles(job),
+                )
+            job.status = ReportJob.StatusChoices.DONE
+        except Exception:
+            # Whatever broke, the page must stop polling: record the failure
+            # on the row instead of leaving it RUNNING forever.
+            logger.exception("Report job %s failed", job.pk)
+            job.status = ReportJob.StatusChoices.FAILED
+            job.error = traceback.format_exc()
+
+        job.finished_at = timezone.now()
+        job.save()
+        return job
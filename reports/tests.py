@@ -1 +1,804 @@
-# Create your tests here.
+import copy
+import datetime
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+import zipfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from easy_tenants import tenant_context, tenant_context_disabled
+from fpdf import FPDF
+
+from accountability.models import Expense, Revenue
+from accounts.models import User
+from bank.models import Transaction
+from contracts.choices import NatureCategories
+from contracts.models import Contract, ContractAddendum
+from reports import batch
+from reports.cache import report_cache_key
+from reports.exporters.commons.dataset import (
+    EXPENSE_CATEGORIES,
+    PLANNED,
+    TOTAL,
+    UNPLANNED,
+    ReportDataset,
+)
+from reports.exporters.commons.fonts import attach_fonts
+from reports.exporters.commons.streaming_table import StreamingTable
+from reports.exporters.period_expenses import PeriodEpensesPDFExporter
+from reports.management.commands.benchmark_reports import seed_synthetic_rows
+from reports.models import ReportJob
+from reports.services import export_report, render_report
+from reports.views import DOWNLOAD_URL_MAX_AGE
+from utils.series import month_starts, monthly_totals, period_totals
+
+START_DATE = datetime.datetime(2026, 1, 1)
+END_DATE = datetime.datetime(2026, 12, 31)
+
+
+class ReportTestMixin:
+    """Seeded contract 1001 with the authorities every RP annex prints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_dev", verbosity=0)
+        cls.user = User.objects.get(email="admin@admin.com")
+        with tenant_context(cls.user.organization):
+            contract = Contract.objects.get(internal_code=1001)
+            contract.supervision_autority = cls.user
+            contract.accountability_autority = cls.user
+            contract.save()
+
+    def get_contract(self):
+        # Fresh instance per call so no FK cache leaks between measurements.
+        return Contract.objects.get(internal_code=1001)
+
+
+class ReportDatasetTests(ReportTestMixin, TestCase):
+    def test_revenue_totals_match_one_aggregate_per_nature(self):
+        with tenant_context(self.user.organization):
+            dataset = ReportDataset(self.get_contract(), START_DATE, END_DATE)
+            totals = dataset.revenue_totals
+
+            for nature in Revenue.Nature:
+                expected = dataset.revenue_queryset.filter(
+                    revenue_nature=nature
+                ).aggregate(total=Sum("value"))["total"] or Decimal("0.00")
+                self.assertEqual(totals[nature], expected, nature)
+
+        self.assertEqual(totals[TOTAL], Decimal("165000.00"))
+
+    def test_expense_totals_match_one_aggregate_per_category(self):
+        with tenant_context(self.user.organization):
+            dataset = ReportDataset(self.get_contract(), START_DATE, END_DATE)
+            totals = dataset.expense_totals
+
+            for category in EXPENSE_CATEGORIES:
+                expected = dataset.expense_queryset.filter(
+                    nature__in=getattr(NatureCategories, category)
+                ).aggregate(total=Sum("value"))["total"] or Decimal("0.00")
+                self.assertEqual(totals[category], expected, category)
+
+            self.assertEqual(
+                totals[PLANNED] + totals[UNPLANNED],
+                dataset.expense_queryset.aggregate(total=Sum("value"))["total"],
+            )
+
+    def test_each_family_of_totals_costs_one_query(self):
+        with tenant_context(self.user.organization):
+            dataset = ReportDataset(self.get_contract(), START_DATE, END_DATE)
+            dataset.checking_account
+            dataset.investing_account
+
+            with self.assertNumQueries(4):
+                dataset.revenue_totals
+                dataset.expense_totals
+                dataset.statement_balances
+                dataset.transaction_totals
+
+            with self.assertNumQueries(0):
+                dataset.revenue_totals
+                dataset.expense_totals
+
+    def test_expenses_outside_the_contract_do_not_leak_into_totals(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            expense = Expense.objects.filter(
+                accountability__contract=contract, liquidation__isnull=False
+            ).first()
+            other_contract = Contract.objects.exclude(pk=contract.pk).first()
+            other_accountability = other_contract.accountabilities.create(
+                month=expense.accountability.month,
+                year=expense.accountability.year,
+            )
+            Expense.objects.create(
+                accountability=other_accountability,
+                source=expense.source,
+                identification="Despesa de outro contrato",
+                value=Decimal("999.00"),
+                competency=expense.competency,
+                liquidation=expense.liquidation,
+                planned=False,
+            )
+
+            totals = ReportDataset(contract, START_DATE, END_DATE).expense_totals
+
+        self.assertEqual(totals[UNPLANNED], Decimal("0.00"))
+
+
+class ReportExporterQueryCountTests(ReportTestMixin, TestCase):
+    """Upper bounds on round trips per PDF, so a per-row or per-nature
+    aggregate creeping back into an exporter fails loudly."""
+
+    QUERY_BUDGETS = {
+        "rp_1": 12,
+        "rp_3": 7,
+        "rp_4": 5,
+        "rp_5": 7,
+        "rp_6": 12,
+        "rp_7": 7,
+        "rp_8": 12,
+        "rp_9": 7,
+        "rp_10": 12,
+        "rp_11": 7,
+        "rp_12": 12,
+        "rp_13": 7,
+        "rp_14": 12,
+        "consolidated": 13,
+        "predicted_versus_realized": 2,
+        "period_expenses": 6,
+    }
+
+    def test_exporters_stay_within_query_budget(self):
+        with tenant_context(self.user.organization):
+            for report_model, budget in self.QUERY_BUDGETS.items():
+                with self.subTest(report_model=report_model):
+                    contract = self.get_contract()
+                    with CaptureQueriesContext(connection) as context:
+                        export_report(
+                            contract=contract,
+                            start_date=START_DATE,
+                            end_date=END_DATE,
+                            report_model=report_model,
+                            responsibles=[],
+                        )
+                    self.assertLessEqual(len(context.captured_queries), budget)
+
+
+    def test_rp_2_queries_do_not_grow_with_paid_expenses(self):
+        counts = []
+        with tenant_context(self.user.organization):
+            for count in (5, 50):
+                seed_synthetic_rows(
+                    self.get_contract(), revenues=0, expenses=count, transactions=0
+                )
+                Expense.objects.filter(
+                    identification__startswith="Despesa sintética"
+                ).update(paid=True)
+                with CaptureQueriesContext(connection) as context:
+                    export_report(
+                        contract=self.get_contract(),
+                        start_date=START_DATE,
+                        end_date=END_DATE,
+                        report_model="rp_2",
+                        responsibles=[],
+                    )
+                counts.append(len(context.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class MonthlySeriesTests(ReportTestMixin, TestCase):
+    def test_monthly_totals_are_dense_and_match_per_month_sums(self):
+        with tenant_context(self.user.organization):
+            revenues = Revenue.objects.filter(
+                accountability__contract=self.get_contract()
+            )
+            start, end = datetime.date(2025, 11, 1), datetime.date(2026, 6, 30)
+
+            with self.assertNumQueries(1):
+                series = monthly_totals(revenues, "receive_date", start, end)
+
+            self.assertEqual(list(series), month_starts(start, end))
+            self.assertTrue(any(series.values()))
+            for month, total in series.items():
+                expected = revenues.filter(
+                    receive_date__year=month.year, receive_date__month=month.month
+                ).aggregate(total=Sum("value"))["total"]
+                self.assertEqual(total, expected or Decimal("0.00"))
+
+    def test_period_totals_group_by_accountability_month(self):
+        with tenant_context(self.user.organization):
+            expenses = Expense.objects.filter(
+                accountability__contract=self.get_contract()
+            )
+            series = period_totals(
+                expenses,
+                datetime.date(2026, 1, 1),
+                datetime.date(2026, 12, 31),
+                year_field="accountability__year",
+                month_field="accountability__month",
+            )
+
+            self.assertEqual(len(series), 12)
+            self.assertEqual(
+                sum(series.values()), expenses.aggregate(Sum("value"))["value__sum"]
+            )
+            self.assertEqual(series[datetime.date(2026, 1, 1)], Decimal("0.00"))
+
+
+class ReconciliationDiffTests(ReportTestMixin, TestCase):
+    def diff(self):
+        return ReportDataset(self.get_contract(), START_DATE, END_DATE).reconciliation
+
+    def test_links_remove_lines_from_both_sides(self):
+        with tenant_context(self.user.organization):
+            before = self.diff()
+            payroll = Expense.objects.get(identification="Folha equipe técnica 02/2026")
+            transfer = Revenue.objects.get(identification="Repasse municipal 02/2026")
+            payroll_line = Transaction.objects.get(transaction_number="VP202602010")
+            transfer_line = Transaction.objects.get(transaction_number="VP202602001")
+            payroll.bank_transactions.add(payroll_line)
+            transfer_line.revenue = transfer
+            transfer_line.save()
+
+            dataset = ReportDataset(self.get_contract(), START_DATE, END_DATE)
+            dataset.accounts_filter
+            # One anti-join query per side, however many lines the accounts hold.
+            with self.assertNumQueries(3):
+                after = dataset.reconciliation
+
+        self.assertEqual(
+            len(after.unmatched_transactions), len(before.unmatched_transactions) - 2
+        )
+        self.assertEqual(
+            len(after.unmatched_entries), len(before.unmatched_entries) - 2
+        )
+        descriptions = [entry.description for entry in after.unmatched_entries]
+        self.assertNotIn(f"Despesa: {payroll.identification}", descriptions)
+        self.assertIn("Despesa: Folha equipe técnica 03/2026", descriptions)
+
+    def test_link_outside_period_keeps_entry_unmatched(self):
+        with tenant_context(self.user.organization):
+            payroll = Expense.objects.get(identification="Folha equipe técnica 02/2026")
+            line = Transaction.objects.get(transaction_number="VP202602010")
+            line.date = datetime.date(2027, 1, 7)
+            line.save()
+            payroll.bank_transactions.add(line)
+
+            diff = self.diff()
+
+        self.assertIn(
+            f"Despesa: {payroll.identification}",
+            [entry.description for entry in diff.unmatched_entries],
+        )
+
+
+class StreamingTableTests(TestCase):
+    HEADINGS = ["Item", "Identificação da Despesa", "Valor"]
+
+    def rows(self, count):
+        for i in range(count):
+            yield [f"Item {i}", f"Despesa sintética de número {i}", "R$ 1.234,56"]
+
+    def test_headings_repeat_on_every_page(self):
+        pdf = FPDF()
+        pdf.add_page()
+        attach_fonts(pdf)
+        table = StreamingTable(pdf, self.HEADINGS, col_widths=[40, 20, 30])
+
+        with patch.object(
+            table, "_draw_headings", wraps=table._draw_headings
+        ) as draw_headings:
+            written = table.write(self.rows(500))
+
+        self.assertEqual(written, 500)
+        self.assertGreater(pdf.page_no(), 1)
+        self.assertEqual(draw_headings.call_count, pdf.page_no())
+
+    def test_long_text_wraps_inside_the_column(self):
+        pdf = FPDF()
+        pdf.add_page()
+        attach_fonts(pdf)
+        pdf.set_font("FreeSans", "", 7)
+        table = StreamingTable(pdf, self.HEADINGS, col_widths=[40, 20, 30])
+
+        lines = table._wrap("Transferência eletrônica entre contas " * 3, 20)
+
+        self.assertGreater(len(lines), 1)
+        for line in lines:
+            self.assertLessEqual(pdf.get_string_width(line), 20 - 2 * pdf.c_margin)
+        self.assertEqual(table._wrap("Supercalifragilístico" * 3, 10)[0][:5], "Super")
+
+
+class PeriodExpensesStreamingTests(ReportTestMixin, TestCase):
+    SYNTHETIC_EXPENSES = 100_000
+
+    def test_expense_rows_stream_in_bounded_memory(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            template = Expense.objects.filter(accountability__contract=contract).first()
+            template.due_date = datetime.date(2026, 3, 1)
+            expenses = []
+            # Copying one instance is much cheaper than 100k `Expense(...)`.
+            for i in range(self.SYNTHETIC_EXPENSES):
+                expense = copy.copy(template)
+                expense.id = uuid.uuid4()
+                expense.identification = f"Despesa sintética {i}"
+                expenses.append(expense)
+            Expense.objects.bulk_create(expenses, batch_size=5000)
+            del expenses
+            exporter = PeriodEpensesPDFExporter(contract, START_DATE, END_DATE)
+
+            tracemalloc.start()
+            try:
+                count = sum(1 for _ in exporter._expense_rows())
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        self.assertGreaterEqual(count, self.SYNTHETIC_EXPENSES)
+        # Collected into a list, the 100k formatted rows take about 50 MiB;
+        # streamed, only one chunk is alive at a time.
+        self.assertLess(peak, 32 * 1024 * 1024)
+
+
+class TemporaryMediaMixin:
+    """Point the default storage at a throwaway MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+
+class ReportCacheTests(ReportTestMixin, TemporaryMediaMixin, TestCase):
+    def render(self, contract, responsibles=()):
+        return render_report(
+            contract=contract,
+            start_date=START_DATE,
+            end_date=END_DATE,
+            report_model="rp_1",
+            responsibles=list(responsibles),
+        )
+
+    def test_second_render_is_served_from_storage(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            name = self.render(contract)
+
+            with patch("reports.services.export_report") as export:
+                self.assertEqual(self.render(contract), name)
+            export.assert_not_called()
+
+    def test_key_changes_with_responsibles(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            responsible = {"user": self.user, "interest_label": "Gestor"}
+            self.assertNotEqual(
+                report_cache_key(contract, START_DATE, END_DATE, "rp_1", []),
+                report_cache_key(contract, START_DATE, END_DATE, "rp_1", [responsible]),
+            )
+
+    def test_editing_a_row_invalidates_the_cached_pdf(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            before = self.render(contract)
+
+            revenue = Revenue.objects.filter(accountability__contract=contract)[0]
+            revenue.value += Decimal("1.00")
+            revenue.save()
+
+            self.assertNotEqual(self.render(contract), before)
+
+    def test_soft_deleting_a_row_invalidates_the_key(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            before = report_cache_key(contract, START_DATE, END_DATE, "rp_1", [])
+
+            Expense.objects.filter(accountability__contract=contract)[0].delete()
+
+            self.assertNotEqual(
+                report_cache_key(contract, START_DATE, END_DATE, "rp_1", []),
+                before,
+            )
+
+    def test_renaming_a_favored_invalidates_the_cached_pdf(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            before = self.render(contract)
+
+            favored = Expense.objects.filter(accountability__contract=contract)[
+                0
+            ].favored
+            favored.name = "Fornecedor Renomeado"
+            favored.save()
+
+            self.assertNotEqual(self.render(contract), before)
+
+    def test_adding_an_addendum_invalidates_the_key(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            before = report_cache_key(contract, START_DATE, END_DATE, "rp_8", [])
+
+            ContractAddendum.objects.create(
+                organization=contract.organization,
+                contract=contract,
+                start_of_vigency=START_DATE,
+                end_of_vigency=END_DATE,
+                total_value=Decimal("1000.00"),
+            )
+
+            self.assertNotEqual(
+                report_cache_key(contract, START_DATE, END_DATE, "rp_8", []),
+                before,
+            )
+
+    def test_key_changes_with_the_day(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            today = report_cache_key(contract, START_DATE, END_DATE, "rp_3", [])
+
+            with patch("reports.cache.date") as fake_date:
+                fake_date.today.return_value = datetime.date(2099, 1, 1)
+                tomorrow = report_cache_key(contract, START_DATE, END_DATE, "rp_3", [])
+
+            self.assertNotEqual(today, tomorrow)
+
+    def test_rp_1_key_covers_the_city_hall_contracts(self):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+            other = (
+                Contract.objects.filter(area__city_hall=contract.area.city_hall)
+                .exclude(pk=contract.pk)
+                .first()
+            )
+            before_rp_1 = report_cache_key(contract, START_DATE, END_DATE, "rp_1", [])
+            before_rp_3 = report_cache_key(contract, START_DATE, END_DATE, "rp_3", [])
+
+            other.total_value += Decimal("1.00")
+            other.save()
+
+            self.assertNotEqual(
+                report_cache_key(contract, START_DATE, END_DATE, "rp_1", []),
+                before_rp_1,
+            )
+            self.assertEqual(
+                report_cache_key(contract, START_DATE, END_DATE, "rp_3", []),
+                before_rp_3,
+            )
+
+
+class ReportJobTests(ReportTestMixin, TemporaryMediaMixin, TestCase):
+    AJAX_HEADERS = {
+        "HTTP_X_REQUESTED_WITH": "XMLHttpRequest",
+        "HTTP_ACCEPT": "application/json",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def post_report(self, report_model="rp_1", ajax=True, **extra):
+        with tenant_context(self.user.organization):
+            contract = self.get_contract()
+        return self.client.post(
+            reverse("reports:reports-generate-api"),
+            {
+                "contract": contract.pk,
+                "report_model": report_model,
+                "start_month": 1,
+                "start_year": 2026,
+                "end_month": 12,
+                "end_year": 2026,
+                "responsibles-TOTAL_FORMS": 0,
+                "responsibles-INITIAL_FORMS": 0,
+                **extra,
+            },
+            **(self.AJAX_HEADERS if ajax else {}),
+        )
+
+    def test_ajax_post_queues_a_job_without_rendering(self):
+        response = self.post_report()
+
+        self.assertEqual(response.status_code, 202)
+        with tenant_context(self.user.organization):
+            job = ReportJob.objects.get(pk=response.json()["job_id"])
+        self.assertEqual(job.status, ReportJob.StatusChoices.PENDING)
+        self.assertEqual(job.start_date, datetime.date(2026, 1, 1))
+        self.assertEqual(job.end_date, datetime.date(2026, 12, 31))
+        self.assertFalse(job.file)
+
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(status["status"], ReportJob.StatusChoices.PENDING)
+        self.assertFalse(status["finished"])
+
+    def test_worker_renders_the_job_and_the_pdf_can_be_downloaded(self):
+        status_url = self.post_report().json()["status_url"]
+
+        call_command("run_report_jobs", once=True, stdout=StringIO())
+
+        status = self.client.get(status_url).json()
+        self.assertTrue(status["finished"])
+        self.assertTrue(status["success"])
+        self.assertEqual(status["report_model"], "rp_1")
+
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    @override_settings(BACKGROUND_JOBS_INLINE=True)
+    def test_inline_jobs_are_rendered_without_a_worker(self):
+        status = self.client.get(self.post_report().json()["status_url"]).json()
+
+        self.assertTrue(status["finished"])
+        self.assertTrue(status["success"])
+        download = self.client.get(status["download_url"])
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    def test_failed_job_reports_a_generic_message(self):
+        status_url = self.post_report().json()["status_url"]
+        with tenant_context(self.user.organization):
+            ReportJob.objects.update(report_model="unknown")
+
+        call_command("run_report_jobs", once=True, stdout=StringIO())
+
+        status = self.client.get(status_url).json()
+        self.assertTrue(status["finished"])
+        self.assertFalse(status["success"])
+        self.assertNotIn("unknown", status["message"])
+        with tenant_context(self.user.organization):
+            self.assertIn("ValueError", ReportJob.objects.get().error)
+
+    def test_jobs_are_only_visible_to_who_requested_them(self):
+        status_url = self.post_report().json()["status_url"]
+        other_user = User.objects.exclude(pk=self.user.pk).first()
+        self.client.force_login(other_user)
+
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+    def test_cached_report_skips_the_queue(self):
+        self.post_report()
+        call_command("run_report_jobs", once=True, stdout=StringIO())
+
+        response = self.post_report()
+
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(status["status"], ReportJob.StatusChoices.DONE)
+        self.assertIn("download_url", status)
+
+    def test_download_url_expires(self):
+        status_url = self.post_report().json()["status_url"]
+        call_command("run_report_jobs", once=True, stdout=StringIO())
+        download_url = self.client.get(status_url).json()["download_url"]
+
+        expired = time.time() + DOWNLOAD_URL_MAX_AGE + 1
+        with patch("django.core.signing.time.time", return_value=expired):
+            self.assertEqual(self.client.get(download_url).status_code, 404)
+
+        bare_url = download_url.split("?")[0]
+        self.assertEqual(self.client.get(bare_url).status_code, 404)
+
+    def test_direct_post_streams_the_pdf(self):
+        response = self.post_report(ajax=False, download="1")
+
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+
+class ReportBatchExportTests(ReportTestMixin, TemporaryMediaMixin, TestCase):
+    def test_failing_contract_does_not_sink_the_batch(self):
+        render = batch._render_contract
+
+        def flaky(task, *args):
+            if task.label.startswith("1002"):
+                raise ValueError("sem contas")
+            return render(task, *args)
+
+        with tenant_context(self.user.organization):
+            contracts = list(Contract.objects.order_by("internal_code"))
+            output = BytesIO()
+            with patch("reports.batch._render_contract", side_effect=flaky):
+                result = batch.export_batch(
+                    contracts, "rp_1", START_DATE, END_DATE, output
+                )
+
+        self.assertEqual(len(result.exported), len(contracts) - 1)
+        self.assertEqual(len(result.failed), 1)
+        with zipfile.ZipFile(output) as archive:
+            names = archive.namelist()
+            self.assertIn(batch.ERRORS_FILENAME, names)
+            self.assertIn("sem contas", archive.read(batch.ERRORS_FILENAME).decode())
+            pdfs = [name for name in names if name.endswith(".pdf")]
+            self.assertEqual(len(pdfs), len(contracts) - 1)
+            self.assertTrue(archive.read(pdfs[0]).startswith(b"%PDF"))
+
+    def test_command_covers_every_organization_of_the_city_hall(self):
+        city_hall = self.user.organization.city_hall
+        with tenant_context_disabled():
+            expected = Contract.objects.filter(
+                organization__city_hall=city_hall
+            ).count()
+        path = f"{settings.MEDIA_ROOT}/batch.zip"
+
+        call_command(
+            "export_city_hall_reports",
+            str(city_hall.pk),
+            "rp_1",
+            start="2026-01",
+            end="2026-12",
+            output=path,
+            workers=1,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+        with zipfile.ZipFile(path) as archive:
+            entries = [n for n in archive.namelist() if n != batch.ERRORS_FILENAME]
+        self.assertEqual(len(entries), expected)
+
+    # Spawned workers cannot see the in-memory test database.
+    @override_settings(REPORT_BATCH_MAX_WORKERS=1)
+    def test_view_queues_a_zip_of_the_users_contracts(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("reports:reports-batch-export"),
+            {
+                "report_model": "rp_1",
+                "start_month": 1,
+                "start_year": 2026,
+                "end_month": 12,
+                "end_year": 2026,
+            },
+        )
+
+        self.assertEqual(response.status_code, 202)
+        with tenant_context(self.user.organization):
+            job = ReportJob.objects.get(pk=response.json()["job_id"])
+        self.assertTrue(job.is_batch)
+        self.assertEqual(job.status, ReportJob.StatusChoices.PENDING)
+
+        call_command("run_report_jobs", once=True, stdout=StringIO())
+
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertTrue(status["success"])
+        self.assertTrue(status["batch"])
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download["Content-Type"], "application/zip")
+        content = BytesIO(b"".join(download.streaming_content))
+        with zipfile.ZipFile(content) as archive:
+            self.assertEqual(len(archive.namelist()), len(job.contracts))
+            self.assertNotIn(batch.ERRORS_FILENAME, archive.namelist())
+
+
+    @override_settings(BACKGROUND_JOBS_INLINE=True, REPORT_BATCH_MAX_WORKERS=2)
+    def test_inline_batch_is_rendered_without_a_pool(self):
+        self.client.force_login(self.user)
+
+        with patch("reports.batch.export_batch", wraps=batch.export_batch) as export:
+            response = self.client.post(
+                reverse("reports:reports-batch-export"),
+                {
+                    "report_model": "rp_1",
+                    "start_month": 1,
+                    "start_year": 2026,
+                    "end_month": 12,
+                    "end_year": 2026,
+                },
+            )
+
+        self.assertEqual(export.call_args.kwargs["max_workers"], 1)
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertTrue(status["success"])
+        self.assertTrue(status["batch"])
+
+
+class FontRegistryTests(TestCase):
+    CREATION_DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+
+    def render(self, load_fonts, text="Prestação de contas"):
+        pdf = FPDF()
+        pdf.add_page()
+        load_fonts(pdf)
+        pdf.set_font("FreeSans", "", 10)
+        pdf.cell(text=text)
+        pdf.set_font("FreeSans", "B", 10)
+        pdf.cell(text="Órgão concessor")
+        pdf.creation_date = self.CREATION_DATE
+        return pdf, bytes(pdf.output())
+
+    def test_output_matches_add_font(self):
+        def add_font(pdf):
+            for style, filename in (("", "FreeSans.ttf"), ("B", "FreeSansBold.ttf")):
+                pdf.add_font(
+                    "FreeSans", style, f"{settings.BASE_DIR}/static/fonts/{filename}"
+                )
+
+        _, expected = self.render(add_font)
+        _, attached = self.render(attach_fonts)
+
+        self.assertEqual(attached, expected)
+
+    def test_documents_get_their_own_subset(self):
+        first, _ = self.render(attach_fonts, text="ação")
+        second, _ = self.render(attach_fonts, text="abc")
+
+        self.assertIsNot(
+            first.fonts["freesans"].ttfont, second.fonts["freesans"].ttfont
+        )
+        self.assertGreater(
+            len(first.fonts["freesans"].subset), len(second.fonts["freesans"].subset)
+        )
+
+
+class BenchmarkReportsCommandTests(TestCase):
+    def test_emits_measurements_and_rolls_back(self):
+        out = StringIO()
+        call_command(
+            "benchmark_reports",
+            revenues=30,
+            expenses=30,
+            transactions=30,
+            models=["rp_1", "rp_13"],
+            repeat=1,
+            stdout=out,
+        )
+
+        payload = json.loads(out.getvalue())
+        self.assertEqual(
+            payload["sizes"], {"revenues": 30, "expenses": 30, "transactions": 30}
+        )
+        self.assertEqual(
+            [result["report_model"] for result in payload["results"]],
+            ["rp_1", "rp_13"],
+        )
+        for result in payload["results"]:
+            self.assertNotIn("error", result)
+            self.assertGreater(result["queries"], 0)
+            self.assertGreater(result["pdf_bytes"], 0)
+        self.assertGreater(payload["results"][0]["peak_memory_kb"], 0)
+        with tenant_context_disabled():
+            self.assertFalse(Contract.objects.exists())
+
+    def test_fonts_option_times_the_constructor_fonts_only(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command("benchmark_reports", fonts=True, repeat=2, stdout=out)
+
+        payload = json.loads(out.getvalue())
+        self.assertEqual(set(payload["fonts"]), {"add_font", "attach_fonts"})
+        for result in payload["fonts"].values():
+            self.assertEqual(len(result["wall_ms_runs"]), 2)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_synthetic_rows_are_inserted(self):
+        call_command("seed_dev", verbosity=0)
+        user = User.objects.get(email="admin@admin.com")
+        with tenant_context(user.organization):
+            contract = Contract.objects.get(internal_code=1001)
+            counts = (Revenue.objects.count(), Expense.objects.count())
+
+            seed_synthetic_rows(contract, revenues=7, expenses=5, transactions=3)
+
+            self.assertEqual(
+                (Revenue.objects.count(), Expense.objects.count()),
+                (counts[0] + 7, counts[1] + 5),
+            )
+            self.assertEqual(Transaction.objects.filter(name="Benchmark").count(), 3)
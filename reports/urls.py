@@ -1,8 +1,21 @@
 from django.urls import path
 
-from reports.views import ReportGenerateAPIView, ReportsView
+from reports.views import (
+    ReportBatchExportView,
+    ReportGenerateAPIView,
+    ReportJobDownloadView,
+    ReportJobStatusView,
+    ReportsView,
+)
 
 urlpatterns = [
     path("", ReportsView.as_view(), name="reports-page"),
     path("generate/", ReportGenerateAPIView.as_view(), name="reports-generate-api"),
+    path("batch/", ReportBatchExportView.as_view(), name="reports-batch-export"),
+    path("jobs/<uuid:pk>/", ReportJobStatusView.as_view(), name="report-job-status"),
+    path(
+        "jobs/<uuid:pk>/download/",
+        ReportJobDownloadView.as_view(),
+        name="report-job-download",
+    ),
 ]
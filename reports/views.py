@@ -1,30 +1,46 @@
-import base64
 import logging
-from io import BytesIO
 from typing import Any
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, JsonResponse
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 from django.utils.text import slugify
+from django.views import View
 from django.views.generic import TemplateView
 
 from contracts.models import Contract, ContractInterestedPart
-from reports.forms import REPORT_MODEL_LABELS, ReportForm
-from reports.services import export_report
+from reports.forms import REPORT_MODEL_LABELS, BatchReportForm, ReportForm
+from reports.models import ReportJob
+from reports.services import (
+    build_report_filename,
+    enqueue_batch_report_job,
+    enqueue_report_job,
+    render_report,
+)
+from utils.mixins import UserAccessViewMixin
 
 logger = logging.getLogger(__name__)
 
+# The page fetches the PDF right after the job finishes; a link copied out of
+# the network tab should not outlive that.
+DOWNLOAD_URL_MAX_AGE = 5 * 60
+
+_download_signer = signing.TimestampSigner(salt="reports.job-download")
+
 GENERIC_FAILURE_MESSAGE = "Não foi possível gerar o relatório. Revise o contrato e o período e tente novamente."
 
 
-def build_report_filename(report_model: str, contract: Contract) -> str:
-    """Slug-based filename — no spaces, no accents, stable across platforms."""
-    return (
-        f"{slugify(report_model)}-{slugify(contract.name_with_code)}"
-        f"-{timezone.now().strftime('%Y-%m-%d')}.pdf"
-    )
+def build_download_url(job: ReportJob) -> str:
+    """Short-lived link to a finished job's PDF."""
+    token = _download_signer.sign(str(job.pk))
+    url = reverse("reports:report-job-download", kwargs={"pk": job.pk})
+    return f"{url}?{urlencode({'token': token})}"
 
 
 class ReportsView(LoginRequiredMixin, TemplateView):
@@ -85,23 +101,20 @@ class ReportsView(LoginRequiredMixin, TemplateView):
                             }
                         )
 
-            buffer = BytesIO()
-
             report_model = form.cleaned_data["report_model"]
-            report = export_report(
+            name = render_report(
                 contract=contract,
                 start_date=start_date,
                 end_date=end_date,
                 report_model=report_model,
                 responsibles=responsibles,
             )
-            report.output(buffer)
-
-            buffer.seek(0)
-
-            response = HttpResponse(buffer, content_type="application/pdf")
-            filename = build_report_filename(report_model, contract)
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            response = FileResponse(
+                default_storage.open(name, "rb"),
+                as_attachment=True,
+                filename=build_report_filename(report_model, contract),
+                content_type="application/pdf",
+            )
             response.set_cookie("fileDownload", "true", max_age=60)
             return response
 
@@ -159,22 +172,7 @@ class ReportGenerateAPIView(LoginRequiredMixin, TemplateView):
                             }
                         )
 
-            buffer = BytesIO()
             report_model = form.cleaned_data["report_model"]
-
-            report = export_report(
-                contract=contract,
-                start_date=start_date,
-                end_date=end_date,
-                report_model=report_model,
-                responsibles=responsibles,
-            )
-            report.output(buffer)
-            buffer.seek(0)
-
-            pdf_data = buffer.read()
-            pdf_base64 = base64.b64encode(pdf_data).decode("utf-8")
-
             filename = build_report_filename(report_model, contract)
 
             # Check if it's an AJAX request expecting JSON
@@ -185,34 +183,45 @@ class ReportGenerateAPIView(LoginRequiredMixin, TemplateView):
             )
 
             if is_ajax:
+                # Rendering a long period can take seconds; the page polls the
+                # job instead of holding one of the gunicorn threads meanwhile,
+                # unless BACKGROUND_JOBS_INLINE renders it right here.
+                job = enqueue_report_job(
+                    contract=contract,
+                    start_date=start_date,
+                    end_date=end_date,
+                    report_model=report_model,
+                    responsibles=responsibles,
+                    requested_by=request.user,
+                    filename=filename,
+                )
                 return JsonResponse(
                     {
                         "success": True,
-                        "pdf_data": pdf_base64,
-                        "filename": filename,
-                        "contract_name": contract.name_with_code,
-                        "report_model": report_model,
-                        "report_model_label": REPORT_MODEL_LABELS.get(
-                            report_model, report_model
+                        "job_id": str(job.pk),
+                        "status": job.status,
+                        "status_url": reverse(
+                            "reports:report-job-status", kwargs={"pk": job.pk}
                         ),
-                        "start_date": start_date.strftime("%d/%m/%Y"),
-                        "end_date": end_date.strftime("%d/%m/%Y"),
-                    }
+                    },
+                    status=202,
                 )
-            else:
-                # Return PDF directly (for new tab opening or download)
-                pdf_bytes = base64.b64decode(pdf_base64)
-                response = HttpResponse(pdf_bytes, content_type="application/pdf")
 
-                # Check if download is forced
-                if request.POST.get("download") == "1":
-                    response["Content-Disposition"] = (
-                        f'attachment; filename="{filename}"'
-                    )
-                else:
-                    response["Content-Disposition"] = f'inline; filename="{filename}"'
-
-                return response
+            # Return PDF directly (for new tab opening or download)
+            name = render_report(
+                contract=contract,
+                start_date=start_date,
+                end_date=end_date,
+                report_model=report_model,
+                responsibles=responsibles,
+            )
+            # Streamed from storage in chunks; `download=1` forces a download.
+            return FileResponse(
+                default_storage.open(name, "rb"),
+                as_attachment=request.POST.get("download") == "1",
+                filename=filename,
+                content_type="application/pdf",
+            )
 
         except (ValueError, AttributeError, TypeError, KeyError):
             # The exception text leaks internals (attribute names, model
@@ -225,3 +234,136 @@ class ReportGenerateAPIView(LoginRequiredMixin, TemplateView):
             return JsonResponse(
                 {"success": False, "message": GENERIC_FAILURE_MESSAGE}, status=500
             )
+
+
+class ReportJobStatusView(LoginRequiredMixin, View):
+    """Polled by the export page until the job is DONE or FAILED."""
+
+    login_url = "/auth/login"
+
+    def get(self, request, pk):
+        job = get_object_or_404(
+            ReportJob.objects.select_related("contract"),
+            pk=pk,
+            requested_by=request.user,
+        )
+        contract_name = (
+            f"{len(job.contracts)} contratos"
+            if job.is_batch
+            else job.contract.name_with_code
+        )
+        data = {
+            "success": job.status != ReportJob.StatusChoices.FAILED,
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_label": job.get_status_display(),
+            "finished": job.is_finished,
+        }
+
+        if job.status == ReportJob.StatusChoices.DONE:
+            data.update(
+                {
+                    "download_url": build_download_url(job),
+                    "filename": job.filename,
+                    "contract_name": contract_name,
+                    "batch": job.is_batch,
+                    "report_model": job.report_model,
+                    "report_model_label": REPORT_MODEL_LABELS.get(
+                        job.report_model, job.report_model
+                    ),
+                    "start_date": job.start_date.strftime("%d/%m/%Y"),
+                    "end_date": job.end_date.strftime("%d/%m/%Y"),
+                }
+            )
+        elif job.status == ReportJob.StatusChoices.FAILED:
+            # `job.error` holds the traceback; it stays in the admin.
+            data["message"] = GENERIC_FAILURE_MESSAGE
+
+        return JsonResponse(data)
+
+
+class ReportJobDownloadView(LoginRequiredMixin, View):
+    """Serve a finished job's PDF or ZIP, inline unless `?download=1`.
+
+    Only reachable through the signed URL from the status endpoint, which
+    expires after `DOWNLOAD_URL_MAX_AGE`.
+    """
+
+    login_url = "/auth/login"
+
+    def get(self, request, pk):
+        try:
+            signed_pk = _download_signer.unsign(
+                request.GET.get("token", ""), max_age=DOWNLOAD_URL_MAX_AGE
+            )
+        except signing.BadSignature:
+            raise Http404("Link de download expirado.")
+        if signed_pk != str(pk):
+            raise Http404("Link de download inválido.")
+
+        job = get_object_or_404(
+            ReportJob,
+            pk=pk,
+            requested_by=request.user,
+            status=ReportJob.StatusChoices.DONE,
+        )
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=request.GET.get("download") == "1",
+            filename=job.filename,
+            content_type=job.content_type,
+        )
+
+
+class ReportBatchExportView(UserAccessViewMixin, LoginRequiredMixin, View):
+    """Queue the chosen report for every contract the user can see, as a ZIP.
+
+    Contracts are already scoped to the user's organization — and so to its
+    city hall — by the tenant manager. `run_report_jobs` bundles them; the
+    page polls the job like a single report. The command
+    `export_city_hall_reports` covers every organization of a city hall.
+    """
+
+    login_url = "/auth/login"
+    apply_distinct = True
+
+    def post(self, request):
+        form = BatchReportForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse(
+                {
+                    "success": False,
+                    "errors": form.errors,
+                    "message": "Dados do formulário inválidos",
+                },
+                status=400,
+            )
+
+        report_model = form.cleaned_data["report_model"]
+        contracts = self.get_user_filtered_queryset(
+            Contract.objects.order_by("internal_code")
+        )
+        # A batch can take minutes: it is rendered by the worker, not by the
+        # gunicorn thread serving this request, unless BACKGROUND_JOBS_INLINE.
+        job = enqueue_batch_report_job(
+            contracts,
+            start_date=form.cleaned_data["start_date"],
+            end_date=form.cleaned_data["end_date"],
+            report_model=report_model,
+            requested_by=request.user,
+            filename=(
+                f"{slugify(report_model)}-contratos"
+                f"-{timezone.now().strftime('%Y-%m-%d')}.zip"
+            ),
+        )
+        return JsonResponse(
+            {
+                "success": True,
+                "job_id": str(job.pk),
+                "status": job.status,
+                "status_url": reverse(
+                    "reports:report-job-status", kwargs={"pk": job.pk}
+                ),
+            },
+            status=202,
+        )
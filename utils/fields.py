@@ -3,6 +3,8 @@ import re
 from django import forms
 from django.db import models
 
+from utils.widgets import MultipleFileFormWidget
+
 
 class LowerCaseEmailField(models.EmailField):
     def to_python(self, value):
@@ -29,3 +31,17 @@ class DecimalMaskedField(forms.DecimalField):
         if isinstance(value, str):
             value = re.sub(r"\.", "", value).replace(",", ".")
         return super().to_python(value)
+
+
+class MultipleFileField(forms.FileField):
+    """File field over a `multiple` input; cleans to a list of files."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("widget", MultipleFileFormWidget())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        clean_file = super().clean
+        if isinstance(data, (list, tuple)):
+            return [clean_file(item, initial) for item in data]
+        return [clean_file(data, initial)]
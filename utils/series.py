@@ -0,0 +1,93 @@
+"""Monthly time series computed with one grouped query.
+
+Both helpers return a dense, ordered ``{first day of month: value}`` mapping
+covering every month between the two dates, with ``default`` for months that
+have no rows — callers iterate it directly instead of running one aggregate
+per month.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Aggregate, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+
+from utils.formats import get_month_range
+
+ZERO = Decimal("0.00")
+
+
+def month_starts(start_date: date, end_date: date) -> list[date]:
+    """First day of each month from `start_date` to `end_date`, inclusive."""
+    return [
+        date(year, month, 1) for month, year in get_month_range(start_date, end_date)
+    ]
+
+
+def monthly_totals(
+    queryset: QuerySet,
+    date_field: str,
+    start_date: date,
+    end_date: date,
+    aggregate: Aggregate | None = None,
+    default=ZERO,
+) -> dict[date, Decimal]:
+    """Aggregate `queryset` per calendar month of `date_field` (a DateField).
+
+    Rows are limited to ``start_date <= date_field <= end_date``; `aggregate`
+    defaults to ``Sum("value")``.
+    """
+    months = month_starts(start_date, end_date)
+    series = dict.fromkeys(months, default)
+    if not months:
+        return series
+
+    rows = (
+        queryset.filter(
+            **{f"{date_field}__gte": start_date, f"{date_field}__lte": end_date}
+        )
+        .annotate(period=TruncMonth(date_field))
+        .order_by()
+        .values("period")
+        .annotate(total=aggregate or Sum("value"))
+        .values_list("period", "total")
+    )
+    for period, total in rows:
+        series[period] = total if total is not None else default
+    return series
+
+
+def period_totals(
+    queryset: QuerySet,
+    start_date: date,
+    end_date: date,
+    aggregate: Aggregate | None = None,
+    year_field: str = "year",
+    month_field: str = "month",
+    default=ZERO,
+) -> dict[date, Decimal]:
+    """Like `monthly_totals`, for rows keyed by integer year/month columns.
+
+    Accountabilities, and everything reported through them, belong to a
+    reference month stored as two integers rather than a date.
+    """
+    months = month_starts(start_date, end_date)
+    series = dict.fromkeys(months, default)
+    if not months:
+        return series
+
+    first, last = months[0], months[-1]
+    rows = (
+        queryset.filter(
+            **{f"{year_field}__gte": first.year, f"{year_field}__lte": last.year}
+        )
+        .order_by()
+        .values(year_field, month_field)
+        .annotate(total=aggregate or Sum("value"))
+        .values_list(year_field, month_field, "total")
+    )
+    for year, month, total in rows:
+        period = date(year, month, 1)
+        if period in series:
+            series[period] = total if total is not None else default
+    return series
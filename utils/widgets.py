@@ -256,6 +256,10 @@ class BaseFileFormWidget(forms.FileInput):
         super().__init__(*args, **kwargs)
 
 
+class MultipleFileFormWidget(BaseFileFormWidget):
+    allow_multiple_selected = True
+
+
 class CustomCheckboxSelectMultiple(forms.CheckboxSelectMultiple):
     def __init__(self, *args, **kwargs):
         self.input_attrs = kwargs.pop("input_attrs", {})